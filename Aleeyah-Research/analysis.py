@@ -1,34 +1,29 @@
 import pandas as pd
-import re
 import json
 import random
-from scipy.stats import chi2_contingency, mannwhitneyu
-from sentiment_analysis import analyze_phrase  # Import the sentiment analysis function
-
-# Read and preprocess the data
-df = pd.read_csv("comments.csv", low_memory=False)
-df['body'] = df['body'].astype(str).str.strip()
-
-# Enhanced pattern:
-# - Word boundaries for TW, CW, NSFW (case-insensitive)
-# - Allow bold (**TW**), hidden (e.g., >!TW!<), or plain
-pattern = r'(\*\*(TW|CW|NSFW)\*\*|\>\!(TW|CW|NSFW)\!\<|\b(TW|CW|NSFW)\b)'
-
-# Flag censored comments
-df['is_censored'] = df['body'].str.contains(
-    pattern,
-    case=False,
-    regex=True,
-    na=False
-)
-
-# Precompute text features for all comments upfront
-df['has_question_mark'] = df['body'].str.contains(r'\?', regex=True, na=False)
-df['has_quotation_marks'] = df['body'].str.contains(r'[\"\'""'']', regex=True, na=False)
-df['has_brackets'] = df['body'].str.contains(r'\([^)]*\)', regex=True, na=False)
-df['has_asterisk_pair'] = df['body'].str.contains(r'\*[^*]+\*', regex=True, na=False)
-df['parentheses_count'] = df['body'].apply(lambda x: len(re.findall(r'\([^)]*\)', x)))
-df['asterisk_phrase_count'] = df['body'].apply(lambda x: len(re.findall(r'\*[^*]+\*', x)))
+import argparse
+import numpy as np
+from sentiment_analysis import analyze_phrases  # Batch sentiment scoring with a shared analyzer
+from comment_features import compute_features, find_phrases
+from stat_tests import batch_tests, resample_tests
+
+# ------------------------------
+# Data Loading & Text Features
+# ------------------------------
+def load_comments(path: str = "comments.csv", workers: int = None) -> pd.DataFrame:
+    """
+    Read the comments and add the censorship flag, text features and extracted phrases.
+
+    All features come from one scan per comment (see comment_features.py), run over
+    chunks of comments in parallel.
+    """
+    df = pd.read_csv(path, low_memory=False)
+    df['body'] = df['body'].astype(str).str.strip()
+
+    # Censored comments mention TW, CW or NSFW as a word (case-insensitive), whether
+    # plain, bold (**TW**) or hidden (>!TW!<)
+    features = compute_features(df['body'], workers=workers)
+    return df.join(features)
 
 # ------------------------------
 # Helper Functions for Sentiment
@@ -37,34 +32,46 @@ def extract_phrases(text: str) -> list:
     """
     Extract phrases enclosed in double quotes, parentheses, or asterisk pairs.
     """
-    phrases = []
-    # Extract phrases in parentheses
-    phrases.extend(re.findall(r'\(([^)]*)\)', text))
-    # Extract phrases in double quotes
-    phrases.extend(re.findall(r'"([^"]+)"', text))
-    # Extract phrases in asterisk pairs
-    phrases.extend(re.findall(r'\*([^*]+)\*', text))
-    return phrases
+    return find_phrases(text)
+
+# ------------------------------
+# Per-Group Statistics
+# ------------------------------
+BINARY_FEATURES = ['has_question_mark', 'has_quotation_marks', 'has_brackets', 'has_asterisk_pair']
+
+def group_stats_table(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate every per-(subreddit, is_censored) statistic in one groupby pass.
+
+    Returns one row per subreddit and censorship group, in order of first appearance with
+    the censored group first. Groups without comments are included with zero counts.
+    """
+    table = df.assign(any_binary=df[BINARY_FEATURES].any(axis=1)).groupby(
+        ['subreddit', 'is_censored'], sort=False
+    ).agg(
+        total=('is_censored', 'size'),
+        question_marks=('has_question_mark', 'sum'),
+        quotes=('has_quotation_marks', 'sum'),
+        brackets=('has_brackets', 'sum'),
+        asterisks=('has_asterisk_pair', 'sum'),
+        parentheses_total=('parentheses_count', 'sum'),
+        asterisk_total=('asterisk_phrase_count', 'sum'),
+        any_binary=('any_binary', 'sum'),
+    )
+    subreddits = table.index.unique(level='subreddit')
+    full_index = pd.MultiIndex.from_product([subreddits, [True, False]], names=table.index.names)
+    return table.reindex(full_index, fill_value=0)
 
 # ------------------------------
 # Existing Analysis Functions
 # ------------------------------
-def analyze_group(group_df, group_label, subreddit):
-    """Analyze and print statistics for a comment group (censored/uncensored)."""
-    if group_df.empty:
+def analyze_group(stats, group_label, subreddit):
+    """Print statistics for a comment group (censored/uncensored) from its group_stats_table row."""
+    if stats['total'] == 0:
         print(f"No {group_label} comments in r/{subreddit}")
         return
-    
-    total = len(group_df)
-    stats = {
-        'question_marks': group_df['has_question_mark'].sum(),
-        'quotes': group_df['has_quotation_marks'].sum(),
-        'brackets': group_df['has_brackets'].sum(),
-        'asterisks': group_df['has_asterisk_pair'].sum(),
-        'parentheses_total': group_df['parentheses_count'].sum(),
-        'asterisk_total': group_df['asterisk_phrase_count'].sum()
-    }
-    
+
+    total = stats['total']
     print(f"\n--- {group_label} Comments in r/{subreddit} ---")
     print(f"Total: {total} comments")
     print(f"With question marks: {stats['question_marks']} ({stats['question_marks']/total:.1%})")
@@ -74,47 +81,48 @@ def analyze_group(group_df, group_label, subreddit):
     print(f"Avg parentheses phrases per comment: {stats['parentheses_total']/total:.2f}")
     print(f"Avg asterisk phrases per comment: {stats['asterisk_total']/total:.2f}")
 
-def compare_groups(censored, uncensored, subreddit):
-    """Compare censored vs. uncensored groups using statistical tests."""
-    if censored.empty or uncensored.empty:
+# Features compared between censored and uncensored comments, with their report names
+BINARY_TESTS = [
+    ('has_question_mark', "Question Marks"),
+    ('has_quotation_marks', "Quotation Marks"),
+    ('has_brackets', "Brackets"),
+    ('has_asterisk_pair', "Asterisk Pairs")
+]
+COUNT_TESTS = [
+    ('parentheses_count', "Parentheses Phrases"),
+    ('asterisk_phrase_count', "Asterisk Phrases")
+]
+
+def compare_groups(tests, subreddit, resampled=None):
+    """
+    Print the censored vs. uncensored test results of one subreddit.
+
+    tests holds the subreddit's batch_tests rows (chi-square for binary features,
+    Mann-Whitney U for counts); resampled optionally holds its resample_tests rows.
+    """
+    if tests.empty:
         print("Skipping tests: One group is empty")
         return
-    
-    # Chi-square tests for binary features
-    binary_features = [
-        ('has_question_mark', "Question Marks"),
-        ('has_quotation_marks', "Quotation Marks"),
-        ('has_brackets', "Brackets"),
-        ('has_asterisk_pair', "Asterisk Pairs")
-    ]
-    
+    results = tests.set_index('feature')
+
     print("\nFeature Association Tests (Censored vs. Uncensored):")
-    for col, name in binary_features:
-        cont_table = pd.crosstab(
-            pd.concat([censored[col], uncensored[col]]),
-            pd.concat([pd.Series(1, index=censored.index), 
-                       pd.Series(0, index=uncensored.index)])
-        )
-        chi2, p, _, _ = chi2_contingency(cont_table)
-        print(f"{name}: χ²={chi2:.2f}, p={p:.4f}")
-
-    # Mann-Whitney U tests for count features
-    count_features = [
-        ('parentheses_count', "Parentheses Phrases"),
-        ('asterisk_phrase_count', "Asterisk Phrases")
-    ]
-    
-    for col, name in count_features:
-        u_stat, p_val = mannwhitneyu(
-            censored[col], 
-            uncensored[col],
-            alternative='two-sided'
-        )
-        print(f"{name}: U={u_stat:.0f}, p={p_val:.4f}")
-
-def compute_group_stats(group_df):
+    for col, name in BINARY_TESTS:
+        print(f"{name}: χ²={results.at[col, 'statistic']:.2f}, p={results.at[col, 'p_value']:.4f}")
+
+    for col, name in COUNT_TESTS:
+        print(f"{name}: U={results.at[col, 'statistic']:.0f}, p={results.at[col, 'p_value']:.4f}")
+
+    if resampled is not None and not resampled.empty:
+        print("\nResampled Differences (Censored - Uncensored, 95% bootstrap CI, permutation p):")
+        intervals = resampled.set_index('feature')
+        for col, name in BINARY_TESTS + COUNT_TESTS:
+            row = intervals.loc[col]
+            print(f"{name}: {row['difference']:+.4f} [{row['ci_low']:+.4f}, {row['ci_high']:+.4f}], "
+                  f"p={row['permutation_p']:.4f}")
+
+def compute_group_stats(stats):
     """Compute the percentage of comments with each textual feature for visualization."""
-    total = len(group_df)
+    total = stats['total']
     if total == 0:
         return {
             "question_pct": 0,
@@ -123,156 +131,172 @@ def compute_group_stats(group_df):
             "asterisk_pct": 0
         }
     return {
-        "question_pct": group_df['has_question_mark'].sum() / total,
-        "quote_pct": group_df['has_quotation_marks'].sum() / total,
-        "parentheses_pct": group_df['has_brackets'].sum() / total,
-        "asterisk_pct": group_df['has_asterisk_pair'].sum() / total
+        "question_pct": stats['question_marks'] / total,
+        "quote_pct": stats['quotes'] / total,
+        "parentheses_pct": stats['brackets'] / total,
+        "asterisk_pct": stats['asterisks'] / total
     }
 
 # NEW: Function to compute the proportion of comments with any binary feature
-def compute_binary_feature_prop(group_df):
+def compute_binary_feature_prop(stats):
     """Compute the proportion of comments that have at least one binary feature."""
-    total = len(group_df)
+    total = stats['total']
     if total == 0:
         return 0
-    # Check if any binary feature is True for each comment
-    binary_present = group_df[['has_question_mark', 'has_quotation_marks', 'has_brackets', 'has_asterisk_pair']].any(axis=1)
-    return binary_present.sum() / total
+    return stats['any_binary'] / total
+
+def render_results(table: pd.DataFrame) -> dict:
+    """Build the all_results.json content from group_stats_table."""
+    all_results = {}
+    for subreddit in table.index.unique(level='subreddit'):
+        censored_stats = table.loc[(subreddit, True)]
+        uncensored_stats = table.loc[(subreddit, False)]
+        total_comments = censored_stats['total'] + uncensored_stats['total']
+        all_results[subreddit] = {
+            "censored_results": compute_group_stats(censored_stats),
+            "uncensored_results": compute_group_stats(uncensored_stats),
+            "censorship_rate": censored_stats['total'] / total_comments if total_comments else 0
+        }
+    return all_results
 
-# Function to get exactly 50 sentiment scores for each group
-def get_fifty_sentiment_scores(group_df, phrase_type="censored"):
+# ------------------------------
+# Phrase Sampling for Sentiment
+# ------------------------------
+def sample_phrases(group_df, target=50, seed=42):
+    """
+    Draw a seeded random sample of up to `target` non-empty phrases from a comment group.
+
+    Comments are visited in one seeded random order, and the shortest prefix of that order
+    holding at least `target` phrases is taken. Its phrases are then shuffled with the same
+    seed and the first `target` kept. A group with fewer phrases gives all of them.
+    """
+    phrases_per_comment = [
+        [phrase for phrase in phrases if phrase.strip()]  # Ensure phrase is not empty
+        for phrases in group_df['phrases']
+    ]
+    counts = np.fromiter((len(phrases) for phrases in phrases_per_comment), dtype=np.int64,
+                         count=len(phrases_per_comment))
+
+    order = np.random.default_rng(seed).permutation(len(counts))
+    # Number of comments needed before the running phrase count reaches the target
+    needed = int(np.searchsorted(np.cumsum(counts[order]), target)) + 1
+    selected = [phrase for i in order[:needed] for phrase in phrases_per_comment[i]]
+
+    random.Random(seed).shuffle(selected)
+    return selected[:target]
+
+def get_sentiment_scores(group_df, phrase_type="censored", target=50, seed=42):
     """
-    Extract exactly 50 phrases from comments and analyze their sentiment.
-    If not enough phrases are available in the initial sample, the function
-    progressively increases sample size until 50 phrases are found or all
-    comments are exhausted.
+    Sample up to `target` phrases from a comment group and score their sentiment.
     """
-    all_phrases = []
-    all_sentiment_scores = []
-    
-    # Skip if group is empty
     if group_df.empty:
         print(f"No {phrase_type} comments available")
         return []
-    
-    # First try: sample a reasonable number of comments to extract phrases
-    initial_sample_size = min(100, len(group_df))
-    comment_sample = group_df.sample(n=initial_sample_size, random_state=42)
-    
-    # Extract all phrases from this sample
-    for comment in comment_sample['body']:
-        phrases = extract_phrases(comment)
-        all_phrases.extend(phrases)
-    
-    # If we don't have enough phrases, keep sampling more comments
-    remaining_df = group_df[~group_df.index.isin(comment_sample.index)]
-    sample_increment = 50
-    
-    while len(all_phrases) < 50 and not remaining_df.empty:
-        sample_size = min(sample_increment, len(remaining_df))
-        additional_sample = remaining_df.sample(n=sample_size)
-        remaining_df = remaining_df[~remaining_df.index.isin(additional_sample.index)]
-        
-        for comment in additional_sample['body']:
-            additional_phrases = extract_phrases(comment)
-            all_phrases.extend(additional_phrases)
-    
-    # Shuffle all collected phrases and take up to 50
-    random.seed(42)
-    random.shuffle(all_phrases)
-    selected_phrases = all_phrases[:50]
-    
-    # Get sentiment scores for selected phrases
-    for phrase in selected_phrases:
-        if phrase.strip():  # Ensure phrase is not empty
-            compound = analyze_phrase(phrase).get("compound", 0)
-            all_sentiment_scores.append(compound)
-    
-    actual_count = len(all_sentiment_scores)
-    print(f"Analyzed {actual_count} {phrase_type} phrases for sentiment")
-    
-    # If we couldn't get 50 phrases, duplicate some to reach 50
-    # This ensures we always have 50 data points for visualization
-    if 0 < actual_count < 50:
-        print(f"WARNING: Could only find {actual_count} {phrase_type} phrases. Duplicating some to reach 50.")
-        multiplier = 50 // actual_count + 1
-        duplicated_scores = all_sentiment_scores * multiplier
-        all_sentiment_scores = duplicated_scores[:50]
-    
-    return all_sentiment_scores
+
+    phrases = sample_phrases(group_df, target, seed)
+    scores = analyze_phrases(phrases).tolist()
+    print(f"Analyzed {len(scores)} {phrase_type} phrases for sentiment")
+    if len(scores) < target:
+        print(f"NOTE: Only {len(scores)} {phrase_type} phrases available (target {target}).")
+    return scores
 
 # ------------------------------
 # Main Analysis Loop & Sentiment Output
 # ------------------------------
-all_results = {}
-sentiment_results = {}  # Dictionary to store raw sentiment scores
-
-for subreddit in df['subreddit'].unique():
-    print("\n" + "="*60)
-    print(f"Analyzing r/{subreddit}")
-    print("="*60)
-    
-    sub_df = df[df['subreddit'] == subreddit]
-    censored = sub_df[sub_df['is_censored']]
-    uncensored = sub_df[~sub_df['is_censored']]
-    
-    # Basic counts
-    total_comments = len(sub_df)
-    censored_count = len(censored)
-    uncensored_count = len(uncensored)
-    print(f"\nTotal Comments: {total_comments}")
-    if total_comments > 0:
-        print(f"Censored: {censored_count} ({censored_count/total_comments:.1%})")
-        print(f"Uncensored: {uncensored_count} ({(total_comments - censored_count)/total_comments:.1%})")
-    else:
-        print("Censored: 0 (N/A)")
-        print("Uncensored: 0 (N/A)")
-    
-    # Group analysis
-    analyze_group(censored, "Censored", subreddit)
-    analyze_group(uncensored, "Uncensored", subreddit)
-    
-    # Statistical comparisons
-    compare_groups(censored, uncensored, subreddit)
-    
-    # Compute percentages for visualization
-    censored_stats = compute_group_stats(censored)
-    uncensored_stats = compute_group_stats(uncensored)
-    censorship_rate = censored_count / total_comments if total_comments else 0
-    
-    all_results[subreddit] = {
-        "censored_results": censored_stats,
-        "uncensored_results": uncensored_stats,
-        "censorship_rate": censorship_rate
-    }
-    
-    # NEW: Compute and print binary feature proportions
-    censored_binary_pct = compute_binary_feature_prop(censored)
-    uncensored_binary_pct = compute_binary_feature_prop(uncensored)
-    print(f"\nSUBREDDIT {subreddit} CENSORED HAS {censored_binary_pct:.1%} BINARY FEATURES AND UNCENSORED HAS {uncensored_binary_pct:.1%} BINARY FEATURES")
-    
-    # ------------------------------
-    # Extract Raw Sentiment Scores - EXACTLY 50 for each group if possible
-    # ------------------------------
-    print("\nExtracting sentiment data for phrases...")
-    censored_sentiments = get_fifty_sentiment_scores(censored, "censored")
-    uncensored_sentiments = get_fifty_sentiment_scores(uncensored, "uncensored")
-    
-    sentiment_results[subreddit] = {
-        "censored_sentiment_scores": censored_sentiments,
-        "uncensored_sentiment_scores": uncensored_sentiments
-    }
-    
-    # NEW: Print :AK at the end of each subreddit's analysis
-    print(":AK")
+def main():
+    parser = argparse.ArgumentParser(description="Compare censored and uncensored comments per subreddit.")
+    parser.add_argument("--sample-size", type=int, default=50,
+                        help="phrases to sample per group for sentiment (e.g. 50, 500, 5000)")
+    parser.add_argument("--seed", type=int, default=42, help="seed for phrase sampling and resampling")
+    parser.add_argument("--resamples", type=int, default=0,
+                        help="bootstrap/permutation resamples for confidence intervals (0 = off)")
+    args = parser.parse_args()
+
+    df = load_comments()
+
+    # All per-group statistics come from one aggregation; the comment rows of each group
+    # are only needed for the statistical tests and phrase sampling
+    table = group_stats_table(df)
+    all_results = render_results(table)
+    groups = df.groupby(['subreddit', 'is_censored'], sort=False).indices
+
+    # Every subreddit's tests are computed together from feature counts
+    features = [col for col, _ in BINARY_TESTS + COUNT_TESTS]
+    tests = batch_tests(df, [col for col, _ in BINARY_TESTS], [col for col, _ in COUNT_TESTS])
+    tests_by_subreddit = dict(list(tests.groupby('group', sort=False)))
+    no_tests = tests.iloc[0:0]
+    resampled_by_subreddit = {}
+    if args.resamples:
+        resampled = resample_tests(df, features, resamples=args.resamples, seed=args.seed)
+        resampled_by_subreddit = dict(list(resampled.groupby('group', sort=False)))
+    no_comments = df.iloc[0:0]
+
+    def group_rows(subreddit, censored):
+        rows = groups.get((subreddit, censored))
+        return df.iloc[rows] if rows is not None else no_comments
+
+    sentiment_results = {}  # Dictionary to store raw sentiment scores
+
+    for subreddit in table.index.unique(level='subreddit'):
+        print("\n" + "="*60)
+        print(f"Analyzing r/{subreddit}")
+        print("="*60)
+
+        censored_stats = table.loc[(subreddit, True)]
+        uncensored_stats = table.loc[(subreddit, False)]
+        censored = group_rows(subreddit, True)
+        uncensored = group_rows(subreddit, False)
+
+        # Basic counts
+        censored_count = censored_stats['total']
+        uncensored_count = uncensored_stats['total']
+        total_comments = censored_count + uncensored_count
+        print(f"\nTotal Comments: {total_comments}")
+        if total_comments > 0:
+            print(f"Censored: {censored_count} ({censored_count/total_comments:.1%})")
+            print(f"Uncensored: {uncensored_count} ({(total_comments - censored_count)/total_comments:.1%})")
+        else:
+            print("Censored: 0 (N/A)")
+            print("Uncensored: 0 (N/A)")
+
+        # Group analysis
+        analyze_group(censored_stats, "Censored", subreddit)
+        analyze_group(uncensored_stats, "Uncensored", subreddit)
+
+        # Statistical comparisons
+        compare_groups(tests_by_subreddit.get(subreddit, no_tests), subreddit,
+                       resampled_by_subreddit.get(subreddit))
+
+        # NEW: Compute and print binary feature proportions
+        censored_binary_pct = compute_binary_feature_prop(censored_stats)
+        uncensored_binary_pct = compute_binary_feature_prop(uncensored_stats)
+        print(f"\nSUBREDDIT {subreddit} CENSORED HAS {censored_binary_pct:.1%} BINARY FEATURES AND UNCENSORED HAS {uncensored_binary_pct:.1%} BINARY FEATURES")
+
+        # ------------------------------
+        # Extract Raw Sentiment Scores - a seeded sample of phrases for each group
+        # ------------------------------
+        print("\nExtracting sentiment data for phrases...")
+        censored_sentiments = get_sentiment_scores(censored, "censored", args.sample_size, args.seed)
+        uncensored_sentiments = get_sentiment_scores(uncensored, "uncensored", args.sample_size, args.seed)
+
+        sentiment_results[subreddit] = {
+            "censored_sentiment_scores": censored_sentiments,
+            "uncensored_sentiment_scores": uncensored_sentiments
+        }
+
+        # NEW: Print :AK at the end of each subreddit's analysis
+        print(":AK")
+
+    # Write overall feature results to JSON file
+    with open("all_results.json", "w") as f:
+        json.dump(all_results, f, indent=2)
 
-# Write overall feature results to JSON file
-with open("all_results.json", "w") as f:
-    json.dump(all_results, f, indent=2)
+    # Write raw sentiment results to a new JSON file
+    with open("sentiment_results.json", "w") as f:
+        json.dump(sentiment_results, f, indent=2)
 
-# Write raw sentiment results to a new JSON file
-with open("sentiment_results.json", "w") as f:
-    json.dump(sentiment_results, f, indent=2)
+    print("\nOverall analysis complete.")
+    print("Results saved to 'all_results.json' and 'sentiment_results.json'.")
 
-print("\nOverall analysis complete.")
-print("Results saved to 'all_results.json' and 'sentiment_results.json'.")
+if __name__ == "__main__":
+    main()
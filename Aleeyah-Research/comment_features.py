@@ -0,0 +1,127 @@
+"""
+comment_features.py
+
+Single-pass extraction of the textual features analysis.py uses for each comment.
+
+extract_features scans a comment once per delimiter kind with str.find, jumping straight
+between delimiters, and returns every flag, count and bracketed phrase together. The results
+are the same as the separate regexes analysis.py used to run over the whole column:
+
+    is_censored            r'(\\*\\*(TW|CW|NSFW)\\*\\*|\\>\\!(TW|CW|NSFW)\\!\\<|\\b(TW|CW|NSFW)\\b)' (case-insensitive)
+    has_question_mark      r'\\?'
+    has_quotation_marks    r'[\\"\\']'
+    has_brackets           r'\\([^)]*\\)'
+    has_asterisk_pair      r'\\*[^*]+\\*'
+    parentheses_count      len(re.findall(r'\\([^)]*\\)', text))
+    asterisk_phrase_count  len(re.findall(r'\\*[^*]+\\*', text))
+    phrases                contents of (...), "..." and *...* in that order
+
+compute_features applies it to a column, spreading chunks of comments over a process pool.
+"""
+
+import os
+import re
+from multiprocessing import Pool
+
+import pandas as pd
+
+# Bold (**TW**) and spoiler (>!TW!<) markers are delimited by non-word characters, so the
+# plain word-boundary match already finds them
+CENSOR_PATTERN = re.compile(r'\b(?:TW|CW|NSFW)\b', re.IGNORECASE)
+
+FEATURE_COLUMNS = [
+    "is_censored",
+    "has_question_mark",
+    "has_quotation_marks",
+    "has_brackets",
+    "has_asterisk_pair",
+    "parentheses_count",
+    "asterisk_phrase_count",
+    "phrases",
+]
+
+
+def _enclosed(text: str, opening: str, closing: str, allow_empty: bool) -> list:
+    """
+    Return the contents of each non-overlapping opening...closing pair, left to right.
+
+    Matches re.findall(r'<opening>([^<closing>]*)<closing>') when allow_empty is True and
+    the '+' form when it is False.
+    """
+    found = []
+    start = text.find(opening)
+    while start != -1:
+        end = text.find(closing, start + 1)
+        if end == -1:
+            break
+        if end == start + 1 and not allow_empty:
+            # An empty pair cannot match here; the regex retries from the next character
+            start = text.find(opening, start + 1)
+            continue
+        found.append(text[start + 1:end])
+        start = text.find(opening, end + 1)
+    return found
+
+
+def find_phrases(text: str) -> list:
+    """
+    Extract phrases enclosed in parentheses, double quotes, or asterisk pairs.
+    """
+    return (_enclosed(text, "(", ")", True)
+            + _enclosed(text, '"', '"', False)
+            + _enclosed(text, "*", "*", False))
+
+
+def extract_features(text: str) -> tuple:
+    """
+    Compute all comment features in one call.
+
+    Returns:
+        tuple: Values in FEATURE_COLUMNS order.
+    """
+    # Most comments contain none of the delimiters, so check for them before scanning
+    parentheses = _enclosed(text, "(", ")", True) if "(" in text else []
+    quotes = _enclosed(text, '"', '"', False) if '"' in text else []
+    asterisks = _enclosed(text, "*", "*", False) if "*" in text else []
+    # casefold maps every character the case-insensitive regex treats as t/w/c/n/s/f to
+    # its ASCII letter, so the regex only runs on comments that could match
+    folded = text.casefold()
+    censored = ("tw" in folded or "cw" in folded or "nsfw" in folded) and CENSOR_PATTERN.search(text) is not None
+    return (
+        censored,
+        "?" in text,
+        '"' in text or "'" in text,
+        bool(parentheses),
+        bool(asterisks),
+        len(parentheses),
+        len(asterisks),
+        parentheses + quotes + asterisks,
+    )
+
+
+def _extract_chunk(texts: list) -> list:
+    return [extract_features(text) for text in texts]
+
+
+def compute_features(texts: pd.Series, workers: int = None, chunk_size: int = 20000) -> pd.DataFrame:
+    """
+    Compute the features of every text in a column.
+
+    Chunks of chunk_size texts are processed in parallel by workers processes (default: one
+    per CPU); small columns are processed in this process.
+
+    Returns:
+        pd.DataFrame: FEATURE_COLUMNS, indexed like texts.
+    """
+    values = texts.tolist()
+    chunks = [values[start:start + chunk_size] for start in range(0, len(values), chunk_size)]
+    workers = workers or os.cpu_count()
+    if workers > 1 and len(chunks) > 1:
+        with Pool(min(workers, len(chunks))) as pool:
+            rows = [row for chunk in pool.imap(_extract_chunk, chunks) for row in chunk]
+    else:
+        rows = [row for chunk in chunks for row in _extract_chunk(chunk)]
+    features = pd.DataFrame.from_records(rows, columns=FEATURE_COLUMNS, index=texts.index)
+    for column in FEATURE_COLUMNS[:5]:
+        features[column] = features[column].astype(bool)
+    return features
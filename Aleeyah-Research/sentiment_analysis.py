@@ -2,16 +2,62 @@
 """
 sentiment_analysis.py
 
-This script calculates the sentiment of an input phrase using NLTK's VADER SentimentIntensityAnalyzer.
+This script calculates the sentiment of an input phrase using NLTK's VADER SentimentIntensityAnalyzer,
+with the lexicon loaded from the offline snapshot in vader_lexicon.py.
 If run as a script, it will prompt the user for a phrase or accept command-line arguments.
+
+When imported, it provides a small sentiment service: one shared analyzer per process,
+an in-memory LRU cache and an optional on-disk cache for repeated phrases, and a batch API
+(analyze_phrases / score_column) that can spread whole columns over a process pool. Batches
+are scored with the vectorised VaderEngine (sentiment_engine.py), which gives the same scores.
 """
 
+import hashlib
+import os
+import sqlite3
 import sys
-import nltk
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
 from nltk.sentiment import SentimentIntensityAnalyzer
 
-# Download the VADER lexicon if not already available (quietly)
-nltk.download('vader_lexicon', quiet=True)
+from sentiment_engine import VaderEngine
+from vader_lexicon import load_lexicon, make_analyzer
+
+SCORE_KEYS = ("neg", "neu", "pos", "compound")
+
+# Below this many uncached phrases, starting worker processes costs more than it saves
+MIN_PARALLEL_PHRASES = 5000
+
+# Phrases scored per VaderEngine call; bounds the size of its token arrays
+ENGINE_BATCH_SIZE = 10000
+
+
+@lru_cache(maxsize=None)
+def get_analyzer() -> SentimentIntensityAnalyzer:
+    """
+    Return this process's shared analyzer, loading the VADER lexicon snapshot once.
+
+    Nothing is downloaded; see vader_lexicon.py for how the snapshot is built.
+    """
+    return make_analyzer()
+
+
+@lru_cache(maxsize=None)
+def get_engine() -> VaderEngine:
+    """
+    Return this process's shared batch scorer, built on the same lexicon snapshot.
+    """
+    return VaderEngine(load_lexicon())
+
+
+@lru_cache(maxsize=100_000)
+def _cached_scores(phrase: str) -> tuple:
+    scores = get_analyzer().polarity_scores(phrase)
+    return tuple(scores[key] for key in SCORE_KEYS)
+
 
 def analyze_phrase(phrase: str) -> dict:
     """
@@ -23,9 +69,135 @@ def analyze_phrase(phrase: str) -> dict:
     Returns:
         dict: A dictionary with sentiment scores (negative, neutral, positive, compound).
     """
-    sia = SentimentIntensityAnalyzer()
-    scores = sia.polarity_scores(phrase)
-    return scores
+    return dict(zip(SCORE_KEYS, _cached_scores(phrase)))
+
+
+def _score_chunk(phrases: list) -> list:
+    # Runs in worker processes; each worker builds its own engine once
+    engine = get_engine()
+    rows = []
+    for start in range(0, len(phrases), ENGINE_BATCH_SIZE):
+        rows.extend(map(tuple, engine.scores(phrases[start:start + ENGINE_BATCH_SIZE]).tolist()))
+    return rows
+
+
+def phrase_key(phrase: str) -> int:
+    """Stable 63-bit hash of a phrase, used as the on-disk cache key."""
+    digest = hashlib.blake2b(phrase.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1
+
+
+class SentimentCache:
+    """
+    On-disk store of VADER scores keyed by phrase hash, so reruns over the same corpus
+    only score phrases they have not seen before.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS scores "
+            "(key INTEGER PRIMARY KEY, neg REAL, neu REAL, pos REAL, compound REAL)"
+        )
+
+    def get_many(self, keys: list) -> dict:
+        """Return {key: scores tuple} for the keys that are stored."""
+        found = {}
+        # SQLite limits the number of bound parameters per statement
+        for start in range(0, len(keys), 900):
+            chunk = keys[start:start + 900]
+            rows = self.connection.execute(
+                f"SELECT key, neg, neu, pos, compound FROM scores WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            found.update((row[0], row[1:]) for row in rows)
+        return found
+
+    def put_many(self, items: dict) -> None:
+        """Store {key: scores tuple}."""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+                ((key, *scores) for key, scores in items.items()),
+            )
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def analyze_phrases(phrases, key: str = "compound", workers: int = 1,
+                    cache_path: str = None, chunk_size: int = 2000) -> np.ndarray:
+    """
+    Score many phrases at once.
+
+    Each distinct phrase is scored once. Scores already in the on-disk cache at cache_path
+    are reused and new ones are added to it. With workers > 1 (or None for one per CPU),
+    large batches are split across a process pool.
+
+    Parameters:
+        phrases (iterable of str): Phrases to score.
+        key (str): Which score to return: "neg", "neu", "pos", "compound", or "all".
+        workers (int): Number of processes to use for uncached phrases.
+        cache_path (str): Optional SQLite file used as a persistent cache.
+        chunk_size (int): Phrases per task sent to a worker process.
+
+    Returns:
+        np.ndarray: One score per input phrase, in input order, or an (n, 4) array of
+        (neg, neu, pos, compound) rows when key is "all".
+    """
+    phrases = list(phrases)
+    unique = list(dict.fromkeys(phrases))
+    scores = {}
+
+    cache = SentimentCache(cache_path) if cache_path else None
+    try:
+        if cache is not None:
+            keys = [phrase_key(phrase) for phrase in unique]
+            stored = cache.get_many(keys)
+            scores = {phrase: stored[k] for phrase, k in zip(unique, keys) if k in stored}
+
+        missing = [phrase for phrase in unique if phrase not in scores]
+        workers = workers if workers is not None else os.cpu_count()
+        if workers > 1 and len(missing) >= MIN_PARALLEL_PHRASES:
+            # Load the lexicon before starting the pool, so forked workers share it
+            get_engine()
+            chunks = [missing[start:start + chunk_size] for start in range(0, len(missing), chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                new_scores = [row for chunk in pool.map(_score_chunk, chunks) for row in chunk]
+        else:
+            new_scores = _score_chunk(missing)
+        scores.update(zip(missing, new_scores))
+
+        if cache is not None and missing:
+            cache.put_many({phrase_key(phrase): row for phrase, row in zip(missing, new_scores)})
+    finally:
+        if cache is not None:
+            cache.close()
+
+    table = np.array([scores[phrase] for phrase in phrases], dtype=float).reshape(-1, len(SCORE_KEYS))
+    if key == "all":
+        return table
+    return table[:, SCORE_KEYS.index(key)]
+
+
+def score_column(texts: pd.Series, key: str = "compound", workers: int = None,
+                 cache_path: str = None) -> pd.Series:
+    """
+    Score every text in a column, keeping the column's index.
+
+    Missing values are treated as empty text. Uses a process pool by default.
+    """
+    texts = texts.fillna("").astype(str)
+    scores = analyze_phrases(texts, key=key, workers=workers, cache_path=cache_path)
+    return pd.Series(scores, index=texts.index, name=f"sentiment_{key}")
+
 
 def main():
     # Check for a phrase passed via command-line arguments; otherwise, prompt the user.
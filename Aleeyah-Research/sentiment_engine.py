@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+sentiment_engine.py
+
+Batch VADER scoring with NumPy, compatible with NLTK's SentimentIntensityAnalyzer.
+
+polarity_scores in NLTK walks every text in Python, and rebuilds a dict of every word
+combined with every punctuation mark for each text it tokenises. VaderEngine instead:
+
+- tokenises each text once, exactly as NLTK's SentiText does, and maps each token to an
+  integer id. Only tokens that can matter (lexicon words, boosters, negations and the few
+  words the rules look at) get their own id; all other tokens share two ids (plain, and
+  plain ALL CAPS), so the id table stays small on any corpus;
+- looks up valence, booster, negation and caps flags for every token through arrays
+  indexed by id, and applies VADER's caps, booster, negation ("never so"/"never this"),
+  idiom, "least" and "but" rules to all lexicon tokens of a batch at once, on flat ragged
+  arrays of token ids;
+- reproduces NLTK's quirks, including that a repeated token takes the valence computed at
+  its first occurrence, and adds up each text's sentiments in token order, so the sums are
+  the same floats NLTK gets.
+
+Scores are rounded like NLTK (neg/neu/pos to 3 places, compound to 4). They are expected to
+match NLTK exactly; the conformance check allows COMPOUND_TOLERANCE in the compound score
+(one unit in its last rounded place) to absorb floating-point ties at the rounding boundary.
+
+Run as a script to check conformance against NLTK on a sample of a CSV column:
+    python sentiment_engine.py comments.csv --column body --sample 20000
+"""
+
+import argparse
+import math
+import string
+import sys
+import time
+
+import numpy as np
+from nltk.sentiment.vader import VaderConstants
+
+from vader_lexicon import SnapshotAnalyzer, load_lexicon
+
+SCORE_KEYS = ("neg", "neu", "pos", "compound")
+COMPOUND_TOLERANCE = 1e-4
+
+PAD, PLAIN, PLAIN_UPPER = 0, 1, 2
+
+# Words the rules compare tokens with, besides the lexicon, boosters and negations
+RULE_WORDS = {"least", "at", "very", "never", "so", "this", "but", "kind", "of", "just", "enough", "sort"}
+for _phrase in list(VaderConstants.SPECIAL_CASE_IDIOMS) + list(VaderConstants.BOOSTER_DICT):
+    RULE_WORDS.update(_phrase.split())
+
+_PUNCTUATION = frozenset(string.punctuation)
+_PUNC_LIST = frozenset(VaderConstants.PUNC_LIST)
+
+
+def _strip_punctuation(token: str) -> str:
+    """
+    Apply SentiText's punctuation mapping to one token: a token made of one PUNC_LIST
+    entry followed or preceded by a punctuation-free word of 2+ characters becomes the word.
+    """
+    leading = token[0] in _PUNCTUATION
+    if leading == (token[-1] in _PUNCTUATION):
+        # Punctuation on neither side, or on both (then neither form matches)
+        return token
+    if leading:
+        start = 1
+        while token[start] in _PUNCTUATION:
+            start += 1
+        mark, word = token[:start], token[start:]
+    else:
+        end = len(token) - 1
+        while token[end - 1] in _PUNCTUATION:
+            end -= 1
+        word, mark = token[:end], token[end:]
+    if mark in _PUNC_LIST and len(word) > 1 and not any(c in _PUNCTUATION for c in word):
+        return word
+    return token
+
+
+def _sequential_sums(values: np.ndarray, docs: np.ndarray, num_docs: int) -> np.ndarray:
+    """
+    Per-document sums of values grouped by document, added left to right as Python's sum
+    does (np.add.reduceat sums pairwise, which can differ in the last bit).
+    """
+    sums = np.zeros(num_docs)
+    if len(values) == 0:
+        return sums
+    counts = np.bincount(docs, minlength=num_docs)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    order = np.argsort(-counts, kind="stable")
+    descending = -counts[order]
+    order_starts = starts[order]
+    totals = np.zeros(num_docs)
+    # One step per position: add the j-th value of every document that has one
+    for j in range(counts[order[0]]):
+        active = np.searchsorted(descending, -j, side="left")
+        totals[:active] += values[order_starts[:active] + j]
+    sums[order] = totals
+    return sums
+
+
+class VaderEngine:
+    """
+    Vectorised VADER scorer. Create one per process and reuse it: the token id tables grow
+    as new tokens are seen.
+    """
+
+    # Token ids are cached per distinct token string up to this many entries, then reset
+    CACHE_LIMIT = 2_000_000
+
+    def __init__(self, lexicon: dict = None):
+        self.lexicon = lexicon if lexicon is not None else load_lexicon()
+        self.constants = VaderConstants()
+        self.special = set(self.lexicon) | set(self.constants.BOOSTER_DICT) | self.constants.NEGATE | RULE_WORDS
+        self.vocabulary = {}
+        self.token_ids = {}
+        self.columns = {name: [] for name in (
+            "valence", "in_lexicon", "booster", "is_booster", "upper", "negated",
+            "least", "at_or_very", "but", "kind", "of", "never", "so_or_this")}
+        self.arrays = None
+        for token in ("", "plain", "PLAIN"):
+            # PAD, PLAIN and PLAIN_UPPER: no flags except PLAIN_UPPER's caps
+            self._add_token(token, special=False)
+
+    def _add_token(self, token: str, special: bool = True) -> int:
+        lower = token.lower()
+        constants = self.constants
+        in_lexicon = special and lower in self.lexicon
+        is_booster = special and lower in constants.BOOSTER_DICT
+        row = {
+            "valence": self.lexicon[lower] if in_lexicon else 0.0,
+            "in_lexicon": in_lexicon,
+            "booster": constants.BOOSTER_DICT[lower] if is_booster else 0.0,
+            "is_booster": is_booster,
+            "upper": token.isupper(),
+            "negated": special and (lower in constants.NEGATE or "n't" in lower),
+            "least": special and lower == "least",
+            "at_or_very": special and lower in ("at", "very"),
+            "but": special and lower == "but",
+            "kind": special and lower == "kind",
+            "of": special and lower == "of",
+            # _never_check compares the tokens themselves, not their lowercase forms
+            "never": special and token == "never",
+            "so_or_this": special and token in ("so", "this"),
+        }
+        for name, value in row.items():
+            self.columns[name].append(value)
+        self.arrays = None
+        token_id = len(self.columns["valence"]) - 1
+        if special:
+            self.vocabulary[token] = token_id
+        return token_id
+
+    def token_id(self, raw: str) -> int:
+        """
+        Id of a whitespace-separated piece of text (of 2+ characters), after SentiText's
+        punctuation stripping; tokens no rule can look at share PLAIN or PLAIN_UPPER.
+        """
+        token_id = self.token_ids.get(raw)
+        if token_id is None:
+            token = _strip_punctuation(raw)
+            if token in self.vocabulary:
+                token_id = self.vocabulary[token]
+            else:
+                lower = token.lower()
+                if lower in self.special or "n't" in lower:
+                    token_id = self._add_token(token)
+                else:
+                    token_id = PLAIN_UPPER if token.isupper() else PLAIN
+            if len(self.token_ids) >= self.CACHE_LIMIT:
+                self.token_ids.clear()
+            self.token_ids[raw] = token_id
+        return token_id
+
+    def _tables(self) -> dict:
+        if self.arrays is None:
+            self.arrays = {name: np.asarray(values) for name, values in self.columns.items()}
+        return self.arrays
+
+    def encode(self, texts) -> tuple:
+        """
+        Tokenise and encode a batch of texts.
+
+        Returns:
+            tuple: (ids, lengths, exclamations, questions) where ids is the flat int32 array
+            of every text's token ids, lengths the token count of each text, and the last two
+            the number of '!' and '?' in each text.
+        """
+        # Ids are cached by the unstripped piece of text, so a known piece costs one lookup
+        cached = self.token_ids.get
+        token_id = self.token_id
+        ids = []
+        lengths = []
+        exclamations = []
+        questions = []
+        for text in texts:
+            if not isinstance(text, str):
+                text = str(text.encode("utf-8"))
+            count = len(ids)
+            ids.extend([cached(raw) or token_id(raw) for raw in text.split() if len(raw) > 1])
+            lengths.append(len(ids) - count)
+            exclamations.append(text.count("!"))
+            questions.append(text.count("?"))
+        return (np.asarray(ids, dtype=np.int32), np.asarray(lengths, dtype=np.int64),
+                np.asarray(exclamations, dtype=np.int64), np.asarray(questions, dtype=np.int64))
+
+    def _phrase_at(self, phrase, ids, phrase_starts, text_starts, text_ends):
+        # Whether the raw tokens of phrase occur from each flat position, inside its text
+        words = phrase.split()
+        word_ids = [self.vocabulary.get(word, -1) for word in words]
+        if -1 in word_ids:
+            return np.zeros(len(phrase_starts), dtype=bool)
+        found = (phrase_starts >= text_starts) & (phrase_starts + len(words) <= text_ends)
+        for offset, word_id in enumerate(word_ids):
+            found &= ids[np.clip(phrase_starts + offset, 0, max(len(ids) - 1, 0))] == word_id
+        return found
+
+    def _idiom_values(self, ids, phrase_starts, text_starts, text_ends, phrase_length):
+        # Valence of the idiom of phrase_length tokens starting at each position, NaN for none
+        values = np.full(len(phrase_starts), np.nan)
+        for phrase, valence in self.constants.SPECIAL_CASE_IDIOMS.items():
+            if len(phrase.split()) == phrase_length:
+                found = self._phrase_at(phrase, ids, phrase_starts, text_starts, text_ends)
+                values = np.where(np.isnan(values) & found, valence, values)
+        return values
+
+    def scores(self, texts) -> np.ndarray:
+        """
+        Score a batch of texts.
+
+        Parameters:
+            texts (iterable of str): The texts.
+
+        Returns:
+            np.ndarray: Shape (n, 4), the (neg, neu, pos, compound) scores NLTK's
+            polarity_scores gives each text, rounded the same way.
+        """
+        texts = list(texts)
+        ids, lengths, exclamations, questions = self.encode(texts)
+        tables = self._tables()
+        constants = self.constants
+        num_docs = len(texts)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        docs = np.repeat(np.arange(num_docs), lengths)
+        index = np.arange(len(ids))
+        position = index - starts[docs]
+        ends = starts + lengths  # flat index one past each text's last token
+
+        upper_counts = np.bincount(docs, weights=tables["upper"][ids], minlength=num_docs)
+        cap_diff = (lengths - upper_counts > 0) & (lengths - upper_counts < lengths)
+
+        # Rules only change the valence of lexicon tokens, so work on those positions only
+        at = np.flatnonzero(tables["in_lexicon"][ids])
+        doc = docs[at]
+        pos = position[at]
+        begin = starts[doc]
+        end = ends[doc]
+        caps = cap_diff[doc]
+
+        def token(offset):
+            # ids of the token offset places from each lexicon token, PAD outside its text
+            target = at + offset
+            inside = (pos + offset >= 0) & (target < end)
+            return np.where(inside, ids[np.clip(target, 0, max(len(ids) - 1, 0))], PAD)
+
+        def flag(name, offset):
+            return tables[name][token(offset)]
+
+        valence = tables["valence"][ids[at]]
+        item_caps = tables["upper"][ids[at]] & caps
+        valence = np.where(item_caps, np.where(valence > 0, valence + constants.C_INCR, valence - constants.C_INCR), valence)
+
+        for start_i in range(3):
+            previous = -(start_i + 1)
+            active = (pos > start_i) & ~flag("in_lexicon", previous)
+            # scalar_inc_dec of the preceding token, against the valence so far
+            is_booster = flag("is_booster", previous)
+            scalar = np.where(is_booster, tables["booster"][token(previous)], 0.0)
+            scalar = np.where(is_booster & (valence < 0), -scalar, scalar)
+            booster_caps = is_booster & flag("upper", previous) & caps
+            scalar = np.where(booster_caps, np.where(valence > 0, scalar + constants.C_INCR, scalar - constants.C_INCR), scalar)
+            if start_i == 1:
+                scalar = np.where(scalar != 0, scalar * 0.95, scalar)
+            if start_i == 2:
+                scalar = np.where(scalar != 0, scalar * 0.9, scalar)
+            valence = np.where(active, valence + scalar, valence)
+
+            # _never_check
+            if start_i == 0:
+                negate = active & flag("negated", -1)
+                valence = np.where(negate, valence * constants.N_SCALAR, valence)
+            elif start_i == 1:
+                emphasis = active & flag("never", -2) & flag("so_or_this", -1)
+                negate = active & ~emphasis & flag("negated", -2)
+                valence = np.where(emphasis, valence * 1.5, np.where(negate, valence * constants.N_SCALAR, valence))
+            else:
+                emphasis = active & ((flag("never", -3) & flag("so_or_this", -2)) | flag("so_or_this", -1))
+                negate = active & ~emphasis & flag("negated", -3)
+                valence = np.where(emphasis, valence * 1.25, np.where(negate, valence * constants.N_SCALAR, valence))
+
+                # _idioms_check: the first idiom ending at or just before the token wins,
+                # then idioms starting at the token override it
+                idiom = np.flatnonzero(active)
+                idiom_at, idiom_begin, idiom_end = at[idiom], begin[idiom], end[idiom]
+                replaced = np.full(len(idiom), np.nan)
+                for offset, phrase_length in ((-1, 2), (-2, 3), (-2, 2), (-3, 3), (-3, 2)):
+                    found = self._idiom_values(ids, idiom_at + offset, idiom_begin, idiom_end, phrase_length)
+                    replaced = np.where(np.isnan(replaced), found, replaced)
+                for phrase_length in (2, 3):
+                    found = self._idiom_values(ids, idiom_at, idiom_begin, idiom_end, phrase_length)
+                    replaced = np.where(np.isnan(found), replaced, found)
+                # "kind of", "sort of" and "just enough" two or three tokens back dampen it
+                bigram_booster = np.zeros(len(idiom), dtype=bool)
+                for phrase in constants.BOOSTER_DICT:
+                    if " " in phrase:
+                        bigram_booster |= self._phrase_at(phrase, ids, idiom_at - 3, idiom_begin, idiom_end)
+                        bigram_booster |= self._phrase_at(phrase, ids, idiom_at - 2, idiom_begin, idiom_end)
+                replaced = np.where(np.isnan(replaced), valence[idiom], replaced)
+                valence[idiom] = np.where(bigram_booster, replaced + constants.B_DECR, replaced)
+
+        # _least_check
+        least = ~flag("in_lexicon", -1) & flag("least", -1)
+        first_case = (pos > 1) & least
+        valence = np.where(first_case & ~flag("at_or_very", -2), valence * constants.N_SCALAR, valence)
+        valence = np.where(~first_case & (pos > 0) & least, valence * constants.N_SCALAR, valence)
+
+        # Boosters, and "kind" before "of", are skipped even when they are in the lexicon
+        skip = tables["is_booster"][ids[at]] | (tables["kind"][ids[at]] & flag("of", 1))
+        valence = np.where(skip, 0.0, valence)
+
+        # A repeated token takes the valence computed at its first occurrence
+        keys = doc.astype(np.int64) * len(tables["valence"]) + ids[at]
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        sentiment = valence[first][inverse.ravel()]
+
+        # _but_check: halve sentiments before the first "but", raise those after it by half
+        buts = np.flatnonzero(tables["but"][ids])
+        first_but = np.full(num_docs, -1)
+        if len(buts):
+            but_docs, first_index = np.unique(docs[buts], return_index=True)
+            first_but[but_docs] = position[buts[first_index]]
+        has_but = first_but[doc] >= 0
+        sentiment = np.where(has_but & (pos < first_but[doc]), sentiment * 0.5, sentiment)
+        sentiment = np.where(has_but & (pos > first_but[doc]), sentiment * 1.5, sentiment)
+
+        return self._score_valence(sentiment, doc, lengths, exclamations, questions)
+
+    def _score_valence(self, sentiment, doc, lengths, exclamations, questions) -> np.ndarray:
+        num_docs = len(lengths)
+        total = _sequential_sums(sentiment, doc, num_docs)
+        ep = np.minimum(exclamations, 4) * 0.292
+        qm = np.where(questions > 1, np.where(questions <= 3, questions * 0.18, 0.96), 0)
+        amplifier = ep + qm
+        total = np.where(total > 0, total + amplifier, np.where(total < 0, total - amplifier, total))
+        compound = total / np.sqrt(total * total + 15)
+
+        positive = sentiment > 0
+        negative = sentiment < 0
+        pos_sum = _sequential_sums(sentiment[positive] + 1, doc[positive], num_docs)
+        neg_sum = _sequential_sums(sentiment[negative] - 1, doc[negative], num_docs)
+        neu_count = lengths - np.bincount(doc[positive | negative], minlength=num_docs)
+        pos_sum, neg_sum = (np.where(pos_sum > np.fabs(neg_sum), pos_sum + amplifier, pos_sum),
+                            np.where(pos_sum < np.fabs(neg_sum), neg_sum - amplifier, neg_sum))
+        denominator = pos_sum + np.fabs(neg_sum) + neu_count
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pos = np.fabs(pos_sum / denominator)
+            neg = np.fabs(neg_sum / denominator)
+            neu = np.fabs(neu_count / denominator)
+
+        # Python's round, as NLTK uses, rounds the exact binary value; np.round can differ
+        result = np.zeros((num_docs, len(SCORE_KEYS)))
+        scored = lengths > 0
+        for column, values, places in ((0, neg, 3), (1, neu, 3), (2, pos, 3), (3, compound, 4)):
+            result[scored, column] = [round(value, places) for value in values[scored].tolist()]
+        return result
+
+    def compound(self, texts) -> np.ndarray:
+        """Compound score of each text."""
+        return self.scores(texts)[:, SCORE_KEYS.index("compound")]
+
+
+def check_conformance(texts, engine: VaderEngine = None, batch_size: int = 10000) -> dict:
+    """
+    Score texts with VaderEngine and with NLTK, using the engine's lexicon for both, and compare.
+
+    Returns:
+        dict: Number of texts, exact matches of all four scores, compound scores outside
+        COMPOUND_TOLERANCE, the largest compound difference, and both timings in seconds.
+    """
+    engine = engine or VaderEngine()
+    analyzer = SnapshotAnalyzer(engine.lexicon)
+    texts = list(texts)
+
+    start = time.perf_counter()
+    ours = np.concatenate([engine.scores(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+                          or [np.zeros((0, len(SCORE_KEYS)))])
+    engine_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference = np.array([[analyzer.polarity_scores(text)[key] for key in SCORE_KEYS] for text in texts],
+                         dtype=float).reshape(-1, len(SCORE_KEYS))
+    nltk_seconds = time.perf_counter() - start
+
+    difference = np.abs(ours[:, 3] - reference[:, 3])
+    return {
+        "texts": len(texts),
+        "exact": int((ours == reference).all(axis=1).sum()),
+        "outside_tolerance": int((difference > COMPOUND_TOLERANCE + 1e-12).sum()),
+        "max_compound_difference": float(difference.max()) if len(texts) else 0.0,
+        "engine_seconds": engine_seconds,
+        "nltk_seconds": nltk_seconds,
+    }
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Check VaderEngine against NLTK's VADER on a CSV column.")
+    parser.add_argument("csv", help="CSV file with the texts")
+    parser.add_argument("--column", default="body", help="column holding the texts")
+    parser.add_argument("--sample", type=int, default=20000, help="number of texts to check (0 for all)")
+    parser.add_argument("--seed", type=int, default=42, help="seed for sampling the texts")
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.csv, usecols=[args.column], dtype=str)[args.column].dropna()
+    if args.sample and args.sample < len(texts):
+        texts = texts.sample(args.sample, random_state=args.seed)
+    result = check_conformance(texts.tolist())
+
+    print(f"Texts checked: {result['texts']}")
+    print(f"Identical scores: {result['exact']}")
+    print(f"Compound scores differing by more than {COMPOUND_TOLERANCE}: {result['outside_tolerance']}")
+    print(f"Largest compound difference: {result['max_compound_difference']}")
+    print(f"VaderEngine: {result['engine_seconds']:.2f}s, NLTK: {result['nltk_seconds']:.2f}s")
+    if result["outside_tolerance"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+stat_tests.py
+
+Batched censored-vs-uncensored tests for every subreddit and feature at once.
+
+Everything is computed from per-group value frequencies, built with one groupby per feature,
+instead of concatenating and cross-tabulating each subreddit's comments:
+
+- batch_tests: chi-square (with Yates' correction, as scipy's chi2_contingency) on the 2x2
+  table of each binary feature, and Mann-Whitney U (two-sided, as scipy's mannwhitneyu) on
+  each count feature. Results match the scipy functions; the rare cases where scipy would
+  use the exact Mann-Whitney distribution are passed to scipy.
+- resample_tests: seeded bootstrap confidence intervals for the difference in means
+  (censored - uncensored) and permutation p-values for it. Resampling the frequency table
+  (multinomial draws for the bootstrap, multivariate hypergeometric draws for permutations)
+  is equivalent to resampling the comments, so no comment-level data is copied. Each
+  subreddit x feature gets its own seed stream, so results do not depend on the number of
+  worker processes.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2, mannwhitneyu
+from scipy.special import ndtr
+
+
+def chi_square_2x2(observed: np.ndarray) -> tuple:
+    """
+    Chi-square test of independence with Yates' correction for a batch of 2x2 tables.
+
+    Parameters:
+        observed (np.ndarray): Shape (..., 2, 2), rows = feature absent/present,
+            columns = uncensored/censored.
+
+    Returns:
+        tuple: (statistic, p-value) arrays of shape (...). A table with an empty row has
+        one degree of freedom less, so it gives statistic 0 and p-value 1 as scipy does
+        for the single-row table pd.crosstab produces.
+    """
+    observed = observed.astype(float)
+    row_totals = observed.sum(axis=-1, keepdims=True)
+    column_totals = observed.sum(axis=-2, keepdims=True)
+    expected = row_totals * column_totals / observed.sum(axis=(-2, -1), keepdims=True)
+
+    diff = expected - observed
+    corrected = observed + np.sign(diff) * np.minimum(0.5, np.abs(diff))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = (corrected - expected) ** 2 / expected
+    statistic = terms.reshape(terms.shape[:-2] + (4,)).sum(axis=-1)
+    p_value = chi2.sf(statistic, 1)
+
+    degenerate = (row_totals == 0).any(axis=(-2, -1))
+    statistic = np.where(degenerate, 0.0, statistic)
+    p_value = np.where(degenerate, 1.0, p_value)
+    return statistic, p_value
+
+
+def mann_whitney_from_frequencies(values: np.ndarray, first: np.ndarray, second: np.ndarray) -> tuple:
+    """
+    Two-sided Mann-Whitney U tests from value frequencies.
+
+    Parameters:
+        values (np.ndarray): Sorted distinct values, shape (V,).
+        first, second (np.ndarray): How often each value occurs in each sample, shape (..., V).
+
+    Returns:
+        tuple: (U of the first sample, p-value) arrays of shape (...), using the normal
+        approximation with tie and continuity corrections.
+    """
+    first = first.astype(float)
+    second = second.astype(float)
+    combined = first + second
+    n1 = first.sum(axis=-1)
+    n2 = second.sum(axis=-1)
+    n = n1 + n2
+
+    # Average rank of each value: the ranks below it plus the middle of its own block
+    below = np.cumsum(combined, axis=-1) - combined
+    average_rank = below + (combined + 1) / 2
+    u1 = (first * average_rank).sum(axis=-1) - n1 * (n1 + 1) / 2
+    u = np.maximum(u1, n1 * n2 - u1)
+
+    tie_term = (combined ** 3 - combined).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+        z = (u - n1 * n2 / 2 - 0.5) / s
+    p_value = np.clip(2 * ndtr(-z), 0.0, 1.0)
+    return u1, p_value
+
+
+def frequency_table(df: pd.DataFrame, group_col: str, flag_col: str, feature: str):
+    """
+    Count how often each value of a feature occurs per group and flag.
+
+    Returns:
+        tuple: (groups, values, counts) where counts has shape (len(groups), 2, len(values))
+        and the flag axis is ordered uncensored (False), censored (True).
+    """
+    sizes = df.groupby([group_col, flag_col, feature], sort=False).size()
+    groups = pd.unique(df[group_col].dropna())
+    values = np.sort(sizes.index.get_level_values(feature).unique().to_numpy())
+    full_index = pd.MultiIndex.from_product([groups, [False, True], values])
+    counts = sizes.reindex(full_index, fill_value=0).to_numpy()
+    return groups, values, counts.reshape(len(groups), 2, len(values))
+
+
+def batch_tests(df: pd.DataFrame, binary_features: list, count_features: list,
+                group_col: str = 'subreddit', flag_col: str = 'is_censored') -> pd.DataFrame:
+    """
+    Run every censored-vs-uncensored test for every group in one batch.
+
+    Returns:
+        pd.DataFrame: Columns group, feature, test ("chi2" or "mannwhitneyu"), statistic and
+        p_value, one row per group and feature. Groups where either side has no comments
+        are left out.
+    """
+    frames = []
+    for feature in binary_features:
+        groups, values, counts = frequency_table(df, group_col, flag_col, feature)
+        # Rows absent/present; a feature that is never (or always) present has one value
+        observed = np.zeros((len(groups), 2, 2))
+        for index, value in enumerate(values):
+            observed[:, int(bool(value)), :] += counts[:, :, index]
+        statistic, p_value = chi_square_2x2(observed)
+        frames.append(_result_frame(groups, feature, "chi2", statistic, p_value, counts))
+
+    for feature in count_features:
+        groups, values, counts = frequency_table(df, group_col, flag_col, feature)
+        censored, uncensored = counts[:, 1], counts[:, 0]
+        statistic, p_value = mann_whitney_from_frequencies(values, censored, uncensored)
+        # scipy uses the exact distribution for small samples without ties
+        n1, n2 = censored.sum(axis=-1), uncensored.sum(axis=-1)
+        exact = ((n1 <= 8) | (n2 <= 8)) & ((censored + uncensored) <= 1).all(axis=-1) & (n1 > 0) & (n2 > 0)
+        for index in np.flatnonzero(exact):
+            result = mannwhitneyu(np.repeat(values, censored[index]), np.repeat(values, uncensored[index]),
+                                  alternative='two-sided')
+            statistic[index], p_value[index] = result.statistic, result.pvalue
+        frames.append(_result_frame(groups, feature, "mannwhitneyu", statistic, p_value, counts))
+
+    if not frames:
+        return pd.DataFrame(columns=["group", "feature", "test", "statistic", "p_value"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _result_frame(groups, feature, test, statistic, p_value, counts):
+    both_sides = (counts.sum(axis=-1) > 0).all(axis=-1)
+    return pd.DataFrame({
+        "group": groups,
+        "feature": feature,
+        "test": test,
+        "statistic": statistic,
+        "p_value": p_value,
+    })[both_sides]
+
+
+def _resample_one(task):
+    values, censored, uncensored, resamples, confidence, seed = task
+    rng = np.random.default_rng(seed)
+    n1, n2 = censored.sum(), uncensored.sum()
+    observed = censored @ values / n1 - uncensored @ values / n2
+
+    # Bootstrap: resample each group with replacement, i.e. a multinomial draw of its frequencies
+    boot = (rng.multinomial(n1, censored / n1, size=resamples) @ values / n1
+            - rng.multinomial(n2, uncensored / n2, size=resamples) @ values / n2)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(boot, [alpha, 1 - alpha])
+
+    # Permutation: shuffle the labels, i.e. draw the censored group from the pooled frequencies
+    pooled = censored + uncensored
+    permuted = rng.multivariate_hypergeometric(pooled, n1, size=resamples)
+    permuted_diff = permuted @ values / n1 - (pooled - permuted) @ values / n2
+    extreme = np.count_nonzero(np.abs(permuted_diff) >= abs(observed) - 1e-12)
+    p_value = (extreme + 1) / (resamples + 1)
+    return observed, low, high, p_value
+
+
+def resample_tests(df: pd.DataFrame, features: list, resamples: int = 10000, seed: int = 42,
+                   confidence: float = 0.95, workers: int = None,
+                   group_col: str = 'subreddit', flag_col: str = 'is_censored') -> pd.DataFrame:
+    """
+    Bootstrap confidence intervals and permutation p-values for the censored - uncensored
+    difference in the mean of each feature (the proportion, for binary features).
+
+    Each group and feature is one task, run in parallel over worker processes (default:
+    one per CPU) with its own seed derived from `seed`.
+
+    Returns:
+        pd.DataFrame: Columns group, feature, difference, ci_low, ci_high, permutation_p.
+        Groups where either side has no comments are left out.
+    """
+    tasks = []
+    keys = []
+    for feature_index, feature in enumerate(features):
+        groups, values, counts = frequency_table(df, group_col, flag_col, feature)
+        values = values.astype(float)
+        for group_index, (group, (uncensored, censored)) in enumerate(zip(groups, counts)):
+            # Independent stream per (feature, group), the same however tasks are scheduled
+            task_seed = np.random.SeedSequence(seed, spawn_key=(feature_index, group_index))
+            if censored.sum() == 0 or uncensored.sum() == 0:
+                continue
+            tasks.append((values, censored, uncensored, resamples, confidence, task_seed))
+            keys.append((group, feature))
+
+    workers = workers or os.cpu_count()
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_resample_one, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+    else:
+        results = [_resample_one(task) for task in tasks]
+
+    return pd.DataFrame(
+        [(group, feature, *result) for (group, feature), result in zip(keys, results)],
+        columns=["group", "feature", "difference", "ci_low", "ci_high", "permutation_p"],
+    )
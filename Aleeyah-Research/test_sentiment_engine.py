@@ -0,0 +1,117 @@
+"""
+test_sentiment_engine.py
+
+Conformance of VaderEngine with NLTK's SentimentIntensityAnalyzer, on hand-written texts and
+a seeded generated sample exercising each VADER rule.
+
+Both scorers use test_data/vader_lexicon_sample.txt, 301 entries of the VADER lexicon
+(MIT licensed, from vaderSentiment) including every word and emoticon the hand-written texts
+rely on, so the tests run offline without nltk_data or the lexicon snapshot.
+"""
+
+import os
+import random
+
+import pytest
+from nltk.sentiment.vader import VaderConstants
+
+from sentiment_engine import VaderEngine, check_conformance
+from vader_lexicon import parse_lexicon
+
+SAMPLE_LEXICON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_data", "vader_lexicon_sample.txt")
+
+EMOTICONS = [":)", ":(", ":-)", ":-(", ":D", ";)", ":/", ":'(", "<3", ":P", "xD", "D:"]
+PUNCTUATION = ["", "", "!", "!!", "!!!!!", "?", "??", "?!", "?!?!", "...", ",", "."]
+FILLER = ["the", "a", "this", "it", "was", "movie", "food", "day", "and", "i", "so", "very",
+          "least", "at", "kind", "of", "sort", "just", "enough", "never", "but", "BUT"]
+
+HAND_WRITTEN = [
+    "",
+    "   ",
+    "!!!",
+    "The movie was good.",
+    "The movie was GOOD.",
+    "The movie was VERY GOOD!!!",
+    "The movie was not good.",
+    "The movie wasn't very good at all",
+    "It isn't horrible, but it is not great either",
+    "I liked it but the ending was terrible",
+    "The food was good BUT the service was awful!",
+    "Never so happy in my life",
+    "never this sad before, never so good",
+    "At least it was not boring",
+    "It was the least bad option",
+    "Kind of good, sort of sad",
+    "This party is the bomb!!",
+    "That was the shit, yeah right",
+    "It was a kiss of death for the team",
+    "The cake was to die for :)",
+    "He could not cut the mustard :(",
+    "Living hand to mouth with a beating heart",
+    "A back handed compliment from a bad ass",
+    "Are you happy?", "Are you happy???", "Are you happy?!?!",
+    "I am HAPPY and you are sad",
+    "ALL CAPS TEXT IS ANGRY AND SAD",
+    "extremely good, barely good, hardly bad, totally awesome",
+    "Not bad :D <3 ;)",
+    "no, nope, nothing good ever happens",
+    "without doubt the best day",
+    "good good good good good",
+    "sad... sad, sad! sad? SAD",
+    "Naïve café was lovely, ünhappy though",
+]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    with open(SAMPLE_LEXICON, encoding="utf-8") as f:
+        return VaderEngine(parse_lexicon(f.read()))
+
+
+def generated_texts(lexicon: dict, count: int = 3000, seed: int = 7) -> list:
+    """
+    Seeded random texts mixing lexicon words, boosters, negations, "but", ALL CAPS words,
+    emoticons, punctuation runs and the special idioms.
+
+    Returns:
+        list: The texts.
+    """
+    rng = random.Random(seed)
+    constants = VaderConstants()
+    words = sorted(word for word in lexicon if word.isalpha())
+    boosters = sorted(constants.BOOSTER_DICT)
+    negations = sorted(constants.NEGATE)
+    idioms = sorted(constants.SPECIAL_CASE_IDIOMS)
+    pools = [words, words, words, boosters, negations, idioms, EMOTICONS, FILLER, FILLER]
+
+    texts = []
+    for _ in range(count):
+        tokens = []
+        for _ in range(rng.randint(1, 25)):
+            token = rng.choice(rng.choice(pools))
+            if rng.random() < 0.1:
+                token = token.upper()
+            tokens.append(token + rng.choice(PUNCTUATION[:3]))
+        texts.append(" ".join(tokens) + rng.choice(PUNCTUATION))
+    return texts
+
+
+def test_hand_written_texts(engine):
+    result = check_conformance(HAND_WRITTEN, engine=engine)
+    assert result["texts"] == len(HAND_WRITTEN)
+    assert result["outside_tolerance"] == 0
+
+
+def test_generated_sample(engine):
+    texts = generated_texts(engine.lexicon)
+    result = check_conformance(texts, engine=engine, batch_size=500)
+    assert result["texts"] == len(texts)
+    assert result["outside_tolerance"] == 0
+
+
+def test_scores_do_not_depend_on_batching(engine):
+    texts = generated_texts(engine.lexicon, count=300, seed=11)
+    whole = engine.scores(texts)
+    for size in (1, 7, 300):
+        for start in range(0, len(texts), size):
+            assert (engine.scores(texts[start:start + size]) == whole[start:start + size]).all()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+vader_lexicon.py
+
+Offline loading of the VADER lexicon.
+
+NLTK's SentimentIntensityAnalyzer reads vader_lexicon.txt out of a zip in nltk_data and
+parses it line by line every time an analyzer is created, and the scripts used to fall back
+to nltk.download when it was missing. Instead, the lexicon is parsed once into a pickled
+snapshot (vader_lexicon.pickle, next to this file) that loads in a few milliseconds and is
+never fetched over the network.
+
+The snapshot is not in the repository. Build it once, from the copy in nltk_data (fetched on
+a machine with network access with nltk.download('vader_lexicon')) or from a local
+vader_lexicon.txt, then copy vader_lexicon.pickle to machines without network access:
+    python vader_lexicon.py [path/to/vader_lexicon.txt]
+If no snapshot exists when one is needed, it is built from nltk_data automatically; if the
+lexicon is not available locally either, a LookupError lists these steps.
+"""
+
+import os
+import pickle
+import sys
+from functools import lru_cache
+
+from nltk.sentiment.vader import SentimentIntensityAnalyzer, VaderConstants
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vader_lexicon.pickle")
+NLTK_LEXICON = "sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt"
+
+
+def parse_lexicon(text: str) -> dict:
+    """
+    Parse vader_lexicon.txt into {token: valence}, as SentimentIntensityAnalyzer.make_lex_dict does.
+    """
+    lexicon = {}
+    for line in text.split("\n"):
+        word, measure = line.strip().split("\t")[0:2]
+        lexicon[word] = float(measure)
+    return lexicon
+
+
+def read_lexicon_text(lexicon_path: str = None) -> str:
+    """
+    Read vader_lexicon.txt from lexicon_path, or from the local nltk_data (never downloaded).
+    """
+    if lexicon_path is not None:
+        with open(lexicon_path, encoding="utf-8") as f:
+            return f.read()
+    import nltk.data
+    try:
+        return nltk.data.load(NLTK_LEXICON)
+    except LookupError:
+        script = os.path.abspath(__file__)
+        raise LookupError(
+            f"No VADER lexicon snapshot at {SNAPSHOT_PATH}, and vader_lexicon.txt is not in "
+            f"nltk_data (searched: {', '.join(nltk.data.path)}). Nothing is downloaded "
+            "automatically. To create the snapshot:\n"
+            "  1. on a machine with network access, run\n"
+            "       python -c \"import nltk; nltk.download('vader_lexicon')\"\n"
+            f"  2. then build the snapshot with\n       python {script}\n"
+            f"  3. copy {os.path.basename(SNAPSHOT_PATH)} next to vader_lexicon.py on machines "
+            "without network access.\n"
+            "Alternatively, build it from a local copy of the lexicon with\n"
+            f"       python {script} path/to/vader_lexicon.txt"
+        ) from None
+
+
+def build_snapshot(lexicon_path: str = None, snapshot_path: str = SNAPSHOT_PATH) -> dict:
+    """
+    Parse the lexicon and save it as a pickled dict at snapshot_path.
+
+    Returns:
+        dict: The parsed lexicon.
+    """
+    lexicon = parse_lexicon(read_lexicon_text(lexicon_path))
+    # Write beside the snapshot and swap, so concurrent readers never see a partial file
+    temporary = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        pickle.dump(lexicon, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, snapshot_path)
+    return lexicon
+
+
+@lru_cache(maxsize=None)
+def load_lexicon(snapshot_path: str = SNAPSHOT_PATH) -> dict:
+    """
+    Return the lexicon from the snapshot, building the snapshot first if there is none.
+
+    Cached per process; worker processes forked after the first call share the loaded dict.
+    """
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, "rb") as f:
+            return pickle.load(f)
+    return build_snapshot(snapshot_path=snapshot_path)
+
+
+class SnapshotAnalyzer(SentimentIntensityAnalyzer):
+    """
+    SentimentIntensityAnalyzer using an already parsed lexicon instead of reading nltk_data.
+    """
+
+    def __init__(self, lexicon: dict):
+        self.lexicon = lexicon
+        self.constants = VaderConstants()
+
+
+def make_analyzer(snapshot_path: str = SNAPSHOT_PATH) -> SentimentIntensityAnalyzer:
+    """
+    Create an analyzer backed by the lexicon snapshot.
+    """
+    return SnapshotAnalyzer(load_lexicon(snapshot_path))
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    lexicon = build_snapshot(path)
+    print(f"Wrote {len(lexicon)} entries to {SNAPSHOT_PATH}")
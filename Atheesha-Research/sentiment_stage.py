@@ -0,0 +1,235 @@
+"""
+Parallel, resumable VADER scoring of posts.csv for research.ipynb.
+
+posts.csv is read in chunks of rows. Each chunk is scored in a worker process and saved
+as its own checkpoint file, so an interrupted run picks up after the last finished chunk
+instead of starting over. When every chunk is done, the checkpoints are combined into one
+file keyed by submission_id that the notebook joins onto the posts:
+
+    submission_id, sentiment_score, sentiment_label, cleaned_sentiment_score,
+    weighted_sentiment_score, weighted_sentiment_label
+
+sentiment_score is VADER's compound score of the raw selftext (labelled at +-0.05),
+cleaned_sentiment_score the same for the preprocessed text, and weighted_sentiment_score
+the frequency-weighted per-word score of the preprocessed text (labelled at +-0.1), as in
+the notebook's two sentiment cells. Scores come from the vectorised VaderEngine in
+Aleeyah-Research/sentiment_engine.py, a chunk at a time; they are the same as NLTK's.
+
+Usage:
+    python sentiment_stage.py posts.csv -o posts_sentiment.csv --workers 8
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# The offline VADER lexicon snapshot and batch scorer are shared with Aleeyah-Research's sentiment service
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Aleeyah-Research"))
+from sentiment_engine import VaderEngine
+from vader_lexicon import load_lexicon, make_analyzer
+
+OUTPUT_COLUMNS = ["submission_id", "sentiment_score", "sentiment_label", "cleaned_sentiment_score",
+                  "weighted_sentiment_score", "weighted_sentiment_label"]
+
+# Texts per VaderEngine call, and distinct words whose scores are kept per process
+ENGINE_BATCH_SIZE = 10000
+WORD_CACHE_SIZE = 200_000
+
+
+@lru_cache(maxsize=None)
+def get_analyzer():
+    # One analyzer per process, from the pre-parsed lexicon snapshot; nothing is downloaded
+    return make_analyzer()
+
+
+@lru_cache(maxsize=None)
+def get_engine():
+    # One batch scorer per process, on the same lexicon snapshot
+    return VaderEngine(load_lexicon())
+
+
+# Text preprocessing function
+def preprocess_text(text):
+    text = text.lower()  # Convert to lowercase
+    text = re.sub(r'\s+', ' ', text)  # Remove extra spaces
+    text = re.sub(r'http\S+', '', text)  # Remove URLs
+    text = re.sub(r'@\w+', '', text)  # Remove mentions (@user)
+    text = re.sub(r'#\w+', '', text)  # Remove hashtags (#topic)
+    text = re.sub(r'[^\w\s]', '', text)  # Remove punctuation
+    return text.strip()
+
+
+def get_sentiment(text):
+    return get_analyzer().polarity_scores(text)['compound']
+
+
+def score_texts(texts):
+    """Compound score of each text, scored in batches by the engine."""
+    texts = list(texts)
+    engine = get_engine()
+    scores = [engine.compound(texts[start:start + ENGINE_BATCH_SIZE])
+              for start in range(0, len(texts), ENGINE_BATCH_SIZE)]
+    return np.concatenate(scores) if scores else np.zeros(0)
+
+
+# Words repeat across posts far more than texts do, so their scores are worth keeping
+word_scores = {}
+
+
+def score_words(texts):
+    # Score the words of texts that have no score yet, all in one batch
+    new_words = list({word for text in texts for word in text.split()} - word_scores.keys())
+    if len(word_scores) + len(new_words) > WORD_CACHE_SIZE:
+        word_scores.clear()
+    word_scores.update(zip(new_words, score_texts(new_words).tolist()))
+
+
+def word_sentiment(word):
+    score = word_scores.get(word)
+    return score if score is not None else get_sentiment(word)
+
+
+def get_weighted_sentiment(text):
+    words = text.split()
+    word_freq = Counter(words)
+    sentiment_score = 0
+    for word, freq in word_freq.items():
+        sentiment_score += word_sentiment(word) * freq
+    return sentiment_score / max(len(words), 1)  # Normalize
+
+
+def classify_sentiment(score, threshold=0.05):
+    if score >= threshold:
+        return 'Positive'
+    elif score <= -threshold:
+        return 'Negative'
+    else:
+        return 'Neutral'
+
+
+def keep_posts_with_text(df):
+    # Drop rows where 'selftext' is missing, empty or the string "nan"
+    df = df.dropna(subset=['selftext'])
+    df = df[df['selftext'].str.strip() != ""]
+    df = df[df['selftext'].str.strip().str.lower() != "nan"]
+    return df
+
+
+def score_chunk(chunk):
+    """Score a frame of submission_id/selftext rows into the output columns."""
+    chunk = keep_posts_with_text(chunk)
+    result = pd.DataFrame({"submission_id": chunk["submission_id"]})
+    result["sentiment_score"] = score_texts(chunk["selftext"])
+    result["sentiment_label"] = result["sentiment_score"].map(classify_sentiment)
+    cleaned = chunk["selftext"].map(preprocess_text)
+    result["cleaned_sentiment_score"] = score_texts(cleaned)
+    score_words(cleaned)
+    result["weighted_sentiment_score"] = cleaned.map(get_weighted_sentiment)
+    result["weighted_sentiment_label"] = result["weighted_sentiment_score"].map(
+        lambda score: classify_sentiment(score, threshold=0.1))
+    return result
+
+
+def read_scores(path):
+    # round_trip parsing reads back exactly the floats that were written
+    return pd.read_csv(path, dtype={"submission_id": str}, float_precision="round_trip")
+
+
+def checkpoint_path(checkpoint_dir, index):
+    return os.path.join(checkpoint_dir, f"chunk-{index:05d}.csv")
+
+
+def write_checkpoint(chunk, checkpoint_dir, index):
+    # Write to a temporary name first so a crash never leaves a half-written checkpoint
+    path = checkpoint_path(checkpoint_dir, index)
+    score_chunk(chunk).to_csv(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    return index
+
+
+def prepare_checkpoints(input_path, checkpoint_dir, chunk_size):
+    """Create the checkpoint directory, discarding checkpoints made from other input."""
+    stat = os.stat(input_path)
+    manifest = {"input": os.path.abspath(input_path), "size": stat.st_size,
+                "mtime": stat.st_mtime, "chunk_size": chunk_size}
+    manifest_path = os.path.join(checkpoint_dir, "manifest.json")
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) == manifest:
+                return
+    for name in os.listdir(checkpoint_dir):
+        if name.startswith("chunk-"):
+            os.remove(os.path.join(checkpoint_dir, name))
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+
+
+def run_stage(input_path="posts.csv", output_path="posts_sentiment.csv", checkpoint_dir=None,
+              chunk_size=5000, workers=None, force=False):
+    """
+    Score every post in input_path and write the sentiment columns to output_path.
+
+    Returns the output as a DataFrame. An existing output newer than the input is loaded
+    as is unless force is set; otherwise only chunks without a checkpoint are scored.
+    """
+    if (not force and os.path.exists(output_path)
+            and os.path.getmtime(output_path) >= os.path.getmtime(input_path)):
+        return read_scores(output_path)
+
+    checkpoint_dir = checkpoint_dir or output_path + ".checkpoints"
+    prepare_checkpoints(input_path, checkpoint_dir, chunk_size)
+    workers = workers or os.cpu_count()
+    # Load the lexicon before starting the pool, so forked workers share it
+    get_engine()
+
+    chunks = pd.read_csv(input_path, usecols=["submission_id", "selftext"],
+                         dtype=str, chunksize=chunk_size)
+    num_chunks = 0
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for index, chunk in enumerate(chunks):
+            num_chunks += 1
+            if os.path.exists(checkpoint_path(checkpoint_dir, index)):
+                continue
+            pending.append(pool.submit(write_checkpoint, chunk, checkpoint_dir, index))
+            # Keep only a couple of chunks per worker in memory
+            while len(pending) >= 2 * workers:
+                pending.popleft().result()
+                done += 1
+        for future in pending:
+            future.result()
+            done += 1
+    print(f"Scored {done} chunks, reused {num_chunks - done} checkpoints")
+
+    result = pd.concat(
+        [read_scores(checkpoint_path(checkpoint_dir, index)) for index in range(num_chunks)],
+        ignore_index=True,
+    )
+    # One row per post, so joining on submission_id never duplicates posts
+    result = result.drop_duplicates("submission_id")[OUTPUT_COLUMNS]
+    result.to_csv(output_path + ".tmp", index=False)
+    os.replace(output_path + ".tmp", output_path)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score posts with VADER in parallel, resumably.")
+    parser.add_argument("input", nargs="?", default="posts.csv", help="posts CSV with submission_id and selftext")
+    parser.add_argument("-o", "--output", default="posts_sentiment.csv", help="where to write the sentiment columns")
+    parser.add_argument("--checkpoints", help="checkpoint directory (default: <output>.checkpoints)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="posts per checkpoint")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="rescore even if the output is up to date")
+    args = parser.parse_args()
+
+    run_stage(args.input, args.output, args.checkpoints, args.chunk_size, args.workers, args.force)
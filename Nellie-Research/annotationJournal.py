@@ -0,0 +1,99 @@
+import csv
+import os
+from datetime import datetime, timezone
+
+# Append-only log of annotation decisions for one ranked results file. Each line is
+#   action, submission_id, label, offset, timestamp
+# where action is one of
+#   open    a session started; offset is the results file's size, to notice a replaced file
+#   sort    the row at byte offset `offset` of the results file was given `label` (1-based)
+#   skip    the row at `offset` was shown and skipped
+#   undo    the latest sort not yet undone or exported is withdrawn
+#   export  every pending sort has been appended to the label files
+# Every entry is flushed and fsynced before the next prompt, so no decision is lost if the
+# process dies, and the results file itself is never rewritten during a session.
+journalFields = ["action", "submission_id", "label", "offset", "timestamp"]
+
+class AnnotationJournal:
+        def __init__(self, path, resultsFile):
+                self.path = path
+                self.pending = []       # (submission_id, label, offset) sorted but not yet exported
+                self.sortedIds = set()  # every id sorted and not undone, exported or not
+                self.cursor = None      # offset of the last row shown, where the next session resumes
+                self.resultsSize = None
+                self.replay()
+                size = os.path.getsize(resultsFile)
+                if self.resultsSize is not None and size != self.resultsSize:
+                        # the ranking was regenerated, so stored offsets no longer point at rows
+                        if self.pending:
+                                raise RuntimeError(resultsFile + " changed with unexported decisions in " + path)
+                        self.cursor = None
+                self.file = open(path, mode='a', newline='', encoding='utf-8')
+                self.writer = csv.writer(self.file)
+                self.record("open", offset=size)
+
+        def replay(self):
+                if not os.path.exists(self.path):
+                        return
+                with open(self.path, newline='', encoding='utf-8') as file:
+                        content = file.read()
+                # a crash mid-write can leave a torn last line; it was never acknowledged, so drop it
+                if content and not content.endswith('\n'):
+                        content = content[:content.rfind('\n') + 1]
+                        with open(self.path, mode='r+', newline='', encoding='utf-8') as file:
+                                file.truncate(len(content.encode('utf-8')))
+                for values in csv.reader(content.splitlines()):
+                        if len(values) == len(journalFields):
+                                self.apply(*values[:4])
+
+        def apply(self, action, submissionId, label, offset):
+                if action == "open":
+                        self.resultsSize = int(offset)
+                elif action == "sort":
+                        self.pending.append((submissionId, int(label), int(offset)))
+                        self.sortedIds.add(submissionId)
+                        self.cursor = int(offset)
+                elif action == "skip":
+                        self.cursor = int(offset)
+                elif action == "undo":
+                        if self.pending:
+                                self.sortedIds.discard(self.pending.pop()[0])
+                elif action == "export":
+                        self.pending = []
+
+        def record(self, action, submissionId='', label='', offset=''):
+                timestamp = datetime.now(timezone.utc).isoformat(timespec='seconds')
+                self.writer.writerow([action, submissionId, label, offset, timestamp])
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.apply(action, submissionId, label, offset)
+
+        def sort(self, submissionId, label, offset):
+                self.record("sort", submissionId, label, offset)
+
+        def skip(self, submissionId, offset):
+                self.record("skip", submissionId, offset=offset)
+
+        def undo(self):
+                self.record("undo")
+
+        def markExported(self):
+                self.record("export")
+
+        def reset(self, resultsFile):
+                # start an empty journal, after compaction has rewritten the results file
+                self.file.close()
+                temporary = self.path + '.tmp'
+                with open(temporary, mode='w', newline='', encoding='utf-8') as file:
+                        file.flush()
+                        os.fsync(file.fileno())
+                os.replace(temporary, self.path)
+                self.pending = []
+                self.sortedIds = set()
+                self.cursor = None
+                self.file = open(self.path, mode='a', newline='', encoding='utf-8')
+                self.writer = csv.writer(self.file)
+                self.record("open", offset=os.path.getsize(resultsFile))
+
+        def close(self):
+                self.file.close()
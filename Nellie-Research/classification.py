@@ -1,5 +1,12 @@
+import argparse
 import csv
-import re
+import os
+import queue
+import sys
+import threading
+from annotationJournal import AnnotationJournal
+from ranking import openRows, readRowAt, readRows
+from scoringEngine import ScoringEngine, decodeSpans, loadLexicon
 
 options ="1: explicit mh disclosure\n" \
         "2: low mood disclosure\n" \
@@ -9,103 +16,190 @@ options ="1: explicit mh disclosure\n" \
 fieldnames = ["score","submission_id", "author", "subreddit", "body"]
 filenames = ["mhDisclosure.csv", "lmDisclosure.csv", "incorrect.csv"]
 
-sorted = [[] for _ in range(3)]
-toDelete = []
+journal = None
 counter = 0
 
-with open('mentalhealth_lexicon.csv', newline='', encoding='utf-8-sig') as file:
-        content = file.read() 
-        mhLexicon = set(word.lower() for word in content.split(','))  
-
-with open('emotion_lexicon.csv', newline='', encoding='utf-8-sig') as file:
-        content = file.read() 
-        emLexicon = set(word.lower() for word in content.split(',')) 
-
-def deleteSorted(filename):
-    remaining = []
-    with open(filename, newline='', encoding='utf-8-sig') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            if row['submission_id'] not in toDelete:
-                remaining.append(row)
-    
-    with open(filename, mode='w', newline='', encoding='utf-8-sig') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(remaining)
+# only used for results files written before scoring.py stored match spans
+engine = ScoringEngine(loadLexicon('mentalhealth_lexicon.csv'), loadLexicon('emotion_lexicon.csv'))
+
+# ANSI colours for highlighted words, or brackets when the output is not a terminal
+colours = {"mh": "\033[1;31m", "em": "\033[1;33m", "mh+em": "\033[1;35m"}
 
-def writeResults():
+def writeResults(filename):
+    # append the pending sorted rows to the label files, reading each back from its offset
+    sortedRows = [[] for _ in filenames]
+    with open(filename, 'rb') as csvfile:
+        header = openRows(csvfile)[2]
+        for submissionId, label, offset in journal.pending:
+            sortedRows[label - 1].append(readRowAt(csvfile, header, offset))
     index = 0
     for file in filenames:
         with open(file, mode='a', newline='', encoding='utf-8-sig') as resultFile:
-            postWriter = csv.DictWriter(resultFile, fieldnames=fieldnames)
-            postWriter.writerows(sorted[index])
+            # the label files keep the original columns; the spans are only for display
+            postWriter = csv.DictWriter(resultFile, fieldnames=fieldnames, extrasaction='ignore')
+            postWriter.writerows(sortedRows[index])
         index += 1
-
-def printMessage(text):
-    contains = set()
-    words = re.findall(r'\b\w+\b', text.lower()) 
-    for word in words:
-        if word in mhLexicon: contains.add(word)
-        if word in emLexicon: contains.add(word)
-
-    print("\nSORT THIS MESSAGE (contains:",contains,":\n")
-    print(text)
-    print("---------\n"+options+"\n")
-
-def selectOption(choice, row, prevRow, prevChoice):
-        global counter, toDelete, sorted
+    journal.markExported()
+
+def compact(filename):
+    # rare maintenance step: drop rows sorted in earlier sessions from the results file and
+    # start a new journal, since the rewrite moves every row's offset
+    if journal.pending:
+        writeResults(filename)
+    with open(filename, 'rb') as csvfile:
+        header = openRows(csvfile)[2]
+    with open(filename + '.tmp', mode='w', newline='', encoding='utf-8-sig') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=header)
+        writer.writeheader()
+        writer.writerows(row for _, row in readRows(filename) if row['submission_id'] not in journal.sortedIds)
+    os.replace(filename + '.tmp', filename)
+    journal.reset(filename)
+
+def highlight(text, spans):
+    parts = []
+    end = 0
+    for start, length, lexicon in spans:
+        word = text[start:start + length]
+        if sys.stdout.isatty():
+            word = colours[lexicon] + word + "\033[0m"
+        else:
+            word = "[" + word + "]"
+        parts.append(text[end:start])
+        parts.append(word)
+        end = start + length
+    parts.append(text[end:])
+    return "".join(parts)
+
+def renderMessage(row):
+    # the prompt for a row, with the lexicon words found by scoring.py highlighted
+    text = row['body']
+    if row.get('spans') is not None:
+        spans = decodeSpans(row['spans'])
+    else:
+        spans = engine.spans(text)
+    contains = set(text[start:start + length].lower() for start, length, _ in spans)
+    return ("\nSORT THIS MESSAGE (contains: " + str(contains) + " :\n\n"
+            + highlight(text, spans) + "\n"
+            + "---------\n" + options + "\n")
+
+def printMessage(row):
+    print(renderMessage(row))
+
+def prefetched(rows, depth):
+    # render the next `depth` rows on a background thread, so a prompt never waits for the
+    # file or for a long body; yields (offset, row, rendered prompt). depth 0 renders each row
+    # when it is reached, without a thread (a Queue with maxsize 0 would be unbounded)
+    if depth < 1:
+        for offset, row in rows:
+            yield offset, row, renderMessage(row)
+        return
+    ready = queue.Queue(maxsize=depth)
+    finished = object()
+    failure = []
+
+    def work():
+        try:
+            for offset, row in rows:
+                ready.put((offset, row, renderMessage(row)))
+        except Exception as error:
+            failure.append(error)
+        finally:
+            ready.put(finished)
+
+    threading.Thread(target=work, daemon=True).start()
+    while True:
+        item = ready.get()
+        if item is finished:
+            break
+        yield item
+    if failure:
+        raise failure[0]
+
+def selectOption(choice, row, offset, prevRow, prevOffset, prevChoice):
+        global counter
         if choice.isdigit() and 1 <= int(choice) <= len(filenames):
-            sorted[int(choice) - 1].append(row)
-            toDelete.append(row['submission_id'])
+            journal.sort(row['submission_id'], int(choice), offset)
             print("sorted successfully")
             counter += 1
         elif (choice == "u" or choice == "undo"):
             if prevChoice:
-                    sorted[prevChoice - 1].pop()
-                    toDelete.pop()
+                    journal.undo()
                     counter -= 1
-                    printMessage(prevRow['body'])
+                    printMessage(prevRow)
                     choice = input()
-                    selectOption(choice, prevRow, None, None)
-                    printMessage(row['body'])
+                    selectOption(choice, prevRow, prevOffset, None, None, None)
+                    printMessage(row)
                     choice = input()
-                    selectOption(choice, row, None, None)
+                    selectOption(choice, row, offset, None, None, None)
             else:
                 print("no previous choice")
-                printMessage(row['body'])
+                printMessage(row)
                 choice = input()
-                selectOption(choice, row, prevChoice, prevRow)
+                selectOption(choice, row, offset, prevRow, prevOffset, prevChoice)
         elif choice == "quit":
             return
         else:
+                journal.skip(row['submission_id'], offset)
                 print("skipped")
 
-def classify(filename):
-    with open(filename, newline='', encoding='utf-8-sig') as csvfile:
-            textReader = csv.DictReader(csvfile, delimiter=',')
-            prevChoice = None
-            prevRow = None
-            for row in textReader:
-                printMessage(row['body'])
-                choice = input()
-                if choice == "quit":
-                    break
-                else:
-                    selectOption(choice, row, prevRow, prevChoice)
-                    if choice.isdigit() and 1 <= int(choice) <= len(filenames):
-                        prevChoice = int(choice)
-                        prevRow = row
-                    elif choice == "quit":
-                        break
+def unsortedRows(filename):
+    # rows not sorted yet, starting after the row the last session stopped at and wrapping
+    # round to the skipped rows before it
+    cursor = journal.cursor
+    if cursor is None:
+        rows = readRows(filename)
+    else:
+        rows = readRows(filename, cursor)
+        next(rows, None)
+    for offset, row in rows:
+        if row['submission_id'] not in journal.sortedIds:
+            yield offset, row
+    if cursor is not None:
+        for offset, row in readRows(filename):
+            if offset > cursor:
+                break
+            if row['submission_id'] not in journal.sortedIds:
+                yield offset, row
+
+def classify(filename, depth=8):
+    if journal.pending:
+        print("writing", len(journal.pending), "posts sorted in an interrupted session")
+        writeResults(filename)
+    prevChoice = None
+    prevRow = None
+    prevOffset = None
+    for offset, row, message in prefetched(unsortedRows(filename), depth):
+        print(message)
+        choice = input()
+        if choice == "quit":
+            break
+        else:
+            selectOption(choice, row, offset, prevRow, prevOffset, prevChoice)
+            if choice.isdigit() and 1 <= int(choice) <= len(filenames):
+                prevChoice = int(choice)
+                prevRow = row
+                prevOffset = offset
+            elif choice == "quit":
+                break
 
     print("sorted", counter, "posts, writing results")
-    deleteSorted(filename)
-    writeResults()
-
-
-classify('results.csv')
-
-
-
-                    
\ No newline at end of file
+    writeResults(filename)
+
+
+parser = argparse.ArgumentParser(description="Sort ranked posts into disclosure categories by hand.")
+parser.add_argument("filename", nargs="?", default="results.csv", help="ranked results to sort")
+parser.add_argument("--prefetch", type=int, default=8, help="rows to render ahead of the one being sorted, 0 for none")
+parser.add_argument("--compact", action="store_true", help="remove already sorted rows from the results file and start a new journal")
+args = parser.parse_args()
+if args.prefetch < 0:
+    parser.error("--prefetch must be 0 or more")
+
+# every decision is appended to <filename>.journal as it is made, so sessions resume where they stopped
+journal = AnnotationJournal(args.filename + '.journal', args.filename)
+try:
+    if args.compact:
+        compact(args.filename)
+    else:
+        classify(args.filename, args.prefetch)
+finally:
+    journal.close()
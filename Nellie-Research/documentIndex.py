@@ -0,0 +1,162 @@
+import json
+import os
+from collections import Counter
+import numpy as np
+from scoringEngine import pronouns, scoreFromCounts, wordPattern
+
+# Columnar per-document bag-of-words, one .npy file per column so they can be memory-mapped:
+#   lengths      token count of each document
+#   docOffsets   document d owns entries docOffsets[d]:docOffsets[d + 1]
+#   tokenIds     vocabulary id of each distinct token in a document
+#   counts       how often that token occurs in the document
+#   sources      index into ranking.sources the row came from
+#   rowOffsets   byte offset of the row in that source file
+#   scores       current score of each document
+# plus vocabulary.txt (one token per line, line number = id) and lexicons.json,
+# the lexicons the stored scores were computed with.
+columns = ["lengths", "docOffsets", "tokenIds", "counts", "sources", "rowOffsets", "scores"]
+
+class DocumentIndex:
+        def __init__(self, mhLexicon, emLexicon):
+                self.mhLexicon = set(mhLexicon)
+                self.emLexicon = set(emLexicon)
+                self.vocabulary = {}
+                self.weights = []       # lexicon weight per vocabulary id while building
+                self.pronounFlags = []
+                self.parts = {name: [] for name in columns}
+                self.entries = 0
+                self.arrays = None
+
+        def tokenId(self, word):
+                tokenId = self.vocabulary.get(word)
+                if tokenId is None:
+                        tokenId = self.vocabulary[word] = len(self.vocabulary)
+                        self.weights.append(2 * (word in self.mhLexicon) + (word in self.emLexicon))
+                        self.pronounFlags.append(word in pronouns)
+                return tokenId
+
+        def addBatch(self, source, rowOffsets, texts):
+                # index a batch of documents and return their scores
+                lengths, docOffsets, tokenIds, counts = [], [], [], []
+                matches, pronounCounts = [], []
+                for text in texts:
+                        words = wordPattern.findall(text.lower())
+                        bag = Counter(words)
+                        docOffsets.append(self.entries + len(tokenIds))
+                        lengths.append(len(words))
+                        total = 0
+                        pronounTotal = 0
+                        for word, count in bag.items():
+                                tokenId = self.tokenId(word)
+                                tokenIds.append(tokenId)
+                                counts.append(count)
+                                total += self.weights[tokenId] * count
+                                pronounTotal += self.pronounFlags[tokenId] * count
+                        matches.append(total)
+                        pronounCounts.append(pronounTotal)
+                self.entries += len(tokenIds)
+
+                lengths = np.asarray(lengths, dtype=np.int32)
+                scores = scoreFromCounts(np.asarray(matches, dtype=np.int64),
+                        np.asarray(pronounCounts, dtype=np.int64), lengths)
+                self.parts["lengths"].append(lengths)
+                self.parts["docOffsets"].append(np.asarray(docOffsets, dtype=np.int64))
+                self.parts["tokenIds"].append(np.asarray(tokenIds, dtype=np.int32))
+                self.parts["counts"].append(np.asarray(counts, dtype=np.int32))
+                self.parts["sources"].append(np.full(len(texts), source, dtype=np.int8))
+                self.parts["rowOffsets"].append(np.asarray(rowOffsets, dtype=np.int64))
+                self.parts["scores"].append(scores)
+                return scores
+
+        def finish(self):
+                if self.arrays is None:
+                        self.arrays = {}
+                        for name in columns:
+                                dtype = np.float64 if name == "scores" else np.int64
+                                parts = self.parts[name]
+                                self.arrays[name] = np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+                        self.arrays["docOffsets"] = np.append(self.arrays["docOffsets"], self.entries)
+                        self.parts = None
+                return self.arrays
+
+        def save(self, directory):
+                os.makedirs(directory, exist_ok=True)
+                for name, array in self.finish().items():
+                        np.save(os.path.join(directory, name + ".npy"), array)
+                with open(os.path.join(directory, "vocabulary.txt"), mode='w', encoding='utf-8') as file:
+                        file.writelines(word + '\n' for word in self.vocabulary)
+                self.saveLexicons(directory)
+
+        def saveScores(self, directory):
+                np.save(os.path.join(directory, "scores.npy"), self.finish()["scores"])
+                self.saveLexicons(directory)
+
+        def saveLexicons(self, directory):
+                with open(os.path.join(directory, "lexicons.json"), mode='w', encoding='utf-8') as file:
+                        json.dump({"mh": sorted(self.mhLexicon), "em": sorted(self.emLexicon)}, file)
+
+        @classmethod
+        def load(cls, directory):
+                with open(os.path.join(directory, "lexicons.json"), encoding='utf-8') as file:
+                        lexicons = json.load(file)
+                index = cls(lexicons["mh"], lexicons["em"])
+                with open(os.path.join(directory, "vocabulary.txt"), encoding='utf-8') as file:
+                        for word in file.read().splitlines():
+                                index.vocabulary[word] = len(index.vocabulary)
+                index.parts = None
+                index.arrays = {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode='r')
+                        for name in columns}
+                # scores are rewritten after a lexicon change, so keep them in memory
+                index.arrays["scores"] = np.array(index.arrays["scores"])
+                return index
+
+        def documentsContaining(self, words):
+                # indices of documents containing any of the words
+                arrays = self.finish()
+                ids = [self.vocabulary[word] for word in words if word in self.vocabulary]
+                if not ids:
+                        return np.zeros(0, dtype=np.int64)
+                hits = np.flatnonzero(np.isin(arrays["tokenIds"], ids))
+                return np.unique(np.searchsorted(arrays["docOffsets"], hits, side='right') - 1)
+
+        def rescore(self, mhLexicon, emLexicon):
+                # apply a lexicon change, recomputing only documents containing an added or removed
+                # word; returns the indices of the documents whose score was recomputed
+                mhLexicon = set(mhLexicon)
+                emLexicon = set(emLexicon)
+                changed = (mhLexicon ^ self.mhLexicon) | (emLexicon ^ self.emLexicon)
+                self.mhLexicon = mhLexicon
+                self.emLexicon = emLexicon
+                docs = self.documentsContaining(changed)
+                if len(docs) == 0:
+                        return docs
+
+                arrays = self.finish()
+                weights = np.zeros(len(self.vocabulary), dtype=np.int64)
+                pronounFlags = np.zeros(len(self.vocabulary), dtype=np.int64)
+                for word in mhLexicon | emLexicon | set(pronouns):
+                        tokenId = self.vocabulary.get(word)
+                        if tokenId is not None:
+                                weights[tokenId] = 2 * (word in mhLexicon) + (word in emLexicon)
+                                pronounFlags[tokenId] = word in pronouns
+
+                # gather the entries of the affected documents into one ragged batch
+                starts = arrays["docOffsets"][docs]
+                sizes = arrays["docOffsets"][docs + 1] - starts
+                offsets = np.concatenate(([0], np.cumsum(sizes)))
+                entries = np.repeat(starts - offsets[:-1], sizes) + np.arange(offsets[-1])
+                tokenIds = arrays["tokenIds"][entries]
+                counts = arrays["counts"][entries].astype(np.int64)
+
+                matchTotals = np.concatenate(([0], np.cumsum(weights[tokenIds] * counts)))
+                pronounTotals = np.concatenate(([0], np.cumsum(pronounFlags[tokenIds] * counts)))
+                arrays["scores"][docs] = scoreFromCounts(matchTotals[offsets[1:]] - matchTotals[offsets[:-1]],
+                        pronounTotals[offsets[1:]] - pronounTotals[offsets[:-1]],
+                        arrays["lengths"][docs].astype(np.int64))
+                return docs
+
+        def ranked(self):
+                # indices of documents with a positive score, best first, ties in document order
+                scores = self.finish()["scores"]
+                positive = np.flatnonzero(scores > 0)
+                return positive[np.argsort(-scores[positive], kind='stable')]
@@ -0,0 +1,152 @@
+import json
+import os
+import numpy as np
+from ranking import openRows, readRowAt, readRows
+from scoringEngine import wordPattern
+
+# Term -> posting list of row ids for one CSV file, built once and saved as
+#   terms.txt        one term per line, line number = term id
+#   termOffsets.npy  term t owns postings[termOffsets[t]:termOffsets[t + 1]]
+#   postings.npy     sorted row ids (0 = first data row)
+#   rowOffsets.npy   byte offset of each row, to read matching rows back
+#   meta.json        source file, text columns and its size/mtime when indexed
+# Terms are the lowercased \b\w+\b tokens scoring uses, so lookups are whole-word and
+# case-insensitive; a query term of several words matches rows containing all of them.
+
+class InvertedIndex:
+        def __init__(self, terms, termOffsets, postings, rowOffsets, meta):
+                self.terms = terms
+                self.termIds = {term: termId for termId, term in enumerate(terms)}
+                self.termOffsets = termOffsets
+                self.postings = postings
+                self.rowOffsets = rowOffsets
+                self.meta = meta
+
+        @classmethod
+        def build(cls, filename, textColumns, chunkRows=100000):
+                # postings are collected for chunkRows rows at a time, then kept as int32 arrays
+                # sorted by term, so memory stays a few bytes per posting on large files
+                vocabulary = {}
+                chunks = []
+                rowOffsets = []
+                termIds = []
+                rowIds = []
+                offsets = []
+                for rowId, (offset, row) in enumerate(readRows(filename)):
+                        offsets.append(offset)
+                        text = " ".join(row[column] or "" for column in textColumns)
+                        for word in set(wordPattern.findall(text.lower())):
+                                termIds.append(vocabulary.setdefault(word, len(vocabulary)))
+                                rowIds.append(rowId)
+                        if len(offsets) >= chunkRows:
+                                chunks.append(sortChunk(termIds, rowIds))
+                                rowOffsets.append(np.asarray(offsets, dtype=np.int64))
+                                termIds, rowIds, offsets = [], [], []
+                chunks.append(sortChunk(termIds, rowIds))
+                rowOffsets.append(np.asarray(offsets, dtype=np.int64))
+                termOffsets, postings = mergeChunks(chunks, len(vocabulary))
+                stat = os.stat(filename)
+                meta = {"filename": filename, "columns": textColumns, "size": stat.st_size, "mtime": stat.st_mtime}
+                return cls(list(vocabulary), termOffsets, postings, np.concatenate(rowOffsets), meta)
+
+        def save(self, directory):
+                os.makedirs(directory, exist_ok=True)
+                with open(os.path.join(directory, "terms.txt"), mode='w', encoding='utf-8') as file:
+                        file.writelines(term + '\n' for term in self.terms)
+                np.save(os.path.join(directory, "termOffsets.npy"), self.termOffsets)
+                np.save(os.path.join(directory, "postings.npy"), self.postings)
+                np.save(os.path.join(directory, "rowOffsets.npy"), self.rowOffsets)
+                with open(os.path.join(directory, "meta.json"), mode='w', encoding='utf-8') as file:
+                        json.dump(self.meta, file)
+
+        @classmethod
+        def load(cls, directory):
+                with open(os.path.join(directory, "terms.txt"), encoding='utf-8') as file:
+                        terms = file.read().splitlines()
+                with open(os.path.join(directory, "meta.json"), encoding='utf-8') as file:
+                        meta = json.load(file)
+                arrays = [np.load(os.path.join(directory, name + ".npy"), mmap_mode='r')
+                        for name in ["termOffsets", "postings", "rowOffsets"]]
+                return cls(terms, *arrays, meta)
+
+        @classmethod
+        def loadOrBuild(cls, directory, filename, textColumns):
+                # reuse a saved index unless the source file changed since it was built
+                if os.path.exists(os.path.join(directory, "meta.json")):
+                        index = cls.load(directory)
+                        stat = os.stat(filename)
+                        if (index.meta["filename"] == filename and index.meta["columns"] == textColumns
+                                and index.meta["size"] == stat.st_size and index.meta["mtime"] == stat.st_mtime):
+                                return index
+                index = cls.build(filename, textColumns)
+                index.save(directory)
+                return index
+
+        def __len__(self):
+                return len(self.rowOffsets)
+
+        def lookup(self, term):
+                # row ids containing a single token
+                termId = self.termIds.get(term.lower())
+                if termId is None:
+                        return np.zeros(0, dtype=np.int32)
+                return np.asarray(self.postings[self.termOffsets[termId]:self.termOffsets[termId + 1]])
+
+        def postingsFor(self, term):
+                # row ids containing a term; a term of several words needs all of them
+                words = wordPattern.findall(term.lower())
+                if not words:
+                        return np.zeros(0, dtype=np.int32)
+                return self.allOf(words) if len(words) > 1 else self.lookup(words[0])
+
+        def anyOf(self, terms):
+                return union(*(self.postingsFor(term) for term in terms))
+
+        def allOf(self, terms):
+                return intersect(*(self.postingsFor(term) for term in terms))
+
+        def rows(self, rowIds):
+                # read the given rows back from the indexed file, in row id order
+                with open(self.meta["filename"], 'rb') as file:
+                        header = openRows(file)[2]
+                        for rowId in np.sort(rowIds):
+                                yield int(rowId), readRowAt(file, header, int(self.rowOffsets[rowId]))
+
+def sortChunk(termIds, rowIds):
+        # one chunk's postings as (term ids present, postings per term, row ids sorted by term)
+        termIds = np.asarray(termIds, dtype=np.int32)
+        order = np.argsort(termIds, kind='stable')  # stable keeps each term's row ids sorted
+        terms, counts = np.unique(termIds, return_counts=True)
+        return terms, counts, np.asarray(rowIds, dtype=np.int32)[order]
+
+def mergeChunks(chunks, vocabularySize):
+        # concatenate each term's postings across chunks, in chunk order, into one array;
+        # chunks are removed from the list as they are copied so their memory is freed
+        totals = np.zeros(vocabularySize, dtype=np.int64)
+        for terms, counts, _ in chunks:
+                totals[terms] += counts
+        termOffsets = np.concatenate(([0], np.cumsum(totals))).astype(np.int64)
+        postings = np.empty(termOffsets[-1], dtype=np.int32)
+        cursor = termOffsets[:-1].copy()  # next free slot of each term
+        chunks.reverse()
+        while chunks:
+                terms, counts, rows = chunks.pop()
+                starts = cursor[terms] - (np.cumsum(counts) - counts)
+                postings[np.repeat(starts, counts) + np.arange(len(rows))] = rows
+                cursor[terms] += counts
+        return termOffsets, postings
+
+def union(*postings):
+        if not postings:
+                return np.zeros(0, dtype=np.int32)
+        return np.unique(np.concatenate(postings))
+
+def intersect(*postings):
+        if not postings:
+                return np.zeros(0, dtype=np.int32)
+        # start from the shortest list so each step only shrinks the result
+        postings = sorted(postings, key=len)
+        result = postings[0]
+        for posting in postings[1:]:
+                result = result[np.isin(result, posting, assume_unique=True)]
+        return result
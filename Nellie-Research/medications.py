@@ -0,0 +1,45 @@
+import argparse
+import csv
+from invertedIndex import InvertedIndex
+
+# Count sanitised posts and comments mentioning medications, answered from inverted indexes
+# (built on first use and reused until the sanitised file changes) instead of scanning rows.
+
+def loadMedicationNames(filename='medication_names.csv'):
+        with open(filename, newline='', encoding='utf-8-sig') as mednames:
+                medicationNames = []
+                reader = csv.reader(mednames, delimiter=',')
+                for row in reader:
+                        medicationNames.extend(name.strip() for name in row if name.strip())
+        return medicationNames
+
+def medicationPosts(index, medicationNames):
+        for medication in medicationNames:
+                found = len(index.postingsFor(medication))
+                if found:
+                        print("posts containing", medication + ":", found)
+        print(len(index.anyOf(medicationNames)), "posts detected")
+
+def medicationComments(index, medicationNames, show=False):
+        for medication in medicationNames:
+                found = len(index.postingsFor(medication))
+                if found:
+                        print("comments containing", medication + ":", found)
+        matches = index.anyOf(medicationNames)
+        if show:
+                for _, row in index.rows(matches):
+                        print(row["body"])
+                        print("---------------------------------------")
+        print(len(matches), "comments detected")
+
+if __name__ == "__main__":
+        parser = argparse.ArgumentParser(description="Find posts and comments mentioning medications.")
+        parser.add_argument("terms", nargs="*", help="terms to look for instead of medication_names.csv")
+        parser.add_argument("--show", action="store_true", help="print the matching comments")
+        args = parser.parse_args()
+
+        medicationNames = args.terms or loadMedicationNames()
+        postsIndex = InvertedIndex.loadOrBuild('postsIndex', 'sanitisedPosts.csv', ['title', 'selftext'])
+        commentsIndex = InvertedIndex.loadOrBuild('commentsIndex', 'sanitisedComments.csv', ['body'])
+        medicationPosts(postsIndex, medicationNames)
+        medicationComments(commentsIndex, medicationNames, args.show)
@@ -0,0 +1,202 @@
+import codecs
+import csv
+import heapq
+import itertools
+import os
+import tempfile
+from operator import itemgetter
+from scoringEngine import encodeSpans
+
+fieldnames = ["score","submission_id", "author", "subreddit", "body", "spans"]
+
+# (filename, id column, text columns) for each scored input, referred to by index
+sources = [('sanitisedPosts.csv', 'submission_id', ['title', 'selftext']),
+        ('sanitisedComments.csv', 'comment_id', ['body'])]
+
+def rowText(source, row):
+        return " ".join(row[column] for column in sources[source][2])
+
+def makeRecord(source, row, score, engine=None):
+        # spans lists the lexicon matches in body (see scoringEngine.encodeSpans), so the
+        # classifier can highlight them without re-tokenising; empty without an engine
+        body = rowText(source, row)
+        return {"score": float(score), 
+                "submission_id": row[sources[source][1]], 
+                "author": row['author'], 
+                "subreddit": row['subreddit'], 
+                "body": body,
+                "spans": encodeSpans(engine.spans(body)) if engine is not None else ""}
+
+class LineReader:
+        # decodes a binary file line by line, tracking the byte offset of the next unread line
+        def __init__(self, file):
+                self.file = file
+                self.offset = file.tell()
+
+        def __iter__(self):
+                return self
+
+        def __next__(self):
+                line = self.file.readline()
+                if not line:
+                        raise StopIteration
+                self.offset += len(line)
+                return line.decode('utf-8')
+
+def openRows(file):
+        # skip the BOM and header, returning (lines, reader, header)
+        if file.read(len(codecs.BOM_UTF8)) != codecs.BOM_UTF8:
+                file.seek(0)
+        lines = LineReader(file)
+        reader = csv.reader(lines, delimiter=',')
+        return lines, reader, next(reader)
+
+def toDict(header, values):
+        # same shape csv.DictReader gives, short rows padded with None
+        row = dict(zip(header, values))
+        for key in header[len(values):]:
+                row[key] = None
+        return row
+
+def readRows(filename, start=None):
+        # like csv.DictReader, but also yields the byte offset each record starts at;
+        # start is the offset of a record to begin at instead of the first one
+        with open(filename, 'rb') as file:
+                lines, reader, header = openRows(file)
+                if start is not None:
+                        file.seek(start)
+                        lines.offset = start
+                while True:
+                        offset = lines.offset
+                        try:
+                                values = next(reader)
+                        except StopIteration:
+                                return
+                        if values:
+                                yield offset, toDict(header, values)
+
+def readRowAt(file, header, offset):
+        file.seek(offset)
+        return toDict(header, next(csv.reader(LineReader(file), delimiter=',')))
+
+def writeRanking(filename, records):
+        with open(filename, mode='w', newline='', encoding='utf-8-sig') as output:
+                postWriter = csv.DictWriter(output, fieldnames=fieldnames)
+                postWriter.writeheader()
+                postWriter.writerows(records)
+
+def mergeRankings(filenames, output, limit=None):
+        # merge ranking files, each sorted by score, into output (which may be one of them),
+        # keeping at most limit rows; equal scores keep the order of filenames
+        files = [open(filename, newline='', encoding='utf-8-sig') for filename in filenames]
+        temporary = output + '.tmp'
+        try:
+                readers = [csv.reader(file) for file in files]
+                for reader in readers:
+                        next(reader, None)
+                merged = heapq.merge(*readers, key=lambda values: -float(values[0]))
+                with open(temporary, mode='w', newline='', encoding='utf-8-sig') as result:
+                        writer = csv.writer(result)
+                        writer.writerow(fieldnames)
+                        writer.writerows(itertools.islice(merged, limit))
+        finally:
+                for file in files:
+                        file.close()
+        os.replace(temporary, output)
+
+# Rankings are fed (score, sourceIndex, byteOffset, row) for every positive score;
+# makeRecord(sourceIndex, row, score) builds the output record for a row; bind its engine
+# argument (functools.partial) to fill in the spans column.
+
+class InMemoryRanking:
+        # keeps every scored record and sorts them all at the end
+        def __init__(self, makeRecord):
+                self.makeRecord = makeRecord
+                self.ranked = []
+
+        def add(self, score, source, offset, row):
+                self.ranked.append(self.makeRecord(source, row, score))
+
+        def write(self, filename):
+                self.ranked.sort(key=itemgetter('score'), reverse=True)
+                writeRanking(filename, self.ranked)
+
+class TopKRanking:
+        # keeps only the k best (score, offset) pairs and re-reads their rows from the
+        # source filenames at the end, so no body text is held while scoring
+        def __init__(self, k, sources, makeRecord):
+                self.k = k
+                self.sources = sources
+                self.makeRecord = makeRecord
+                self.heap = []
+                self.counter = 0
+
+        def add(self, score, source, offset, row):
+                # ties keep the earliest row, like the stable sort of the full ranking
+                self.counter += 1
+                entry = (score, -self.counter, source, offset)
+                if len(self.heap) < self.k:
+                        heapq.heappush(self.heap, entry)
+                elif self.heap and entry > self.heap[0]:
+                        heapq.heapreplace(self.heap, entry)
+
+        def write(self, filename):
+                winners = sorted(self.heap, reverse=True)
+                records = [None] * len(winners)
+                # read winners in file order so each source is scanned forwards once
+                order = sorted(range(len(winners)), key=lambda i: winners[i][2:])
+                handles = {}
+                try:
+                        for i in order:
+                                score, _, source, offset = winners[i]
+                                if source not in handles:
+                                        file = open(self.sources[source], 'rb')
+                                        handles[source] = (file, openRows(file)[2])
+                                file, header = handles[source]
+                                records[i] = self.makeRecord(source, readRowAt(file, header, offset), score)
+                finally:
+                        for file, _ in handles.values():
+                                file.close()
+                writeRanking(filename, records)
+
+class ExternalRanking:
+        # external merge sort: sorted runs of at most runSize records go to temporary files,
+        # which are then merged into the output, so memory is bounded by runSize
+        def __init__(self, makeRecord, runSize=500000, tempDir=None):
+                self.makeRecord = makeRecord
+                self.runSize = runSize
+                self.tempDir = tempDir
+                self.buffer = []
+                self.runs = []
+
+        def add(self, score, source, offset, row):
+                self.buffer.append(self.makeRecord(source, row, score))
+                if len(self.buffer) >= self.runSize:
+                        self.flush()
+
+        def flush(self):
+                if not self.buffer:
+                        return
+                self.buffer.sort(key=itemgetter('score'), reverse=True)
+                handle, path = tempfile.mkstemp(suffix='.csv', prefix='ranking-run-', dir=self.tempDir)
+                with open(handle, mode='w', newline='', encoding='utf-8') as run:
+                        csv.DictWriter(run, fieldnames=fieldnames).writerows(self.buffer)
+                self.runs.append(path)
+                self.buffer = []
+
+        def write(self, filename):
+                self.flush()
+                files = [open(path, newline='', encoding='utf-8') for path in self.runs]
+                try:
+                        # heapq.merge breaks ties by run order, so equal scores keep their input order
+                        merged = heapq.merge(*(csv.reader(file) for file in files), key=lambda values: -float(values[0]))
+                        with open(filename, mode='w', newline='', encoding='utf-8-sig') as output:
+                                writer = csv.writer(output)
+                                writer.writerow(fieldnames)
+                                writer.writerows(merged)
+                finally:
+                        for file in files:
+                                file.close()
+                        for path in self.runs:
+                                os.remove(path)
+                        self.runs = []
@@ -0,0 +1,43 @@
+import argparse
+import csv
+from documentIndex import DocumentIndex
+from ranking import fieldnames, makeRecord, openRows, readRowAt, sources
+from scoringEngine import ScoringEngine, loadLexicon
+
+# Apply lexicon edits to the scores saved by `scoring.py --index`: only documents containing
+# an added or removed word are rescored, from their bags of words, and backupResults.csv is
+# rewritten from the stored row offsets. The sanitised files must be the ones that were indexed.
+parser = argparse.ArgumentParser(description="Rescore an indexed corpus after lexicon changes.")
+parser.add_argument("index", help="directory written by scoring.py --index")
+parser.add_argument("--top-k", type=int, help="only write the k highest scoring rows")
+args = parser.parse_args()
+if args.top_k is not None and args.top_k < 1:
+        parser.error("--top-k must be at least 1")
+
+mhLexicon = loadLexicon('mentalhealth_lexicon.csv')
+emLexicon = loadLexicon('emotion_lexicon.csv')
+engine = ScoringEngine(mhLexicon, emLexicon)
+index = DocumentIndex.load(args.index)
+docs = index.rescore(mhLexicon, emLexicon)
+index.saveScores(args.index)
+print("rescored", len(docs), "documents")
+
+ranked = index.ranked()
+if args.top_k is not None:
+        ranked = ranked[:args.top_k]
+arrays = index.finish()
+files = [open(filename, 'rb') for filename, _, _ in sources]
+try:
+        headers = [openRows(file)[2] for file in files]
+        with open('backupResults.csv', mode='w', newline='', encoding='utf-8-sig') as output:
+                postWriter = csv.DictWriter(output, fieldnames=fieldnames)
+                postWriter.writeheader()
+                for doc in ranked:
+                        source = int(arrays["sources"][doc])
+                        row = readRowAt(files[source], headers[source], int(arrays["rowOffsets"][doc]))
+                        postWriter.writerow(makeRecord(source, row, arrays["scores"][doc], engine))
+finally:
+        for file in files:
+                file.close()
+
+print("DONE W SORTING")
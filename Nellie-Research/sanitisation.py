@@ -1,52 +1,81 @@
+import argparse
 import csv
+import os
 import re
+from collections import deque
+from multiprocessing import Pool
 
-def sanitise():
-        # create dictionary of relevant, sanitised posts
-        with open('posts.csv', newline='', encoding='utf-8-sig') as csvfile, \
-        open('sanitisedPosts.csv', mode='w', newline='', encoding='utf-8-sig') as output:
-                postReader = csv.DictReader(csvfile, delimiter=',')
-                fieldnames = ["submission_id", "author", "subreddit", "title", "selftext"]
-                postWriter = csv.DictWriter(output, fieldnames=fieldnames)
-                postWriter.writeheader()
-                for row in postReader:
-                        if(row['selftext'] == "[deleted]" or row['selftext'] == "[removed]"):
-                                continue
-                        words = re.findall(r'\b\w+\b', row['selftext'].lower()) 
-                        length = len(words)
-                        if(length < 3):
-                                continue
-                        else:
-                                rowDict = {}
-                                rowDict.update({"submission_id": row['submission_id']})
-                                rowDict.update({"author": row['author']})
-                                rowDict.update({"subreddit": row['subreddit']})
-                                rowDict.update({"title": row['title']})
-                                rowDict.update({"selftext": row['selftext']})
-                                postWriter.writerow(rowDict)
-        print("finished with posts\n")
-        with open('comments.csv', newline='', encoding='utf-8-sig') as csvfile, \
-        open('sanitisedComments.csv', mode='w', newline='', encoding='utf-8-sig') as output:
-                commentReader = csv.DictReader(csvfile, delimiter=',')
-                fieldnames = ["comment_id", "parent_id", "author", "subreddit", "body"]
-                commentWriter = csv.DictWriter(output, fieldnames=fieldnames)
-                commentWriter.writeheader()
-                for row in commentReader:
-                        words = re.findall(r'\b\w+\b', row['body'].lower()) 
-                        length = len(words)
-                        if(length < 3):
-                                continue
-                        else:
-                                rowDict = {}
-                                rowDict.update({"comment_id": row['comment_id']})
-                                rowDict.update({"parent_id": row['parent_id']})
-                                rowDict.update({"author": row['author']})
-                                rowDict.update({"subreddit": row['subreddit']})
-                                rowDict.update({"body": row['body']})
-                                commentWriter.writerow(rowDict)
-        print("finished with comments\n") 
+wordPattern = re.compile(r'\b\w+\b')
+minWords = 3
 
-sanitise()
+def hasMinWords(text, minimum=minWords):
+        # stop tokenising as soon as enough words have been seen
+        count = 0
+        for _ in wordPattern.finditer(text.lower()):
+                count += 1
+                if count >= minimum:
+                        return True
+        return False
 
+def filterChunk(chunk):
+        # rows are already projected to the output fields, with the text to check last
+        kept = []
+        for row in chunk:
+                text = row[-1]
+                if(text == "[deleted]" or text == "[removed]"):
+                        continue
+                if hasMinWords(text):
+                        kept.append(row)
+        return kept
+
+def readChunks(reader, columns, chunkSize):
+        chunk = []
+        for row in reader:
+                chunk.append([row[i] if i < len(row) else "" for i in columns])
+                if len(chunk) >= chunkSize:
+                        yield chunk
+                        chunk = []
+        if chunk:
+                yield chunk
+
+def sanitiseFile(inputName, outputName, fieldnames, pool, workers, chunkSize):
+        with open(inputName, newline='', encoding='utf-8-sig') as csvfile, \
+        open(outputName, mode='w', newline='', encoding='utf-8-sig') as output:
+                reader = csv.reader(csvfile, delimiter=',')
+                header = {name: index for index, name in enumerate(next(reader))}
+                columns = [header[name] for name in fieldnames]
+                writer = csv.writer(output)
+                writer.writerow(fieldnames)
+                # chunks are written back in submission order, with at most two per worker in flight
+                pending = deque()
+                for chunk in readChunks(reader, columns, chunkSize):
+                        if pool is None:
+                                writer.writerows(filterChunk(chunk))
+                                continue
+                        pending.append(pool.apply_async(filterChunk, (chunk,)))
+                        if len(pending) >= workers * 2:
+                                writer.writerows(pending.popleft().get())
+                while pending:
+                        writer.writerows(pending.popleft().get())
 
+def sanitise(chunkSize=10000, workers=None):
+        workers = os.cpu_count() if workers is None else workers
+        pool = Pool(workers) if workers > 1 else None
+        try:
+                sanitiseFile('posts.csv', 'sanitisedPosts.csv',
+                        ["submission_id", "author", "subreddit", "title", "selftext"], pool, workers, chunkSize)
+                print("finished with posts\n")
+                sanitiseFile('comments.csv', 'sanitisedComments.csv',
+                        ["comment_id", "parent_id", "author", "subreddit", "body"], pool, workers, chunkSize)
+                print("finished with comments\n")
+        finally:
+                if pool is not None:
+                        pool.close()
+                        pool.join()
 
+if __name__ == "__main__":
+        parser = argparse.ArgumentParser(description="Filter deleted and very short posts and comments.")
+        parser.add_argument("--chunk-size", type=int, default=10000, help="rows handed to a worker at a time")
+        parser.add_argument("--workers", type=int, default=None, help="worker processes (1 runs in this process)")
+        args = parser.parse_args()
+        sanitise(args.chunk_size, args.workers)
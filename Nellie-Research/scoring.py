@@ -1,107 +1,75 @@
-import csv
-import re
-from operator import itemgetter
-pronouns = ["i","me","myself","mine"]
+import argparse
+import os
+from functools import partial
+from documentIndex import DocumentIndex
+from ranking import ExternalRanking, InMemoryRanking, TopKRanking, makeRecord, mergeRankings, readRows, rowText, sources
+from scoringEngine import ScoringEngine, loadLexicon
+from seenIds import SeenIds
 
-def medicationPosts(posts):
-        with open('medication_names.csv', newline='', encoding='utf-8-sig') as mednames:
-                medicationNames = []
-                reader = csv.reader(mednames, delimiter=',')
-                for row in reader:
-                        medicationNames.extend(row)
-        counter = 0
-        for row in posts:
-                for medication in medicationNames:
-                        if ((medication) in row['selftext'] or (" "+medication) in row['title']):
-                                print("the following contains:", medication)
-                                #print(row["title"]," ",row["selftext"])
-                                #print("---------------------------------------")
-                                counter += 1
-                                break
-        print(counter, "posts detected")
+parser = argparse.ArgumentParser(description="Rank sanitised posts and comments by disclosure score.")
+mode = parser.add_mutually_exclusive_group()
+mode.add_argument("--top-k", type=int, help="only keep the k highest scoring rows")
+mode.add_argument("--external-sort", action="store_true", help="write the full ranking with bounded memory")
+parser.add_argument("--run-size", type=int, default=500000, help="rows per sorted run with --external-sort")
+parser.add_argument("--seen", help="file of already scored ids; rows with these ids are skipped, new ids are added, "
+        "and the new rows are merged into the existing backupResults.csv")
+parser.add_argument("--bloom-bits", type=int, default=0, help="size of a Bloom filter checked before exact id lookups")
+parser.add_argument("--index", help="directory to save a per-document bag-of-words index in, for rescore.py")
+args = parser.parse_args()
+if args.top_k is not None and args.top_k < 1:
+        parser.error("--top-k must be at least 1")
 
-def medicationComments(comments):
-        with open('medication_names.csv', newline='', encoding='utf-8-sig') as mednames:
-                medicationNames = []
-                reader = csv.reader(mednames, delimiter=',')
-                for row in reader:
-                        medicationNames.extend(row)
-        counter = 0
-        for row in comments:
-                #for medication in medicationNames:
-                if ('azona' in row['body']):
-                #if re.search(rf'\b{re.escape(medication)}\b', row['body'], re.IGNORECASE):
-                        #print("the following contains:", medication)
-                        print(row["body"])
-                        #print("---------------------------------------")
-                        counter += 1
-                        #break
-        print(counter, "comments detected")
+mhLexicon = loadLexicon('mentalhealth_lexicon.csv')
+emLexicon = loadLexicon('emotion_lexicon.csv')
+engine = ScoringEngine(mhLexicon, emLexicon)
+batchSize = 10000
+# ranked rows carry their lexicon match spans for the classifier's highlights
+recordMaker = partial(makeRecord, engine=engine)
 
-def keywordSearch(text):
-        words = re.findall(r'\b\w+\b', text.lower()) 
-        length = len(words)
-        if length < 5:
-                return 0
-        matches = sum(2 for word in words if word in mhLexicon)
-        matches += sum(1 for word in words if word in emLexicon)
-        if(matches != 0):
-                matches += sum(1 for word in words if word in pronouns)
-                factor = min(length / 100, 1)
-                return ((matches / length) * (1 + factor))
-        else:
-                return 0
-
-with open('mentalhealth_lexicon.csv', newline='', encoding='utf-8-sig') as file:
-        content = file.read() 
-        mhLexicon = set(word.lower() for word in content.split(','))  
-
-with open('emotion_lexicon.csv', newline='', encoding='utf-8-sig') as file:
-        content = file.read() 
-        emLexicon = set(word.lower() for word in content.split(',')) 
-
-ranked = []
-seen = set()
-with open('sanitisedPosts.csv', newline='', encoding='utf-8-sig') as csvfile:
-        postReader = csv.DictReader(csvfile, delimiter=',')
-        for row in postReader:
-                if row['submission_id'] not in seen:
-                        seen.add(row['submission_id'])
-                        text = row['title'] + " " + row['selftext']
-                        score = keywordSearch(text)
-                        if score > 0:
-                                #print("found a score of:", score)
-                                ranked.append({"score": score, 
-                                        "submission_id": row['submission_id'], 
-                                        "author": row['author'], 
-                                        "subreddit": row['subreddit'], 
-                                        "body": text})
+if args.top_k is not None:
+        ranking = TopKRanking(args.top_k, [filename for filename, _, _ in sources], recordMaker)
+elif args.external_sort:
+        ranking = ExternalRanking(recordMaker, args.run_size)
+else:
+        ranking = InMemoryRanking(recordMaker)
 
-print("DONE W POSTS")
-
-with open('sanitisedComments.csv', newline='', encoding='utf-8-sig') as csvfile:
-        commentReader = csv.DictReader(csvfile, delimiter=',')
-        for row in commentReader:
-                if row['comment_id'] not in seen:
-                        seen.add(row['comment_id'])
-                        score = keywordSearch(row['body'])
-                        if score > 0:
-                                #print("found a score of:", score)
-                                ranked.append({"score": score, 
-                                        "submission_id": row['comment_id'], 
-                                        "author": row['author'], 
-                                        "subreddit": row['subreddit'], 
-                                        "body": row['body']})
-                        
-
-print("DONE W COMMENTS")
+def scoreRows(source, batch):
+        # drop ids scored before, then score the batch of (offset, row) in one pass
+        # and rank the rows with a positive score
+        fresh = seen.addBatch([row[sources[source][1]] for _, row in batch])
+        batch = [entry for entry, isFresh in zip(batch, fresh) if isFresh]
+        texts = [rowText(source, row) for _, row in batch]
+        if index is not None:
+                scores = index.addBatch(source, [offset for offset, _ in batch], texts)
+        else:
+                scores = engine.scoreBatch(texts)
+        for (offset, row), score in zip(batch, scores):
+                if score > 0:
+                        ranking.add(float(score), source, offset, row)
 
-ranked.sort(key=itemgetter('score'), reverse=True)
+index = DocumentIndex(mhLexicon, emLexicon) if args.index else None
+seen = SeenIds.load(args.seen, args.bloom_bits) if args.seen else SeenIds(args.bloom_bits)
+for source, (filename, _, _) in enumerate(sources):
+        batch = []
+        for offset, row in readRows(filename):
+                batch.append((offset, row))
+                if len(batch) >= batchSize:
+                        scoreRows(source, batch)
+                        batch = []
+        scoreRows(source, batch)
+        print("DONE W POSTS" if source == 0 else "DONE W COMMENTS")
 
-with open('backupResults.csv', mode='w', newline='', encoding='utf-8-sig') as output:
-    fieldnames = ["score","submission_id", "author", "subreddit", "body"]
-    postWriter = csv.DictWriter(output, fieldnames=fieldnames)
-    postWriter.writeheader()
-    postWriter.writerows(ranked)
+outputFile = 'backupResults.csv'
+if args.seen and os.path.exists(outputFile):
+        # only unseen rows were ranked, so merge them into the ranking of the earlier runs
+        ranking.write(outputFile + '.new')
+        mergeRankings([outputFile, outputFile + '.new'], outputFile, args.top_k)
+        os.remove(outputFile + '.new')
+else:
+        ranking.write(outputFile)
+if args.seen:
+        seen.save(args.seen)
+if index is not None:
+        index.save(args.index)
 
 print("DONE W SORTING")
@@ -0,0 +1,160 @@
+import argparse
+import csv
+import re
+import sys
+import numpy as np
+
+wordPattern = re.compile(r'\b\w+\b')
+pronouns = ["i","me","myself","mine"]
+
+def loadLexicon(filename):
+        with open(filename, newline='', encoding='utf-8-sig') as file:
+                content = file.read()
+                return set(word.lower() for word in content.split(','))
+
+def keywordSearch(text, mhLexicon, emLexicon):
+        # reference formula the engine must reproduce exactly
+        words = re.findall(r'\b\w+\b', text.lower())
+        length = len(words)
+        if length < 5:
+                return 0
+        matches = sum(2 for word in words if word in mhLexicon)
+        matches += sum(1 for word in words if word in emLexicon)
+        if(matches != 0):
+                matches += sum(1 for word in words if word in pronouns)
+                factor = min(length / 100, 1)
+                return ((matches / length) * (1 + factor))
+        else:
+                return 0
+
+lexiconNames = {1: "em", 2: "mh", 3: "mh+em"}
+
+def encodeSpans(spans):
+        # "start:length:lexicon" per match, space separated, for the ranked output's spans column
+        return " ".join("%d:%d:%s" % span for span in spans)
+
+def decodeSpans(text):
+        spans = []
+        for part in text.split():
+                start, length, lexicon = part.split(":")
+                spans.append((int(start), int(length), lexicon))
+        return spans
+
+def scoreFromCounts(matches, pronounCounts, lengths):
+        # keywordSearch's formula over arrays of per-document lexicon weight totals,
+        # pronoun counts and token counts
+        matches = matches + pronounCounts * (matches != 0)
+        scores = np.zeros(len(lengths), dtype=np.float64)
+        scored = (lengths >= 5) & (matches != 0)
+        length = lengths[scored].astype(np.float64)
+        factor = np.minimum(length / 100, 1)
+        scores[scored] = (matches[scored] / length) * (1 + factor)
+        return scores
+
+class ScoringEngine:
+        # Every lexicon and pronoun token gets an id from 1; all other tokens are 0.
+        # weights[id] is the combined lexicon weight (mh=2, em=1, both=3) and
+        # pronounFlags[id] is 1 for pronouns, only added when a document has lexicon matches.
+        def __init__(self, mhLexicon, emLexicon, pronounList=pronouns):
+                self.vocabulary = {}
+                for word in sorted(set(mhLexicon) | set(emLexicon) | set(pronounList)):
+                        self.vocabulary[word] = len(self.vocabulary) + 1
+                size = len(self.vocabulary) + 1
+                self.weights = np.zeros(size, dtype=np.int64)
+                self.pronounFlags = np.zeros(size, dtype=np.int64)
+                for word, tokenId in self.vocabulary.items():
+                        self.weights[tokenId] = 2 * (word in mhLexicon) + (word in emLexicon)
+                        self.pronounFlags[tokenId] = word in pronounList
+
+        @classmethod
+        def fromFiles(cls, mhFile='mentalhealth_lexicon.csv', emFile='emotion_lexicon.csv'):
+                return cls(loadLexicon(mhFile), loadLexicon(emFile))
+
+        def encode(self, text):
+                get = self.vocabulary.get
+                return np.fromiter((get(word, 0) for word in wordPattern.findall(text.lower())), dtype=np.int32)
+
+        def encodeBatch(self, texts):
+                # ragged batch: one flat id array plus document boundaries
+                get = self.vocabulary.get
+                ids = []
+                offsets = [0]
+                for text in texts:
+                        words = wordPattern.findall(text.lower())
+                        ids.extend([get(word, 0) for word in words])
+                        offsets.append(offsets[-1] + len(words))
+                return np.asarray(ids, dtype=np.int32), np.asarray(offsets, dtype=np.int64)
+
+        def scoreEncoded(self, ids, offsets):
+                matchTotals = np.concatenate(([0], np.cumsum(self.weights[ids])))
+                pronounTotals = np.concatenate(([0], np.cumsum(self.pronounFlags[ids])))
+                matches = matchTotals[offsets[1:]] - matchTotals[offsets[:-1]]
+                pronounCounts = pronounTotals[offsets[1:]] - pronounTotals[offsets[:-1]]
+                return scoreFromCounts(matches, pronounCounts, np.diff(offsets))
+
+        def scoreBatch(self, texts):
+                return self.scoreEncoded(*self.encodeBatch(texts))
+
+        def score(self, text):
+                return float(self.scoreBatch([text])[0])
+
+        def spans(self, text):
+                # (start, length, lexicon) of every lexicon word in text, tokenised as keywordSearch does;
+                # positions are character offsets into text
+                lowered = text.lower()
+                # lower() can change the length of a few characters; then positions come from the original
+                source = lowered if len(lowered) == len(text) else text
+                found = []
+                for match in wordPattern.finditer(source):
+                        tokenId = self.vocabulary.get(match.group().lower(), 0)
+                        if self.weights[tokenId]:
+                                found.append((match.start(), match.end() - match.start(), lexiconNames[int(self.weights[tokenId])]))
+                return found
+
+def checkFile(engine, mhLexicon, emLexicon, filename, columns, batchSize=10000):
+        # compare engine scores with keywordSearch for every row, returns (rows, mismatches)
+        rows = 0
+        mismatches = 0
+        with open(filename, newline='', encoding='utf-8-sig') as csvfile:
+                reader = csv.DictReader(csvfile, delimiter=',')
+                batch = []
+                for row in reader:
+                        batch.append(" ".join(row[column] for column in columns))
+                        if len(batch) >= batchSize:
+                                mismatches += checkBatch(engine, mhLexicon, emLexicon, batch)
+                                rows += len(batch)
+                                batch = []
+                if batch:
+                        mismatches += checkBatch(engine, mhLexicon, emLexicon, batch)
+                        rows += len(batch)
+        return rows, mismatches
+
+def checkBatch(engine, mhLexicon, emLexicon, texts):
+        mismatches = 0
+        for text, score in zip(texts, engine.scoreBatch(texts)):
+                expected = keywordSearch(text, mhLexicon, emLexicon)
+                if repr(float(expected)) != repr(float(score)):
+                        print("mismatch:", expected, float(score), text[:80])
+                        mismatches += 1
+        return mismatches
+
+if __name__ == "__main__":
+        # regression check: engine scores must be identical to keywordSearch on the sanitised data
+        parser = argparse.ArgumentParser(description="Check ScoringEngine against keywordSearch.")
+        parser.add_argument("--posts", default="sanitisedPosts.csv")
+        parser.add_argument("--comments", default="sanitisedComments.csv")
+        args = parser.parse_args()
+
+        mhLexicon = loadLexicon('mentalhealth_lexicon.csv')
+        emLexicon = loadLexicon('emotion_lexicon.csv')
+        engine = ScoringEngine(mhLexicon, emLexicon)
+        total = 0
+        failed = 0
+        for filename, columns in [(args.posts, ["title", "selftext"]), (args.comments, ["body"])]:
+                rows, mismatches = checkFile(engine, mhLexicon, emLexicon, filename, columns)
+                print(filename, ":", rows, "rows,", mismatches, "mismatches")
+                total += rows
+                failed += mismatches
+        if failed:
+                sys.exit(1)
+        print("scores identical for", total, "rows")
@@ -0,0 +1,132 @@
+import os
+import re
+import numpy as np
+
+# Reddit ids are lowercase base36; up to 12 digits fits in 64 bits. Leading zeros are
+# excluded so two different strings never decode to the same number.
+base36 = re.compile(r'(?:0|[1-9a-z][0-9a-z]{0,11})')
+
+def decodeIds(ids):
+        # returns (uint64 values, mask of ids that decoded); other ids are kept as strings
+        values = np.zeros(len(ids), dtype=np.uint64)
+        decoded = np.zeros(len(ids), dtype=bool)
+        for i, id in enumerate(ids):
+                if isinstance(id, str) and base36.fullmatch(id):
+                        values[i] = int(id, 36)
+                        decoded[i] = True
+        return values, decoded
+
+def mix(values):
+        # splitmix64 finaliser, vectorised (uint64 arithmetic wraps)
+        values = values ^ (values >> np.uint64(30))
+        values = values * np.uint64(0xbf58476d1ce4e5b9)
+        values = values ^ (values >> np.uint64(27))
+        values = values * np.uint64(0x94d049bb133111eb)
+        return values ^ (values >> np.uint64(31))
+
+class BloomFilter:
+        # bit array with double hashing; a negative answer means the id was never added
+        def __init__(self, bits, hashes=4):
+                self.size = np.uint64(max(bits, 64))
+                self.hashes = hashes
+                self.bits = np.zeros((int(self.size) + 7) // 8, dtype=np.uint8)
+
+        def positions(self, values):
+                first = mix(values)
+                second = mix(values ^ np.uint64(0x9e3779b97f4a7c15)) | np.uint64(1)
+                return [(first + np.uint64(i) * second) % self.size for i in range(self.hashes)]
+
+        def add(self, values):
+                for position in self.positions(values):
+                        np.bitwise_or.at(self.bits, position >> np.uint64(3),
+                                (np.uint8(1) << (position & np.uint64(7)).astype(np.uint8)))
+
+        def mightContain(self, values):
+                found = np.ones(len(values), dtype=bool)
+                for position in self.positions(values):
+                        found &= ((self.bits[position >> np.uint64(3)] >> (position & np.uint64(7)).astype(np.uint8)) & 1) == 1
+                return found
+
+class SeenIds:
+        # Compact replacement for a set of id strings. Decoded ids live in sorted uint64 arrays:
+        # a base array (memory-mapped when loaded from disk) plus levels that are merged
+        # pairwise like a binary counter, so inserts stay O(log n) amortised per id.
+        def __init__(self, bloomBits=0):
+                self.base = np.zeros(0, dtype=np.uint64)
+                self.levels = []
+                self.strings = set()
+                self.bloom = BloomFilter(bloomBits) if bloomBits else None
+
+        @classmethod
+        def load(cls, path, bloomBits=0):
+                seen = cls(bloomBits)
+                if os.path.exists(path):
+                        seen.base = np.load(path, mmap_mode='r')
+                        if seen.bloom is not None:
+                                seen.bloom.add(np.asarray(seen.base))
+                if os.path.exists(path + '.strings'):
+                        with open(path + '.strings', encoding='utf-8') as file:
+                                seen.strings = set(file.read().splitlines())
+                return seen
+
+        def __len__(self):
+                return len(self.base) + sum(len(level) for level in self.levels if level is not None) + len(self.strings)
+
+        def contains(self, values):
+                known = np.zeros(len(values), dtype=bool)
+                check = self.bloom.mightContain(values) if self.bloom is not None else np.ones(len(values), dtype=bool)
+                for level in [self.base] + self.levels:
+                        if level is None or len(level) == 0:
+                                continue
+                        remaining = np.flatnonzero(check & ~known)
+                        if len(remaining) == 0:
+                                break
+                        positions = np.searchsorted(level, values[remaining])
+                        inside = positions < len(level)
+                        hits = remaining[inside][level[positions[inside]] == values[remaining[inside]]]
+                        known[hits] = True
+                return known
+
+        def insert(self, values):
+                if self.bloom is not None:
+                        self.bloom.add(values)
+                carry = values
+                for i, level in enumerate(self.levels):
+                        if level is None:
+                                self.levels[i] = carry
+                                return
+                        carry = np.sort(np.concatenate((level, carry)))
+                        self.levels[i] = None
+                self.levels.append(carry)
+
+        def addBatch(self, ids):
+                # mark the ids in a batch as seen; returns a mask of those not seen before,
+                # where a repeated id within the batch only counts the first time
+                fresh = np.zeros(len(ids), dtype=bool)
+                values, decoded = decodeIds(ids)
+                for i in np.flatnonzero(~decoded):
+                        if ids[i] not in self.strings:
+                                self.strings.add(ids[i])
+                                fresh[i] = True
+                indices = np.flatnonzero(decoded)
+                unique, first = np.unique(values[indices], return_index=True)
+                known = self.contains(unique)
+                fresh[indices[first[~known]]] = True
+                if (~known).any():
+                        self.insert(unique[~known])
+                return fresh
+
+        def save(self, path):
+                levels = [np.asarray(self.base)] + [level for level in self.levels if level is not None]
+                merged = np.sort(np.concatenate(levels))
+                # merged is a copy, so dropping these references unmaps the base loaded from
+                # path; Windows cannot replace a file that is still mapped
+                self.base = merged
+                self.levels = []
+                del levels
+                # write beside the old file and swap, so the old one is intact until the new one is complete
+                temporary = path + '.tmp.npy'
+                np.save(temporary, merged)
+                os.replace(temporary, path)
+                with open(path + '.strings', mode='w', encoding='utf-8') as file:
+                        file.writelines(id + '\n' for id in sorted(id for id in self.strings if isinstance(id, str)))
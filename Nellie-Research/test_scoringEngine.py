@@ -0,0 +1,93 @@
+import os
+import random
+import numpy as np
+import pytest
+from scoringEngine import ScoringEngine, keywordSearch, loadLexicon, pronouns
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+# texts chosen to hit the edges of keywordSearch's formula
+edgeCases = [
+        "",
+        "   ",
+        "sad",
+        "sad sad sad sad",
+        "sad sad sad sad sad",
+        "depression depression depression anxiety anxiety sad sad lonely",
+        "i me myself mine i me",
+        "I ME MYSELF MINE me and myself",
+        "i feel so sad and i am anxious about my depression",
+        "Depressed? Anxious!! sad... (lonely) - numb; i, me",
+        "self-harm and can't sleep, it's insomnia: i'm exhausted",
+        "sad_day anxiety_attack depression's grip i'm me.myself",
+        "don't@me sad#lonely, dread/despair & panic|attack",
+        "İstanbul was sad and lonely and i was anxious there",
+        "İİİ İ sad depression me i myself",
+        "ǅ ß ẞ Σ sad lonely I me depression",
+        "naïve café résumé sad anxious i me depression",
+        "Ünhappy ünhappiness sad SAD Sad sAd",
+        "東京 sad 悲しい lonely me i depression",
+        "\tsad\nlonely\r\nanxious me i myself mine",
+        " ".join(["filler"] * 99 + ["sad"]),
+        " ".join(["filler"] * 100 + ["sad"]),
+        " ".join(["sad"] * 250 + ["i"] * 50),
+]
+
+@pytest.fixture(scope="module")
+def lexicons():
+        mhLexicon = loadLexicon(os.path.join(here, 'mentalhealth_lexicon.csv'))
+        emLexicon = loadLexicon(os.path.join(here, 'emotion_lexicon.csv'))
+        return mhLexicon, emLexicon
+
+def generatedTexts(mhLexicon, emLexicon, count=2000, seed=31):
+        # small deterministic corpus mixing lexicon words, pronouns, filler and punctuation
+        rng = random.Random(seed)
+        words = sorted(word for word in mhLexicon | emLexicon if word) + pronouns + ["the", "a", "today", "really", "İ", "ß", "ǅ"]
+        separators = [" ", "  ", ", ", ". ", "! ", "? ", "-", "'", "_", "\n"]
+        texts = []
+        for _ in range(count):
+                length = rng.choice([0, 1, 4, 5, 6, rng.randint(0, 40), rng.randint(90, 130)])
+                parts = []
+                for _ in range(length):
+                        word = rng.choice(words)
+                        if rng.random() < 0.2:
+                                word = word.upper()
+                        elif rng.random() < 0.2:
+                                word = word.capitalize()
+                        parts.append(word + rng.choice(separators))
+                texts.append("".join(parts))
+        return texts
+
+def assertIdentical(engine, mhLexicon, emLexicon, texts):
+        scores = engine.scoreBatch(texts)
+        assert len(scores) == len(texts)
+        for text, score in zip(texts, scores):
+                expected = keywordSearch(text, mhLexicon, emLexicon)
+                assert repr(float(score)) == repr(float(expected)), text
+
+def testEdgeCases(lexicons):
+        mhLexicon, emLexicon = lexicons
+        assertIdentical(ScoringEngine(mhLexicon, emLexicon), mhLexicon, emLexicon, edgeCases)
+
+def testGeneratedCorpus(lexicons):
+        mhLexicon, emLexicon = lexicons
+        assertIdentical(ScoringEngine(mhLexicon, emLexicon), mhLexicon, emLexicon, generatedTexts(mhLexicon, emLexicon))
+
+def testOverlappingLexicons():
+        # a word in both lexicons counts 2 + 1, and pronouns can also be lexicon words
+        mhLexicon = {"panic", "sad", "me"}
+        emLexicon = {"sad", "dread"}
+        texts = ["sad sad panic dread me i", "i me myself mine i me", "me me me me me", "SAD panic: dread, dread!"]
+        assertIdentical(ScoringEngine(mhLexicon, emLexicon), mhLexicon, emLexicon, texts)
+
+def testSingleTextMatchesBatch(lexicons):
+        mhLexicon, emLexicon = lexicons
+        engine = ScoringEngine(mhLexicon, emLexicon)
+        batch = engine.scoreBatch(edgeCases)
+        assert [repr(engine.score(text)) for text in edgeCases] == [repr(float(score)) for score in batch]
+
+def testEmptyBatch(lexicons):
+        engine = ScoringEngine(*lexicons)
+        scores = engine.scoreBatch([])
+        assert scores.dtype == np.float64
+        assert len(scores) == 0
@@ -0,0 +1,56 @@
+import argparse
+import random
+import time
+import pandas as pd
+from cogs.keyword_matcher import KeywordMatcher, NATIVE_SCAN, count_keywords
+
+# Benchmark the compiled lexicon matcher against the per-word count_keywords loop
+parser = argparse.ArgumentParser(description="Benchmark KeywordMatcher against count_keywords on a synthetic corpus.")
+parser.add_argument("-n", "--texts", type=int, default=20000, help="Number of synthetic texts")
+parser.add_argument("--hit-rate", type=float, default=0.03, help="Fraction of tokens drawn from the lexicons")
+parser.add_argument("--seed", type=int, default=42, help="Random seed for the corpus")
+parser.add_argument("--mh-lexicon", default="../Nellie-Research/mentalhealth_lexicon.csv", help="Mental health lexicon CSV")
+parser.add_argument("--em-lexicon", default="../Nellie-Research/emotion_lexicon.csv", help="Emotion lexicon CSV")
+args = parser.parse_args()
+
+mental_health_words = pd.read_csv(args.mh_lexicon).columns.tolist()
+emotional_words = pd.read_csv(args.em_lexicon).columns.tolist()
+
+# Synthetic corpus: random filler words with lexicon words mixed in at the given rate
+rng = random.Random(args.seed)
+letters = "abcdefghijklmnopqrstuvwxyz"
+filler = ["".join(rng.choice(letters) for _ in range(rng.randint(1, 9))) for _ in range(5000)]
+lexicon = mental_health_words + emotional_words
+texts = []
+for _ in range(args.texts):
+    length = int(rng.lognormvariate(3.5, 1.0)) + 1
+    words = [rng.choice(lexicon) if rng.random() < args.hit_rate else rng.choice(filler) for _ in range(length)]
+    texts.append(" ".join(words).capitalize())
+
+start = time.perf_counter()
+expected = [(count_keywords(t, mental_health_words), count_keywords(t, emotional_words)) for t in texts]
+baseline = time.perf_counter() - start
+
+lexicons = {"mental_health": mental_health_words, "emotional": emotional_words}
+chars = sum(len(t) for t in texts)
+print(f"{len(texts)} texts, {chars} characters")
+print(f"count_keywords:  {baseline:.3f}s ({len(texts) / baseline:,.0f} texts/s)")
+
+# The pyahocorasick scan when it is installed, and always the pure-Python fallback
+for native in ([True, False] if NATIVE_SCAN else [False]):
+    start = time.perf_counter()
+    matcher = KeywordMatcher(lexicons, native=native)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [matcher.count(t) for t in texts]
+    compiled = time.perf_counter() - start
+
+    if actual != expected:
+        raise SystemExit("KeywordMatcher counts differ from count_keywords")
+
+    scan = "pyahocorasick" if native else "pure Python"
+    print(f"KeywordMatcher ({scan}):  {compiled:.3f}s ({len(texts) / compiled:,.0f} texts/s), "
+          f"built in {build * 1000:.1f}ms, speedup {baseline / compiled:.2f}x, counts identical")
+if not NATIVE_SCAN:
+    print("pyahocorasick is not installed; pip install pyahocorasick for the faster scan")
@@ -1,80 +1,105 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import sys
-from datetime import datetime, timedelta
+from functools import lru_cache
 
-# Load datasets with proper dtype handling
-posts = pd.read_csv("./csv_files/posts.csv", dtype={"created_utc": "str"}, low_memory=False)
-comments = pd.read_csv("./csv_files/comments.csv", dtype={"created_utc": "str"}, low_memory=False)
+# Run as "python cogs/analysis.py" or imported as cogs.analysis
+try:
+    from cogs.data_loader import load_posts, load_derived, to_bool, POSTS_PATH
+    from cogs.author_index import repeat_author_mask, summarise_authors
+    from cogs.time_features import to_epoch_seconds, bucket_start, time_of_day_labels
+except ImportError:
+    from data_loader import load_posts, load_derived, to_bool, POSTS_PATH
+    from author_index import repeat_author_mask, summarise_authors
+    from time_features import to_epoch_seconds, bucket_start, time_of_day_labels
 
-# Convert timestamps to datetime safely
-posts["created_utc"] = pd.to_numeric(posts["created_utc"], errors="coerce")
-posts = posts.dropna(subset=["created_utc"])
-posts["created_utc"] = posts["created_utc"].astype(int)
-posts["created_utc"] = pd.to_datetime(posts["created_utc"], unit="s")
+# Everything below is computed on first use and cached, so importing this module reads nothing
 
-comments["created_utc"] = pd.to_numeric(comments["created_utc"], errors="coerce")
-comments = comments.dropna(subset=["created_utc"])
-comments["created_utc"] = comments["created_utc"].astype(int)
-comments["created_utc"] = pd.to_datetime(comments["created_utc"], unit="s")
+@lru_cache(maxsize=None)
+def get_posts():
+    # Load posts with proper dtype handling (only the columns used below)
+    posts = load_posts(["author", "created_utc", "edited", "num_comments", "score", "upvote_ratio", "disclosure_post"])
 
-# Function to round time to the nearest 30 minutes
-def round_to_nearest_30(dt):
-    new_minute = (dt.minute // 30) * 30
-    if dt.minute % 30 >= 15:  # If closer to the next 30-minute mark, round up
-        new_minute += 30
-    return dt.replace(minute=new_minute % 60, second=0, microsecond=0)
+    # Convert timestamps to epoch seconds safely, dropping posts without a valid one
+    created = to_epoch_seconds(posts["created_utc"])
+    posts = posts.loc[created.index].copy()
+    posts["created_epoch"] = created
+    posts["created_utc"] = pd.to_datetime(created, unit="s")
 
-# Extract rounded hh:mm from created_utc
-posts["created_time"] = posts["created_utc"].apply(round_to_nearest_30).dt.strftime("%H:%M")
+    # Extract hh:mm rounded to the nearest 30 minutes from created_utc
+    posts["created_time"] = time_of_day_labels(created, "30min")
+    return posts
 
-# Identify repeat posters (users with multiple disclosures)
-repeat_posters = posts[posts["disclosure_post"] == 1].groupby("author").filter(lambda x: len(x) > 1)
+def _time_key(posts, bucket):
+    # Exact creation times, or the start of each post's bucket (e.g. "day", "week")
+    if bucket is None:
+        return posts["created_utc"]
+    return pd.to_datetime(bucket_start(posts["created_epoch"], bucket), unit="s").rename("created_utc")
 
-# Fix edited column handling
-repeat_posters["edited"] = repeat_posters["edited"].replace({"FALSE": False, "TRUE": True}).astype(bool)
+@lru_cache(maxsize=None)
+def get_repeat_posters():
+    # Identify repeat posters (users with multiple disclosures)
+    posts = get_posts()
+    disclosures = posts[posts["disclosure_post"] == 1]
+    repeat_posters = disclosures[repeat_author_mask(disclosures["author"])].copy()
 
-# Track engagement trends over time
-engagement_trends = repeat_posters.groupby(["created_utc"]).agg(
-    {"num_comments": "sum", "score": "mean"}
-).reset_index()
+    # Fix edited column handling
+    repeat_posters["edited"] = to_bool(repeat_posters["edited"])
+    return repeat_posters
 
-# Track edit/delete behavior of repeat posters
-edit_trends = repeat_posters.groupby("created_utc")["edited"].sum().reset_index()
+@lru_cache(maxsize=None)
+def get_engagement_trends(bucket=None):
+    # Track engagement trends over time, per post or per time bucket
+    repeat_posters = get_repeat_posters()
+    return repeat_posters.groupby(_time_key(repeat_posters, bucket)).agg(
+        {"num_comments": "sum", "score": "mean"}
+    ).reset_index()
 
-# Output summary
-summary = pd.DataFrame({
-    "avg_score": repeat_posters.groupby("author")["score"].mean(),
-    "total_comments": repeat_posters.groupby("author")["num_comments"].sum(),
-    "num_edits": repeat_posters.groupby("author")["edited"].sum()
-})
+@lru_cache(maxsize=None)
+def get_edit_trends(bucket=None):
+    # Track edit/delete behavior of repeat posters, per post or per time bucket
+    repeat_posters = get_repeat_posters()
+    return repeat_posters.groupby(_time_key(repeat_posters, bucket))["edited"].sum().reset_index()
 
-# Group metrics by created time
-aggregated_trends = posts.groupby("created_time").agg(
-    disclosure_post=("disclosure_post", "sum"),
-    upvote_ratio=("upvote_ratio", "mean"),
-    num_comments=("num_comments", "sum")
-).reset_index()
+@lru_cache(maxsize=None)
+def get_summary():
+    # Output summary: avg score, total comments and edits per repeat poster, in one aggregation.
+    # Saved with the Parquet cache, so "cli edits"/"cli engagement" skip the posts entirely
+    # until posts.csv changes
+    return load_derived("author_summary", POSTS_PATH, lambda: summarise_authors(get_repeat_posters()))
+
+@lru_cache(maxsize=None)
+def get_aggregated_trends():
+    # Group metrics by created time
+    return get_posts().groupby("created_time").agg(
+        disclosure_post=("disclosure_post", "sum"),
+        upvote_ratio=("upvote_ratio", "mean"),
+        num_comments=("num_comments", "sum")
+    ).reset_index()
 
 def plot_graph(option="engagement"):
     plt.figure(figsize=(10, 5))
     
     if option == "engagement":
+        engagement_trends = get_engagement_trends()
         plt.plot(engagement_trends["created_utc"], engagement_trends["num_comments"], marker='o', linestyle='-', label="Comments", color='blue')
         plt.plot(engagement_trends["created_utc"], engagement_trends["score"], marker='s', linestyle='-', label="Score", color='green')
         plt.ylabel("Engagement Metrics")
         plt.title("Engagement Trends for Repeat Posters")
     elif option == "edits":
+        edit_trends = get_edit_trends()
         plt.plot(edit_trends["created_utc"], edit_trends["edited"], marker='o', linestyle='-', color='red', label="Edits")
         plt.ylabel("Number of Edits")
         plt.title("Editing Behavior of Repeat Posters")
     elif option == "upvote_ratio":
+        aggregated_trends = get_aggregated_trends()
         plt.bar(aggregated_trends["created_time"], aggregated_trends["upvote_ratio"], color='purple')
         plt.xlabel("Time (hh:mm)")
         plt.ylabel("Average Upvote Ratio")
         plt.title("Upvote Ratio by Time of Post Creation (Rounded to 30 min)")
         plt.xticks(rotation=90)
     elif option == "disclosures":
+        aggregated_trends = get_aggregated_trends()
         plt.bar(aggregated_trends["created_time"], aggregated_trends["disclosure_post"], color='orange')
         plt.xlabel("Time (hh:mm)")
         plt.ylabel("Number of Disclosures")
@@ -93,21 +118,21 @@ if __name__ == "__main__":
         if sys.argv[2] == "edits":
             if "-o" in sys.argv:
                 column = sys.argv[sys.argv.index("-o") + 1]
-                print(summary.sort_values(column, ascending=False))
+                print(get_summary().sort_values(column, ascending=False))
             else:
-                print(summary.sort_values("num_edits", ascending=False))
+                print(get_summary().sort_values("num_edits", ascending=False))
         elif sys.argv[2] == "engagement":
             if "-o" in sys.argv:
                 column = sys.argv[sys.argv.index("-o") + 1]
-                print(summary.sort_values(column, ascending=False))
+                print(get_summary().sort_values(column, ascending=False))
             else:
-                print(summary.sort_values("total_comments", ascending=False))
+                print(get_summary().sort_values("total_comments", ascending=False))
         elif sys.argv[2] == "disclosures":
             if "-o" in sys.argv:
                 column = sys.argv[sys.argv.index("-o") + 1]
-                print(aggregated_trends.sort_values(column, ascending=False))
+                print(get_aggregated_trends().sort_values(column, ascending=False))
             else:
-                print(aggregated_trends)
+                print(get_aggregated_trends())
         else:
             print("Invalid option. Use 'cli edits', 'cli engagement', or 'cli disclosures'")
     elif len(sys.argv) > 1:
@@ -0,0 +1,48 @@
+import re
+import pandas as pd
+
+# Content-warning markers, each computed once per document and stored as a boolean column.
+# has_content_warning is the plain TW/CW marker the reports compare on; the others follow the
+# censoring pattern used in Aleeyah-Research (case-insensitive, NSFW included):
+#   (\*\*(TW|CW|NSFW)\*\*|\>\!(TW|CW|NSFW)\!\<|\b(TW|CW|NSFW)\b)
+CONTENT_WARNING_PATTERNS = {
+    "has_content_warning": re.compile(r'\b(?:TW|CW)\b'),
+    "has_bold_warning": re.compile(r'\*\*(?:TW|CW|NSFW)\*\*', re.IGNORECASE),
+    "has_spoiler_warning": re.compile(r'>!(?:TW|CW|NSFW)!<', re.IGNORECASE),
+    "has_nsfw_warning": re.compile(r'\bNSFW\b', re.IGNORECASE),
+    # Bold and spoiler markers are delimited by non-word characters, so the word-boundary
+    # alternative of the full pattern already finds them
+    "is_censored": re.compile(r'\b(?:TW|CW|NSFW)\b', re.IGNORECASE),
+}
+CONTENT_WARNING_COLUMNS = list(CONTENT_WARNING_PATTERNS)
+
+_NO_WARNING = (False,) * len(CONTENT_WARNING_COLUMNS)
+
+
+def warning_flags(text):
+    """Flags for one document, in CONTENT_WARNING_COLUMNS order; missing text has none."""
+    if not isinstance(text, str):
+        return _NO_WARNING
+    # Almost no document contains a marker, so skip the regexes unless one could match.
+    # casefold maps every character the case-insensitive patterns treat as a marker letter
+    # to its ASCII letter, so this never skips a match.
+    folded = text.casefold()
+    if "tw" not in folded and "cw" not in folded and "nsfw" not in folded:
+        return _NO_WARNING
+    return tuple(pattern.search(text) is not None for pattern in CONTENT_WARNING_PATTERNS.values())
+
+
+def content_warning_flags(texts):
+    """Frame of CONTENT_WARNING_COLUMNS for a column of texts, indexed like it."""
+    flags = pd.DataFrame.from_records([warning_flags(text) for text in texts],
+                                      columns=CONTENT_WARNING_COLUMNS, index=texts.index)
+    return flags.astype(bool)
+
+
+def add_content_warnings(frame, column):
+    """Add the content-warning columns for frame[column], unless they are already there."""
+    if CONTENT_WARNING_COLUMNS[0] not in frame:
+        flags = content_warning_flags(frame[column])
+        for name in CONTENT_WARNING_COLUMNS:
+            frame[name] = flags[name]
+    return frame
@@ -1,45 +1,167 @@
+import glob
+import importlib.util
+import os
+from collections import defaultdict
 import pandas as pd
 import numpy as np
+# Imported as cogs.data_loader, or as data_loader when cogs/analysis.py is run directly
+try:
+    from cogs.content_warning import add_content_warnings
+except ImportError:
+    from content_warning import add_content_warnings
 
-def load_data():
-    # Load posts CSV
-    posts = pd.read_csv("csv_files/posts.csv", dtype={
-        "author": str, 
-        "created_utc": str,  
-        "edited": str,  
-        "submission_id": str, 
-        "num_comments": "Int64", 
-        "permalink": str, 
-        "score": "Int64", 
-        "selftext": str, 
-        "subreddit": str, 
-        "title": str, 
-        "upvote_ratio": float, 
-        "disclosure_post": "Int64",
-        "disclosure_title": "Int64",
-        "disclosure_total": str  # Read as string initially
-    }, low_memory=False)
-
-    # Load comments CSV
-    comments = pd.read_csv("csv_files/comments.csv", dtype={
-        "author": str, 
-        "body": str, 
-        "created_utc": str,  
-        "comment_id": str, 
-        "edited": str, 
-        "is_submitter": str, 
-        "link_id": str, 
-        "permalink": str, 
-        "parent_id": str, 
-        "score": "Int64", 
-        "subreddit": str, 
-        "disclosure_total": str  # Read as string initially
-    }, low_memory=False)
+POSTS_PATH = "csv_files/posts.csv"
+COMMENTS_PATH = "csv_files/comments.csv"
+CACHE_DIR = "csv_files/cache"
+# Bump when the columns added before caching, or a derived table's dtypes, change, so older
+# cache files are rebuilt
+CACHE_VERSION = 3
 
+POSTS_DTYPES = {
+    "author": str,
+    "created_utc": str,
+    "edited": str,
+    "submission_id": str,
+    "num_comments": "Int64",
+    "permalink": str,
+    "score": "Int64",
+    "selftext": str,
+    "subreddit": str,
+    "title": str,
+    "upvote_ratio": float,
+    "disclosure_post": "Int64",
+    "disclosure_title": "Int64",
+    "disclosure_total": str  # Read as string initially
+}
+
+COMMENTS_DTYPES = {
+    "author": str,
+    "body": str,
+    "created_utc": str,
+    "comment_id": str,
+    "edited": str,
+    "is_submitter": str,
+    "link_id": str,
+    "permalink": str,
+    "parent_id": str,
+    "score": "Int64",
+    "subreddit": str,
+    "disclosure_total": str  # Read as string initially
+}
+
+# Parquet needs pyarrow; without it every load parses the CSV as before
+CACHE_ENABLED = importlib.util.find_spec("pyarrow") is not None
+if CACHE_ENABLED:
+    import pyarrow.parquet as pq
+
+def _cache_path(path, cache_dir, name=None):
+    # Cache files are keyed by the CSV's size and mtime, so editing the CSV invalidates them
+    stat = os.stat(path)
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{name}-v{CACHE_VERSION}-{stat.st_size}-{stat.st_mtime_ns}.parquet")
+
+# Columns already loaded in this process, keyed by cache file (or CSV path and mtime), so
+# every module asking for the same data shares one read
+_loaded = {}
+
+def load_table(path, dtypes, columns=None, cache_dir=CACHE_DIR, convert=None):
+    """Load a CSV with the given dtypes, through a Parquet cache when available.
+
+    Columns not listed in dtypes are read as strings so the cached schema is stable.
+    convert(frame) runs once before caching. Only the requested columns are read back,
+    and columns read once are kept for later calls in the same process.
+    """
+    cache = _cache_path(path, cache_dir) if CACHE_ENABLED else None
+    key = cache or (os.path.abspath(path), os.stat(path).st_mtime_ns)
+    loaded = _loaded.get(key)
+
+    if cache is not None and os.path.exists(cache):
+        wanted = columns if columns is not None else pq.read_schema(cache).names
+        missing = [c for c in wanted if loaded is None or c not in loaded.columns]
+        if missing:
+            frame = pd.read_parquet(cache, columns=missing)
+            loaded = frame if loaded is None else pd.concat([loaded, frame], axis=1)
+            _loaded[key] = loaded
+        return loaded[wanted]
+
+    if loaded is None:
+        loaded = pd.read_csv(path, dtype=defaultdict(lambda: str, dtypes), low_memory=False)
+        if convert is not None:
+            loaded = convert(loaded)
+        if cache is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            name = os.path.splitext(os.path.basename(path))[0]
+            for stale in glob.glob(os.path.join(cache_dir, f"{name}-*.parquet")):
+                os.remove(stale)
+            loaded.to_parquet(cache, index=False)
+        _loaded[key] = loaded
+    # Selecting a list of columns returns a new frame, so callers can add columns freely
+    return loaded[columns if columns is not None else list(loaded.columns)]
+
+def _convert_posts(posts):
+    # Content-warning flags of the title are stored with the table, so they are computed once per CSV
+    if "title" in posts:
+        posts = add_content_warnings(posts, "title")
+    return posts
+
+def _convert_comments(comments):
     # Convert 'disclosure_total' to numeric, coercing errors to NaN (non-numeric values)
-    comments["disclosure_total"] = pd.to_numeric(comments["disclosure_total"], errors="coerce")
+    if "disclosure_total" in comments:
+        comments["disclosure_total"] = pd.to_numeric(comments["disclosure_total"], errors="coerce")
 
     # Optionally, handle the NaN values by filling them with a specific number or leaving as NaN
     # comments["disclosure_total"].fillna(0, inplace=True)  # Uncomment to replace NaNs with 0
 
+    if "body" in comments:
+        comments = add_content_warnings(comments, "body")
+    return comments
+
+def load_derived(name, source_path, build, cache_dir=CACHE_DIR):
+    """Load a table derived from a CSV from the Parquet cache, building and saving it on first use.
+
+    The cache file is keyed by the source CSV like the CSV caches, so it is rebuilt when the
+    CSV changes. build() is called without arguments and must return a DataFrame.
+    """
+    if not CACHE_ENABLED:
+        return build()
+    cache = _cache_path(source_path, cache_dir, name)
+    if os.path.exists(cache):
+        return pd.read_parquet(cache)
+    table = build()
+    os.makedirs(cache_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(cache_dir, f"{name}-*.parquet")):
+        os.remove(stale)
+    table.to_parquet(cache)
+    return table
+
+def load_posts(columns=None, path=POSTS_PATH):
+    return load_table(path, POSTS_DTYPES, columns, convert=_convert_posts)
+
+def load_comments(columns=None, path=COMMENTS_PATH):
+    return load_table(path, COMMENTS_DTYPES, columns, convert=_convert_comments)
+
+def iter_table(path, dtypes, columns=None, chunksize=100_000, convert=None):
+    """Read a CSV in chunks of rows with the given dtypes, for data too large to load at once.
+
+    Chunks keep a running RangeIndex, so row labels match those of the fully loaded frame,
+    and convert(chunk) is applied to each chunk as load_table applies it to the whole table.
+    """
+    for chunk in pd.read_csv(path, usecols=columns, dtype=defaultdict(lambda: str, dtypes),
+                             chunksize=chunksize, low_memory=False):
+        yield convert(chunk) if convert is not None else chunk
+
+def iter_posts(columns=None, path=POSTS_PATH, chunksize=100_000):
+    return iter_table(path, POSTS_DTYPES, columns, chunksize, convert=_convert_posts)
+
+def iter_comments(columns=None, path=COMMENTS_PATH, chunksize=100_000):
+    return iter_table(path, COMMENTS_DTYPES, columns, chunksize, convert=_convert_comments)
+
+def to_bool(series):
+    """Parse a string flag column such as "edited": false/0/empty are False, anything else True."""
+    return ~series.fillna("false").str.strip().str.lower().isin(["false", "0", "0.0", ""])
+
+def load_data(post_columns=None, comment_columns=None):
+    # Load posts and comments CSVs (cached as Parquet after the first run)
+    posts = load_posts(post_columns)
+    comments = load_comments(comment_columns)
     return posts, comments
@@ -0,0 +1,157 @@
+import importlib.util
+from collections import deque
+import pandas as pd
+
+# pyahocorasick runs the scan in C; without it the automaton below is walked in Python
+NATIVE_SCAN = importlib.util.find_spec("ahocorasick") is not None
+if NATIVE_SCAN:
+    import ahocorasick
+
+
+# Original per-word counter, kept as the reference the matcher is checked against
+def count_keywords(text, keywords):
+    if pd.isna(text):
+        return 0
+    return sum(text.lower().count(word) for word in keywords)
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over several lexicons, counting every lexicon in one scan of the text.
+
+    With whole_word=False the counts equal count_keywords() (non-overlapping substring
+    counts of each lexicon entry, duplicates included). With whole_word=True a match only
+    counts when it is not touching another word character, like a regex \\b...\\b.
+
+    Matches are found with pyahocorasick when it is installed (native=True), otherwise by
+    walking the automaton in Python; either way they go through the same counting rules.
+    """
+
+    def __init__(self, lexicons, whole_word=False, native=True):
+        self.names = list(lexicons)
+        self.whole_word = whole_word
+        self.native = native and NATIVE_SCAN
+        self.words = []       # distinct patterns
+        self.weights = []     # per pattern: list of (lexicon index, times it appears in that lexicon)
+        self.empty = [0] * len(self.names)  # "".count("") is len + 1, kept for exact parity
+
+        index = {}
+        for lex, name in enumerate(self.names):
+            for word in lexicons[name]:
+                if not isinstance(word, str):
+                    continue
+                if word == "":
+                    self.empty[lex] += 1
+                    continue
+                if word not in index:
+                    index[word] = len(self.words)
+                    self.words.append(word)
+                    self.weights.append({})
+                weight = self.weights[index[word]]
+                weight[lex] = weight.get(lex, 0) + 1
+        self.weights = [list(w.items()) for w in self.weights]
+        self._build()
+
+    @classmethod
+    def from_csv(cls, paths, whole_word=False):
+        """Build a matcher from {name: lexicon csv path}, loading words the way main.py does."""
+        return cls({name: pd.read_csv(path).columns.tolist() for name, path in paths.items()}, whole_word)
+
+    def _build(self):
+        goto = [{}]
+        outputs = [[]]
+        for pattern, word in enumerate(self.words):
+            state = 0
+            for ch in word:
+                if ch not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            outputs[state].append(pattern)
+
+        # Breadth-first pass sets failure links and folds them into a full transition table,
+        # so scanning is a single dict lookup per character with no fallback loop.
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(goto[state])
+            for ch, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(ch, 0) if state else 0
+                outputs[child] = outputs[child] + outputs[fail[child]]
+                queue.append(child)
+
+        self._delta = delta
+        self._outputs = [tuple((p, len(self.words[p])) for p in out) or None for out in outputs]
+
+        self._automaton = None
+        if self.native and self.words:
+            self._automaton = ahocorasick.Automaton()
+            for pattern, word in enumerate(self.words):
+                self._automaton.add_word(word, (pattern, len(word)))
+            self._automaton.make_automaton()
+
+    def _iter(self, text):
+        # (end position, (pattern, length)) for every occurrence of every pattern, overlapping
+        # ones included, by end position; the same items Automaton.iter() yields
+        delta = self._delta
+        outputs = self._outputs
+        state = 0
+        for pos, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            found = outputs[state]
+            if found is not None:
+                for match in found:
+                    yield pos, match
+
+    def count(self, text):
+        """Return a tuple of counts, one per lexicon in self.names."""
+        counts = [0] * len(self.names)
+        if not isinstance(text, str):
+            return tuple(counts)
+        text = text.lower()
+        if any(self.empty):
+            counts = [n * (len(text) + 1) for n in self.empty]
+
+        if self._automaton is not None:
+            matches = self._automaton.iter(text)
+        elif self.native:
+            return tuple(counts)  # no patterns
+        else:
+            matches = self._iter(text)
+
+        next_free = {}  # pattern -> first position a further match may start (str.count never overlaps)
+        whole_word = self.whole_word
+        last = len(text) - 1
+        for pos, (pattern, length) in matches:
+            start = pos - length + 1
+            if whole_word and ((start > 0 and _is_word_char(text[start - 1]))
+                               or (pos < last and _is_word_char(text[pos + 1]))):
+                continue
+            if start < next_free.get(pattern, 0):
+                continue
+            next_free[pattern] = pos + 1
+            for lex, times in self.weights[pattern]:
+                counts[lex] += times
+        return tuple(counts)
+
+    def count_texts(self, *texts):
+        """Sum count() over several fields of one document, e.g. a post's title and selftext."""
+        totals = [0] * len(self.names)
+        for text in texts:
+            for lex, n in enumerate(self.count(text)):
+                totals[lex] += n
+        return tuple(totals)
+
+    def count_frame(self, frame, columns):
+        """Return a DataFrame with one "<name>_count" column per lexicon, summed over the given text columns."""
+        rows = [self.count_texts(*values) for values in zip(*(frame[c].tolist() for c in columns))]
+        return pd.DataFrame(rows, index=frame.index, columns=[f"{name}_count" for name in self.names],
+                            dtype="int64")
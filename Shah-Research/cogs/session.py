@@ -0,0 +1,47 @@
+from functools import cached_property
+import pandas as pd
+from cogs.data_loader import load_posts, load_comments, POSTS_PATH, COMMENTS_PATH
+
+
+class AnalysisSession:
+    """Owns the posts and comments frames for one run of main.py.
+
+    Each dataset is loaded once, on first use, and derived columns are added to the owned
+    frame the first time something asks for them, so analyses and plots share one load and
+    one scoring pass per dataset.
+    """
+
+    # has_content_warning is computed when the CSV is first loaded and cached with it
+    POST_COLUMNS = ["submission_id", "title", "selftext", "upvote_ratio", "num_comments", "has_content_warning"]
+    COMMENT_COLUMNS = ["comment_id", "body", "score", "disclosure_total", "has_content_warning"]
+
+    def __init__(self, matcher, posts_path=POSTS_PATH, comments_path=COMMENTS_PATH):
+        self.matcher = matcher
+        self.posts_path = posts_path
+        self.comments_path = comments_path
+
+    @cached_property
+    def posts(self):
+        return load_posts(self.POST_COLUMNS, path=self.posts_path)
+
+    @cached_property
+    def comments(self):
+        comments = load_comments(self.COMMENT_COLUMNS, path=self.comments_path)
+        comments["score"] = pd.to_numeric(comments["score"], errors="coerce")
+        return comments
+
+    def _add_counts(self, frame, columns):
+        if "disclosure_score" not in frame:
+            counts = self.matcher.count_frame(frame, columns)
+            frame["mental_health_count"] = counts["mental_health_count"]
+            frame["emotional_count"] = counts["emotional_count"]
+            frame["disclosure_score"] = frame["mental_health_count"] + frame["emotional_count"]
+        return frame
+
+    def scored_posts(self):
+        """Posts with mental_health_count, emotional_count and disclosure_score."""
+        return self._add_counts(self.posts, ["title", "selftext"])
+
+    def scored_comments(self):
+        """Comments with mental_health_count, emotional_count and disclosure_score."""
+        return self._add_counts(self.comments, ["body"])
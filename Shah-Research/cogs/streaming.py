@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+from cogs.data_loader import iter_posts, iter_comments
+
+# Chunked versions of the reports in main.py, for --streaming. Each chunk is scored and reduced
+# into running totals (sums and counts, and the best row so far for argmax/argmin), so memory
+# does not grow with the size of the CSV.
+#
+# Each group's sum adds its values one at a time in row order, carrying on from the previous
+# chunk's total, so the means do not depend on the chunk size. pandas sums pairwise when it has
+# the whole column, so a mean can differ from the in-memory report in its last digit.
+
+
+def _running_sums(starts, values, codes):
+    """Per-code sums of values, added in row order onto the given starting sums."""
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(starts) + 1))
+    values = values[order]
+    sums = starts.copy()
+    for code in np.flatnonzero(np.diff(bounds)):
+        # cumsum adds sequentially, unlike sum, which adds pairwise
+        group = np.concatenate(([sums[code]], values[bounds[code]:bounds[code + 1]]))
+        sums[code] = np.cumsum(group)[-1]
+    return sums
+
+
+class GroupedMeans:
+    """Running non-missing counts of several columns, and sums of the numeric ones, per group key."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.groups = {}  # key -> ([sum per column], [count per column])
+
+    def add(self, frame, keys=None):
+        """Add a chunk; keys is a list of group key columns, or None for one overall group."""
+        if keys:
+            codes, uniques = pd.MultiIndex.from_frame(frame[keys]).factorize()
+            uniques = list(uniques)
+        else:
+            codes, uniques = np.zeros(len(frame), dtype=np.int64), [None]
+        empty = ([0.0] * len(self.columns), [0] * len(self.columns))
+        totals = [self.groups.get(key, empty) for key in uniques]
+        sums = []
+        counts = []
+        for index, column in enumerate(self.columns):
+            valid = frame[column].notna().to_numpy()
+            starts = np.array([total[0][index] for total in totals], dtype=float)
+            if pd.api.types.is_numeric_dtype(frame[column]):
+                values = frame[column].to_numpy(dtype=float, na_value=np.nan)[valid]
+                starts = _running_sums(starts, values, codes[valid])
+            sums.append(starts)
+            starts = np.array([total[1][index] for total in totals], dtype=np.int64)
+            counts.append(starts + np.bincount(codes[valid], minlength=len(uniques)))
+        for code, key in enumerate(uniques):
+            self.groups[key] = ([float(column_sums[code]) for column_sums in sums],
+                                [int(column_counts[code]) for column_counts in counts])
+
+    def mean(self, column, key=None, missing=np.nan):
+        """Mean of a column in one group, or `missing` when it has no values."""
+        index = self.columns.index(column)
+        sums, counts = self.groups.get(key, ([0.0] * len(self.columns), [0] * len(self.columns)))
+        if counts[index] == 0:
+            return missing
+        return np.float64(sums[index]) / counts[index]
+
+    def count(self, column, key=None):
+        index = self.columns.index(column)
+        return self.groups[key][1][index] if key in self.groups else 0
+
+    def keys(self):
+        return sorted(self.groups)
+
+
+class RunningExtreme:
+    """Mergeable first row holding the largest (or smallest) value of a column."""
+
+    def __init__(self, column, columns, largest=True):
+        self.column = column
+        self.columns = columns
+        self.largest = largest
+        self.value = None
+        self.label = None
+        self.row = None
+
+    def _better(self, value, label):
+        if self.value is None:
+            return True
+        if value == self.value:
+            return label < self.label  # ties keep the first row, as idxmax/idxmin do
+        return value > self.value if self.largest else value < self.value
+
+    def add(self, frame):
+        values = frame[self.column]
+        if not values.notna().any():
+            return
+        label = values.idxmax() if self.largest else values.idxmin()
+        if self._better(values[label], label):
+            self.value, self.label = values[label], label
+            self.row = frame.loc[label, self.columns]
+
+    def merge(self, other):
+        if other.value is not None and self._better(other.value, other.label):
+            self.value, self.label, self.row = other.value, other.label, other.row
+
+
+def _score(chunk, matcher, columns):
+    counts = matcher.count_frame(chunk, columns)
+    chunk["mental_health_count"] = counts["mental_health_count"]
+    chunk["emotional_count"] = counts["emotional_count"]
+    chunk["disclosure_score"] = chunk["mental_health_count"] + chunk["emotional_count"]
+    return chunk
+
+
+def _engagement_frame(means, columns, nullable, count_column, total_name):
+    # Same layout and dtypes as groupby(...).agg(...).reset_index() in main.py
+    keys = means.keys()
+    frame = pd.DataFrame(keys, columns=["mental_health_count", "emotional_count"], dtype="int64")
+    for name, column in columns:
+        if column in nullable:
+            frame[name] = pd.array([means.mean(column, key, missing=None) for key in keys], dtype="Float64")
+        else:
+            frame[name] = np.array([means.mean(column, key) for key in keys], dtype=float)
+    frame[total_name] = np.array([means.count(count_column, key) for key in keys], dtype="int64")
+    return frame
+
+
+def stream_posts_report(matcher, path, chunksize=100_000):
+    """Compute analyse_posts' report values reading posts.csv in chunks."""
+    row_columns = ["mental_health_count", "emotional_count", "upvote_ratio", "num_comments", "title", "selftext"]
+    engagement = GroupedMeans(["upvote_ratio", "num_comments", "disclosure_score", "submission_id"])
+    by_tw_cw = GroupedMeans(["upvote_ratio", "disclosure_score"])
+    by_disclosure = GroupedMeans(["num_comments", "disclosure_score"])
+    most = RunningExtreme("upvote_ratio", row_columns, largest=True)
+    least = RunningExtreme("upvote_ratio", row_columns, largest=False)
+
+    for chunk in iter_posts(["submission_id", "title", "selftext", "upvote_ratio", "num_comments"],
+                            path=path, chunksize=chunksize):
+        chunk = _score(chunk, matcher, ["title", "selftext"])
+        engagement.add(chunk, ["mental_health_count", "emotional_count"])
+        by_tw_cw.add(chunk, ["has_content_warning"])
+        by_disclosure.add(chunk.assign(is_neutral=chunk["disclosure_score"] == 0), ["is_neutral"])
+        most.add(chunk)
+        least.add(chunk)
+
+    return {
+        "engagement": _engagement_frame(
+            engagement,
+            [("avg_upvote_ratio", "upvote_ratio"), ("avg_comments", "num_comments"),
+             ("avg_disclosure_score", "disclosure_score")],
+            nullable={"num_comments"}, count_column="submission_id", total_name="total_posts"),
+        "most_upvoted": most.row,
+        "least_upvoted": least.row,
+        "tw_cw_upvote_ratio": by_tw_cw.mean("upvote_ratio", (True,)),
+        "non_tw_cw_upvote_ratio": by_tw_cw.mean("upvote_ratio", (False,)),
+        "tw_cw_disclosure_score": by_tw_cw.mean("disclosure_score", (True,)),
+        "non_tw_cw_disclosure_score": by_tw_cw.mean("disclosure_score", (False,)),
+        "neutral_num_comments": by_disclosure.mean("num_comments", (True,), missing=pd.NA),
+        "neutral_disclosure_score": by_disclosure.mean("disclosure_score", (True,)),
+        "emotional_num_comments": by_disclosure.mean("num_comments", (False,), missing=pd.NA),
+        "emotional_disclosure_score": by_disclosure.mean("disclosure_score", (False,)),
+    }
+
+
+def stream_comments_report(matcher, path, chunksize=100_000):
+    """Compute analyse_comments' report values reading comments.csv in chunks."""
+    engagement = GroupedMeans(["score", "disclosure_score", "comment_id"])
+    by_tw_cw = GroupedMeans(["score", "disclosure_score"])
+
+    for chunk in iter_comments(["comment_id", "body", "score"], path=path, chunksize=chunksize):
+        chunk = _score(chunk, matcher, ["body"])
+        chunk["score"] = pd.to_numeric(chunk["score"], errors="coerce")
+        engagement.add(chunk, ["mental_health_count", "emotional_count"])
+        by_tw_cw.add(chunk, ["has_content_warning"])
+
+    return {
+        "engagement": _engagement_frame(
+            engagement,
+            [("avg_score", "score"), ("avg_disclosure_score", "disclosure_score")],
+            nullable={"score"}, count_column="comment_id", total_name="total_comments"),
+        "tw_cw_score": by_tw_cw.mean("score", (True,), missing=pd.NA),
+        "non_tw_cw_score": by_tw_cw.mean("score", (False,), missing=pd.NA),
+        "tw_cw_disclosure_score": by_tw_cw.mean("disclosure_score", (True,)),
+        "non_tw_cw_disclosure_score": by_tw_cw.mean("disclosure_score", (False,)),
+    }
+
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+# Time bucketing on integer epoch seconds. Buckets are computed with integer arithmetic on the
+# whole int64 column, and text labels are formatted once per distinct bucket, not per row.
+
+BUCKET_WIDTHS = {
+    "15min": 15 * 60,
+    "30min": 30 * 60,
+    "hour": 60 * 60,
+    "day": 24 * 60 * 60,
+    "week": 7 * 24 * 60 * 60,
+}
+
+# The epoch started on a Thursday; weeks start on the Monday before it
+_ORIGINS = {"week": -3 * 24 * 60 * 60}
+
+
+def to_epoch_seconds(values):
+    """Parse a column of epoch timestamps to int64 seconds, dropping values that are not numbers."""
+    seconds = pd.to_numeric(values, errors="coerce").dropna()
+    # Fractional seconds are truncated, as astype(int) did
+    return seconds.astype("int64")
+
+
+def bucket_start(seconds, width, nearest=False):
+    """Start of each timestamp's bucket, in epoch seconds.
+
+    width is a number of seconds or a BUCKET_WIDTHS name. With nearest, timestamps are
+    rounded to the closest bucket boundary (halfway rounds up) instead of down.
+    """
+    origin = _ORIGINS.get(width, 0) if isinstance(width, str) else 0
+    width = BUCKET_WIDTHS[width] if isinstance(width, str) else int(width)
+    offset = width // 2 if nearest else 0
+    return (seconds - origin + offset) // width * width + origin
+
+
+def bucket_labels(buckets, fmt="%Y-%m-%d %H:%M"):
+    """strftime labels for a column of epoch-second buckets, formatting each distinct bucket once."""
+    codes, uniques = pd.factorize(buckets)
+    labels = np.asarray(pd.to_datetime(uniques, unit="s").strftime(fmt), dtype=object)
+    return pd.Series(labels[codes], index=buckets.index)
+
+
+def time_of_day_labels(seconds, width="30min"):
+    """hh:mm of each timestamp rounded to the nearest bucket of the given width."""
+    day = BUCKET_WIDTHS["day"]
+    return bucket_labels(bucket_start(seconds, width, nearest=True) % day, "%H:%M")
@@ -2,13 +2,9 @@ import argparse
 import pandas as pd
 import os
 from cogs import visualisation
-
-# Argument parser
-parser = argparse.ArgumentParser(description="Analyze Reddit posts and comments for mental health disclosures.")
-parser.add_argument("mode", choices=["posts", "comments"], help="Choose which dataset to analyze")
-parser.add_argument("-v", "--visualize", action="store_true", help="Enable visualization")
-
-args = parser.parse_args()
+from cogs.keyword_matcher import KeywordMatcher
+from cogs.session import AnalysisSession
+from cogs.streaming import stream_posts_report, stream_comments_report
 
 # Define file paths
 posts_path = os.path.abspath("./csv_files/posts.csv")
@@ -20,20 +16,14 @@ emotional_lexicon_path = os.path.abspath("./csv_files/emotion_lexicon.csv")
 mental_health_words = pd.read_csv(mental_health_lexicon_path).columns.tolist()
 emotional_words = pd.read_csv(emotional_lexicon_path).columns.tolist()
 
-# Function to count keyword appearances in text
-def count_keywords(text, keywords):
-    if pd.isna(text):
-        return 0
-    return sum(text.lower().count(word) for word in keywords)
+def make_session(whole_word=False):
+    # Compile both lexicons into one matcher so each text is scanned once
+    matcher = KeywordMatcher({"mental_health": mental_health_words, "emotional": emotional_words}, whole_word=whole_word)
+    return AnalysisSession(matcher, posts_path=posts_path, comments_path=comments_path)
 
 # Analyze posts
-def analyse_posts():
-    print("Loading posts data...")
-    posts = pd.read_csv(posts_path, dtype={"created_utc": "str"}, low_memory=False)
-    
-    posts["mental_health_count"] = posts["title"].apply(lambda x: count_keywords(x, mental_health_words)) + posts["selftext"].apply(lambda x: count_keywords(x, mental_health_words))
-    posts["emotional_count"] = posts["title"].apply(lambda x: count_keywords(x, emotional_words)) + posts["selftext"].apply(lambda x: count_keywords(x, emotional_words))
-    posts["disclosure_score"] = posts["mental_health_count"] + posts["emotional_count"]
+def posts_report(session):
+    posts = session.scored_posts()
 
     # Engagement analysis
     engagement = posts.groupby(["mental_health_count", "emotional_count"]).agg(
@@ -43,51 +33,70 @@ def analyse_posts():
         total_posts=("submission_id", "count")
     ).reset_index()
 
-    print("Post Engagement Analysis:")
-    print(engagement.sort_values(by="total_posts", ascending=False))
-
     # Most and least upvoted posts
-    most_upvoted = posts.loc[posts["upvote_ratio"].idxmax(), ["mental_health_count", "emotional_count", "upvote_ratio", "num_comments", "title", "selftext"]]
-    least_upvoted = posts.loc[posts["upvote_ratio"].idxmin(), ["mental_health_count", "emotional_count", "upvote_ratio", "num_comments", "title", "selftext"]]
-
-    print("\nMost Upvoted Post:")
-    print(most_upvoted)
-    print("\nLeast Upvoted Post:")
-    print(least_upvoted)
+    rows = posts[["mental_health_count", "emotional_count", "upvote_ratio", "num_comments", "title", "selftext"]]
+    if rows["num_comments"].isna().any():
+        # Printed as float, as when read_csv inferred the column and a value was missing
+        rows = rows.astype({"num_comments": "float64"})
+    most_upvoted = rows.loc[posts["upvote_ratio"].idxmax()]
+    least_upvoted = rows.loc[posts["upvote_ratio"].idxmin()]
 
     # Filtering for trigger warning (TW, CW)
-    tw_cw_posts = posts[posts["title"].str.contains(r'\b(?:TW|CW)\b', na=False, regex=True)]
-    non_tw_cw_posts = posts[~posts["title"].str.contains(r'\b(?:TW|CW)\b', na=False, regex=True)]
-
-    print("\nTrigger Warning (TW/CW) vs. Non-Trigger Warning Posts Analysis:")
-    print("TW/CW Posts Avg Upvote Ratio:", tw_cw_posts["upvote_ratio"].mean())
-    print("Non-TW/CW Posts Avg Upvote Ratio:", non_tw_cw_posts["upvote_ratio"].mean())
-    print("TW/CW Posts Avg Disclosure Score:", tw_cw_posts["disclosure_score"].mean())
-    print("Non-TW/CW Posts Avg Disclosure Score:", non_tw_cw_posts["disclosure_score"].mean())
+    has_tw_cw = posts["has_content_warning"]
+    tw_cw_posts = posts[has_tw_cw]
+    non_tw_cw_posts = posts[~has_tw_cw]
 
     # Neutral vs Emotional/Mental Health Posts
     neutral_posts = posts[posts["disclosure_score"] == 0]
     emotional_mh_posts = posts[posts["disclosure_score"] > 0]
 
-    print("\nNeutral vs Emotional/Mental Health Posts:")
-    print("Neutral Posts - Avg Comment Count:", neutral_posts["num_comments"].mean())
-    print("Neutral Posts - Avg Disclosure Score:", neutral_posts["disclosure_score"].mean())
-    print("Emotional/MH Posts - Avg Comment Count:", emotional_mh_posts["num_comments"].mean())
-    print("Emotional/MH Posts - Avg Disclosure Score:", emotional_mh_posts["disclosure_score"].mean())
+    return {
+        "engagement": engagement,
+        "most_upvoted": most_upvoted,
+        "least_upvoted": least_upvoted,
+        "tw_cw_upvote_ratio": tw_cw_posts["upvote_ratio"].mean(),
+        "non_tw_cw_upvote_ratio": non_tw_cw_posts["upvote_ratio"].mean(),
+        "tw_cw_disclosure_score": tw_cw_posts["disclosure_score"].mean(),
+        "non_tw_cw_disclosure_score": non_tw_cw_posts["disclosure_score"].mean(),
+        "neutral_num_comments": neutral_posts["num_comments"].mean(),
+        "neutral_disclosure_score": neutral_posts["disclosure_score"].mean(),
+        "emotional_num_comments": emotional_mh_posts["num_comments"].mean(),
+        "emotional_disclosure_score": emotional_mh_posts["disclosure_score"].mean(),
+    }
+
+def print_posts_report(report):
+    print("Post Engagement Analysis:")
+    print(report["engagement"].sort_values(by="total_posts", ascending=False))
 
+    print("\nMost Upvoted Post:")
+    print(report["most_upvoted"])
+    print("\nLeast Upvoted Post:")
+    print(report["least_upvoted"])
 
-    return posts  # Return dataframe for visualization if needed
+    print("\nTrigger Warning (TW/CW) vs. Non-Trigger Warning Posts Analysis:")
+    print("TW/CW Posts Avg Upvote Ratio:", report["tw_cw_upvote_ratio"])
+    print("Non-TW/CW Posts Avg Upvote Ratio:", report["non_tw_cw_upvote_ratio"])
+    print("TW/CW Posts Avg Disclosure Score:", report["tw_cw_disclosure_score"])
+    print("Non-TW/CW Posts Avg Disclosure Score:", report["non_tw_cw_disclosure_score"])
 
-# Analyze comments
-def analyse_comments():
-    print("Loading comments data...")
-    comments = pd.read_csv(comments_path, dtype={"created_utc": "str"}, low_memory=False)
+    print("\nNeutral vs Emotional/Mental Health Posts:")
+    print("Neutral Posts - Avg Comment Count:", report["neutral_num_comments"])
+    print("Neutral Posts - Avg Disclosure Score:", report["neutral_disclosure_score"])
+    print("Emotional/MH Posts - Avg Comment Count:", report["emotional_num_comments"])
+    print("Emotional/MH Posts - Avg Disclosure Score:", report["emotional_disclosure_score"])
 
-    comments["mental_health_count"] = comments["body"].apply(lambda x: count_keywords(x, mental_health_words))
-    comments["emotional_count"] = comments["body"].apply(lambda x: count_keywords(x, emotional_words))
-    comments["disclosure_score"] = comments["mental_health_count"] + comments["emotional_count"]
+def analyse_posts(session, streaming=False, chunksize=100_000):
+    print("Loading posts data...")
+    if streaming:
+        # Read posts.csv in chunks instead of holding the whole table in memory
+        report = stream_posts_report(session.matcher, session.posts_path, chunksize)
+    else:
+        report = posts_report(session)
+    print_posts_report(report)
 
-    comments["score"] = pd.to_numeric(comments["score"], errors="coerce")
+# Analyze comments
+def comments_report(session):
+    comments = session.scored_comments()
 
     # Engagement analysis
     engagement = comments.groupby(["mental_health_count", "emotional_count"]).agg(
@@ -96,40 +105,67 @@ def analyse_comments():
         total_comments=("comment_id", "count")
     ).reset_index()
 
-    print("Comment Engagement Analysis:")
-    print(engagement.sort_values(by="total_comments", ascending=False))
-
     # Filtering for trigger warning (TW, CW)
-    tw_cw_comments = comments[comments["body"].str.contains(r'\b(?:TW|CW)\b', na=False, regex=True)]
-    non_tw_cw_comments = comments[~comments["body"].str.contains(r'\b(?:TW|CW)\b', na=False, regex=True)]
+    has_tw_cw = comments["has_content_warning"]
+    tw_cw_comments = comments[has_tw_cw]
+    non_tw_cw_comments = comments[~has_tw_cw]
+
+    return {
+        "engagement": engagement,
+        "tw_cw_score": tw_cw_comments["score"].mean(),
+        "non_tw_cw_score": non_tw_cw_comments["score"].mean(),
+        "tw_cw_disclosure_score": tw_cw_comments["disclosure_score"].mean(),
+        "non_tw_cw_disclosure_score": non_tw_cw_comments["disclosure_score"].mean(),
+    }
+
+def print_comments_report(report):
+    print("Comment Engagement Analysis:")
+    print(report["engagement"].sort_values(by="total_comments", ascending=False))
 
     print("\nTrigger Warning (TW/CW) vs. Non-Trigger Warning Comments Analysis:")
-    print("TW/CW Comments Avg Score:", tw_cw_comments["score"].mean())
-    print("Non-TW/CW Comments Avg Score:", non_tw_cw_comments["score"].mean())
-    print("TW/CW Comments Avg Disclosure Score:", tw_cw_comments["disclosure_score"].mean())
-    print("Non-TW/CW Comments Avg Disclosure Score:", non_tw_cw_comments["disclosure_score"].mean())
+    print("TW/CW Comments Avg Score:", report["tw_cw_score"])
+    print("Non-TW/CW Comments Avg Score:", report["non_tw_cw_score"])
+    print("TW/CW Comments Avg Disclosure Score:", report["tw_cw_disclosure_score"])
+    print("Non-TW/CW Comments Avg Disclosure Score:", report["non_tw_cw_disclosure_score"])
 
-    return comments  # Return dataframe for visualization if needed
+def analyse_comments(session, streaming=False, chunksize=100_000):
+    print("Loading comments data...")
+    if streaming:
+        # Read comments.csv in chunks instead of holding the whole table in memory
+        report = stream_comments_report(session.matcher, session.comments_path, chunksize)
+    else:
+        report = comments_report(session)
+    print_comments_report(report)
 
 # Run selected analysis
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Analyze Reddit mental health data.")
-    parser.add_argument("option", choices=["posts", "comments"], help="Choose to analyze posts or comments.")
+    parser = argparse.ArgumentParser(description="Analyze Reddit posts and comments for mental health disclosures.")
+    parser.add_argument("option", choices=["posts", "comments", "all"], help="Choose to analyze posts, comments or both.")
     parser.add_argument("-v", "--visualize", action="store_true", help="Show visualization.")
+    parser.add_argument("-w", "--whole-word", action="store_true", help="Only count lexicon words as whole words.")
+    parser.add_argument("--streaming", action="store_true", help="Read the CSVs in chunks, using constant memory.")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows per chunk with --streaming.")
 
     args = parser.parse_args()
+    if args.streaming and args.visualize:
+        parser.error("--streaming cannot be combined with --visualize, which needs the full tables")
+
+    # One session per run: each dataset is loaded and scored once, however many steps use it
+    session = make_session(args.whole_word)
 
     if args.option == "posts":
         print("Analysing posts")
-        posts = analyse_posts()  # Store the returned DataFrame
+        analyse_posts(session, args.streaming, args.chunk_size)
         if args.visualize:
-            comments = pd.read_csv(comments_path, dtype={"created_utc": "str"}, low_memory=False)  # Load comments for visualization
-            visualisation.plot_post_analysis(posts, comments)
+            visualisation.plot_post_analysis(session)
     elif args.option == "comments":
         print("Analysing comments")
-        comments = analyse_comments()  # Store the returned DataFrame
+        analyse_comments(session, args.streaming, args.chunk_size)
         if args.visualize:
-            visualisation.plot_comment_analysis(comments)
+            visualisation.plot_comment_analysis(session)
     else:
-        analyse_posts()
-        analyse_comments()
+        analyse_posts(session, args.streaming, args.chunk_size)
+        analyse_comments(session, args.streaming, args.chunk_size)
+        if args.visualize:
+            visualisation.plot_post_analysis(session)
+            visualisation.plot_comment_analysis(session)
@@ -0,0 +1,182 @@
+import csv
+import importlib
+import os
+import random
+import shutil
+import sys
+import pandas as pd
+import pytest
+
+# The printed reports of main.py must not change: each test compares main.py's output on a small
+# generated corpus with the analyse_posts/analyse_comments main.py had before sessions, caching
+# and the keyword matcher, copied below.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEXICONS = ["mentalhealth_lexicon.csv", "emotion_lexicon.csv"]
+FILLER = ["today", "my", "friend", "said", "the", "and", "really", "name", "pronouns", "they", "them",
+          "work", "class", "family", "hair", "binder", "coming", "out", "happy", "love"]
+
+
+def count_keywords(text, keywords):
+    if pd.isna(text):
+        return 0
+    return sum(text.lower().count(word) for word in keywords)
+
+
+def baseline_analyse_posts(posts_path, mental_health_words, emotional_words):
+    print("Loading posts data...")
+    posts = pd.read_csv(posts_path, dtype={"created_utc": "str"}, low_memory=False)
+
+    posts["mental_health_count"] = posts["title"].apply(lambda x: count_keywords(x, mental_health_words)) + posts["selftext"].apply(lambda x: count_keywords(x, mental_health_words))
+    posts["emotional_count"] = posts["title"].apply(lambda x: count_keywords(x, emotional_words)) + posts["selftext"].apply(lambda x: count_keywords(x, emotional_words))
+    posts["disclosure_score"] = posts["mental_health_count"] + posts["emotional_count"]
+
+    engagement = posts.groupby(["mental_health_count", "emotional_count"]).agg(
+        avg_upvote_ratio=("upvote_ratio", "mean"),
+        avg_comments=("num_comments", "mean"),
+        avg_disclosure_score=("disclosure_score", "mean"),
+        total_posts=("submission_id", "count")
+    ).reset_index()
+
+    print("Post Engagement Analysis:")
+    print(engagement.sort_values(by="total_posts", ascending=False))
+
+    most_upvoted = posts.loc[posts["upvote_ratio"].idxmax(), ["mental_health_count", "emotional_count", "upvote_ratio", "num_comments", "title", "selftext"]]
+    least_upvoted = posts.loc[posts["upvote_ratio"].idxmin(), ["mental_health_count", "emotional_count", "upvote_ratio", "num_comments", "title", "selftext"]]
+
+    print("\nMost Upvoted Post:")
+    print(most_upvoted)
+    print("\nLeast Upvoted Post:")
+    print(least_upvoted)
+
+    tw_cw_posts = posts[posts["title"].str.contains(r'\b(?:TW|CW)\b', na=False, regex=True)]
+    non_tw_cw_posts = posts[~posts["title"].str.contains(r'\b(?:TW|CW)\b', na=False, regex=True)]
+
+    print("\nTrigger Warning (TW/CW) vs. Non-Trigger Warning Posts Analysis:")
+    print("TW/CW Posts Avg Upvote Ratio:", tw_cw_posts["upvote_ratio"].mean())
+    print("Non-TW/CW Posts Avg Upvote Ratio:", non_tw_cw_posts["upvote_ratio"].mean())
+    print("TW/CW Posts Avg Disclosure Score:", tw_cw_posts["disclosure_score"].mean())
+    print("Non-TW/CW Posts Avg Disclosure Score:", non_tw_cw_posts["disclosure_score"].mean())
+
+    neutral_posts = posts[posts["disclosure_score"] == 0]
+    emotional_mh_posts = posts[posts["disclosure_score"] > 0]
+
+    print("\nNeutral vs Emotional/Mental Health Posts:")
+    print("Neutral Posts - Avg Comment Count:", neutral_posts["num_comments"].mean())
+    print("Neutral Posts - Avg Disclosure Score:", neutral_posts["disclosure_score"].mean())
+    print("Emotional/MH Posts - Avg Comment Count:", emotional_mh_posts["num_comments"].mean())
+    print("Emotional/MH Posts - Avg Disclosure Score:", emotional_mh_posts["disclosure_score"].mean())
+
+
+def baseline_analyse_comments(comments_path, mental_health_words, emotional_words):
+    print("Loading comments data...")
+    comments = pd.read_csv(comments_path, dtype={"created_utc": "str"}, low_memory=False)
+
+    comments["mental_health_count"] = comments["body"].apply(lambda x: count_keywords(x, mental_health_words))
+    comments["emotional_count"] = comments["body"].apply(lambda x: count_keywords(x, emotional_words))
+    comments["disclosure_score"] = comments["mental_health_count"] + comments["emotional_count"]
+
+    comments["score"] = pd.to_numeric(comments["score"], errors="coerce")
+
+    engagement = comments.groupby(["mental_health_count", "emotional_count"]).agg(
+        avg_score=("score", "mean"),
+        avg_disclosure_score=("disclosure_score", "mean"),
+        total_comments=("comment_id", "count")
+    ).reset_index()
+
+    print("Comment Engagement Analysis:")
+    print(engagement.sort_values(by="total_comments", ascending=False))
+
+    tw_cw_comments = comments[comments["body"].str.contains(r'\b(?:TW|CW)\b', na=False, regex=True)]
+    non_tw_cw_comments = comments[~comments["body"].str.contains(r'\b(?:TW|CW)\b', na=False, regex=True)]
+
+    print("\nTrigger Warning (TW/CW) vs. Non-Trigger Warning Comments Analysis:")
+    print("TW/CW Comments Avg Score:", tw_cw_comments["score"].mean())
+    print("Non-TW/CW Comments Avg Score:", non_tw_cw_comments["score"].mean())
+    print("TW/CW Comments Avg Disclosure Score:", tw_cw_comments["disclosure_score"].mean())
+    print("Non-TW/CW Comments Avg Disclosure Score:", non_tw_cw_comments["disclosure_score"].mean())
+
+
+def random_text(rng, words, length):
+    parts = []
+    for _ in range(length):
+        word = rng.choice(words) if rng.random() < 0.15 else rng.choice(FILLER)
+        parts.append(word.capitalize() if rng.random() < 0.1 else word)
+    return " ".join(parts)
+
+
+def write_corpus(directory, words, missing_rate, posts=3000, comments=3000, seed=17):
+    """posts.csv and comments.csv with the columns data_loader expects, missing_rate of the numbers empty."""
+    rng = random.Random(seed)
+    with open(os.path.join(directory, "posts.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["author", "created_utc", "edited", "submission_id", "num_comments", "permalink", "score",
+                         "selftext", "subreddit", "title", "upvote_ratio", "disclosure_post",
+                         "disclosure_title", "disclosure_total"])
+        for i in range(posts):
+            title = random_text(rng, words, rng.randint(1, 12))
+            if rng.random() < 0.05:
+                title = rng.choice(["TW: ", "CW ", "tw: ", "(TW) "]) + title
+            selftext = "" if rng.random() < 0.1 else random_text(rng, words, rng.randint(1, 80))
+            num_comments = "" if rng.random() < missing_rate else rng.randint(0, 120)
+            writer.writerow([f"u{rng.randint(0, 400)}", str(1609459200 + i * 977), "FALSE", f"p{i}", num_comments,
+                             f"/r/NonBinary/p{i}", rng.randint(0, 900), selftext, "NonBinary", title,
+                             round(rng.uniform(0.05, 1.0), 2), rng.randint(0, 1), rng.randint(0, 1), rng.randint(0, 3)])
+    with open(os.path.join(directory, "comments.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["author", "body", "created_utc", "comment_id", "edited", "is_submitter", "link_id",
+                         "permalink", "parent_id", "score", "subreddit", "disclosure_total"])
+        for i in range(comments):
+            body = random_text(rng, words, rng.randint(1, 40))
+            if rng.random() < 0.05:
+                body = rng.choice(["TW: ", "CW - "]) + body
+            score = "" if rng.random() < missing_rate else rng.randint(-20, 400)
+            writer.writerow([f"u{rng.randint(0, 900)}", body, str(1609459200 + i * 311), f"c{i}", "FALSE", "FALSE",
+                             f"t3_p{i % posts}", f"/r/NonBinary/c{i}", f"t3_p{i % posts}", score, "NonBinary",
+                             rng.randint(0, 3)])
+
+
+# read_csv infers integer columns as float when a value is missing, which changes how they print
+@pytest.fixture(scope="module", params=[0.0, 0.02], ids=["complete", "missing-values"])
+def main_module(request, tmp_path_factory):
+    # main.py reads its CSVs and lexicons from ./csv_files when it is imported
+    directory = tmp_path_factory.mktemp("shah")
+    csv_files = directory / "csv_files"
+    csv_files.mkdir()
+    for name in LEXICONS:
+        shutil.copy(os.path.join(REPO_ROOT, "Nellie-Research", name), csv_files / name)
+    words = [w for name in LEXICONS for w in pd.read_csv(csv_files / name).columns if isinstance(w, str) and w]
+    write_corpus(csv_files, words, request.param)
+
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        sys.modules.pop("main", None)
+        yield importlib.import_module("main")
+    finally:
+        sys.modules.pop("main", None)
+        os.chdir(cwd)
+
+
+def test_posts_report_matches_baseline(main_module, capsys):
+    baseline_analyse_posts(main_module.posts_path, main_module.mental_health_words, main_module.emotional_words)
+    expected = capsys.readouterr().out
+    main_module.analyse_posts(main_module.make_session())
+    assert capsys.readouterr().out == expected
+
+
+def test_comments_report_matches_baseline(main_module, capsys):
+    baseline_analyse_comments(main_module.comments_path, main_module.mental_health_words, main_module.emotional_words)
+    expected = capsys.readouterr().out
+    main_module.analyse_comments(main_module.make_session())
+    assert capsys.readouterr().out == expected
+
+
+def test_streaming_reports_do_not_depend_on_chunk_size(main_module, capsys):
+    session = main_module.make_session()
+    outputs = []
+    for chunksize in (100_000, 977, 64):
+        main_module.analyse_posts(session, streaming=True, chunksize=chunksize)
+        main_module.analyse_comments(session, streaming=True, chunksize=chunksize)
+        outputs.append(capsys.readouterr().out)
+    assert outputs[0] == outputs[1] == outputs[2]
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+run_benchmarks.py
+
+Times every pipeline stage on a synthetic corpus (see synthetic_corpus.py) and reports
+rows/sec and peak memory, so performance changes can be measured and regressions caught.
+
+Each stage runs in its own process, so its peak RSS is not inflated by the stages before it.
+A stage's setup (imports, reading its input) is not timed but does count towards its peak
+RSS; worker processes a stage starts are reported separately as child RSS.
+
+Stages:
+    sanitise                    Nellie sanitiseFile on posts.csv and comments.csv
+    keyword_search              Nellie keywordSearch (the reference scorer) on every text
+    scoring_engine              Nellie ScoringEngine.scoreBatch on the same texts
+    count_keywords              Shah count_keywords (the reference counter) for both lexicons
+    keyword_matcher             Shah KeywordMatcher.count_frame on the same texts
+    analyse_posts               Shah posts_report, from the CSV with a cold Parquet cache
+    analyse_comments            Shah comments_report, likewise
+    analyse_posts_streaming     Shah stream_posts_report
+    analyse_comments_streaming  Shah stream_comments_report
+    comment_features            Aleeyah compute_features on every comment body
+    sentiment_sampling          Aleeyah's per-subreddit phrase sampling and sentiment scoring
+    sentiment_scoring           Aleeyah analyze_phrases on every comment body
+The sentiment stages need the VADER lexicon (see Aleeyah-Research/vader_lexicon.py) and
+are reported as skipped without it.
+
+Usage:
+    python run_benchmarks.py --posts 10000 --comments 50000 --output results.json
+    python run_benchmarks.py --baseline results.json    # exit 1 on a regression
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from synthetic_corpus import REPO_ROOT, add_corpus_arguments, corpus_settings, generate_corpus
+
+NELLIE = os.path.join(REPO_ROOT, "Nellie-Research")
+SHAH = os.path.join(REPO_ROOT, "Shah-Research")
+ALEEYAH = os.path.join(REPO_ROOT, "Aleeyah-Research")
+
+
+def _posts_texts(path):
+    posts = pd.read_csv(path, usecols=["title", "selftext"], dtype=str, keep_default_na=False)
+    return (posts["title"] + " " + posts["selftext"]).tolist()
+
+
+def _comment_texts(path):
+    return pd.read_csv(path, usecols=["body"], dtype=str, keep_default_na=False)["body"].tolist()
+
+
+def _nellie_lexicons():
+    sys.path.insert(0, NELLIE)
+    from scoringEngine import loadLexicon
+    return (loadLexicon(os.path.join(NELLIE, "mentalhealth_lexicon.csv")),
+            loadLexicon(os.path.join(NELLIE, "emotion_lexicon.csv")))
+
+
+def _shah_workspace(work_dir):
+    # main.py reads its lexicons from ./csv_files and the loaders cache under ./csv_files/cache
+    workspace = os.path.join(work_dir, "shah")
+    csv_files = os.path.join(workspace, "csv_files")
+    os.makedirs(csv_files, exist_ok=True)
+    for name in ("mentalhealth_lexicon.csv", "emotion_lexicon.csv"):
+        shutil.copyfile(os.path.join(NELLIE, name), os.path.join(csv_files, name))
+    shutil.rmtree(os.path.join(csv_files, "cache"), ignore_errors=True)
+    os.chdir(workspace)
+    sys.path.insert(0, SHAH)
+
+
+def _shah_session(ctx):
+    _shah_workspace(ctx.work_dir)
+    import main
+    from cogs.keyword_matcher import KeywordMatcher
+    from cogs.session import AnalysisSession
+    # As main.make_session, on the corpus files
+    matcher = KeywordMatcher({"mental_health": main.mental_health_words, "emotional": main.emotional_words})
+    return main, AnalysisSession(matcher, posts_path=ctx.posts_path, comments_path=ctx.comments_path)
+
+
+# Each stage does its untimed setup and returns (rows, run), where run() is what is timed
+
+def stage_sanitise(ctx):
+    sys.path.insert(0, NELLIE)
+    from multiprocessing import Pool
+    from sanitisation import sanitiseFile
+
+    def run():
+        pool = Pool(ctx.workers) if ctx.workers > 1 else None
+        try:
+            sanitiseFile(ctx.posts_path, os.path.join(ctx.work_dir, "sanitisedPosts.csv"),
+                         ["submission_id", "author", "subreddit", "title", "selftext"], pool, ctx.workers, 10000)
+            sanitiseFile(ctx.comments_path, os.path.join(ctx.work_dir, "sanitisedComments.csv"),
+                         ["comment_id", "parent_id", "author", "subreddit", "body"], pool, ctx.workers, 10000)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    return ctx.posts + ctx.comments, run
+
+
+def stage_keyword_search(ctx):
+    mh_lexicon, em_lexicon = _nellie_lexicons()
+    from scoringEngine import keywordSearch
+    texts = _posts_texts(ctx.posts_path) + _comment_texts(ctx.comments_path)
+
+    def run():
+        for text in texts:
+            keywordSearch(text, mh_lexicon, em_lexicon)
+    return len(texts), run
+
+
+def stage_scoring_engine(ctx):
+    mh_lexicon, em_lexicon = _nellie_lexicons()
+    from scoringEngine import ScoringEngine
+    texts = _posts_texts(ctx.posts_path) + _comment_texts(ctx.comments_path)
+
+    def run():
+        # In batches, as scoring.py scores rows
+        engine = ScoringEngine(mh_lexicon, em_lexicon)
+        for start in range(0, len(texts), 10000):
+            engine.scoreBatch(texts[start:start + 10000])
+    return len(texts), run
+
+
+def stage_count_keywords(ctx):
+    _shah_workspace(ctx.work_dir)
+    import main
+    from cogs.keyword_matcher import count_keywords
+    texts = _posts_texts(ctx.posts_path) + _comment_texts(ctx.comments_path)
+
+    def run():
+        for text in texts:
+            count_keywords(text, main.mental_health_words)
+            count_keywords(text, main.emotional_words)
+    return len(texts), run
+
+
+def stage_keyword_matcher(ctx):
+    _shah_workspace(ctx.work_dir)
+    import main
+    from cogs.keyword_matcher import KeywordMatcher
+    frame = pd.DataFrame({"text": _posts_texts(ctx.posts_path) + _comment_texts(ctx.comments_path)})
+
+    def run():
+        matcher = KeywordMatcher({"mental_health": main.mental_health_words, "emotional": main.emotional_words})
+        matcher.count_frame(frame, ["text"])
+    return len(frame), run
+
+
+def stage_analyse_posts(ctx):
+    main, session = _shah_session(ctx)
+    return ctx.posts, lambda: main.posts_report(session)
+
+
+def stage_analyse_comments(ctx):
+    main, session = _shah_session(ctx)
+    return ctx.comments, lambda: main.comments_report(session)
+
+
+def stage_analyse_posts_streaming(ctx):
+    main, session = _shah_session(ctx)
+    from cogs.streaming import stream_posts_report
+    return ctx.posts, lambda: stream_posts_report(session.matcher, ctx.posts_path, ctx.chunk_size)
+
+
+def stage_analyse_comments_streaming(ctx):
+    main, session = _shah_session(ctx)
+    from cogs.streaming import stream_comments_report
+    return ctx.comments, lambda: stream_comments_report(session.matcher, ctx.comments_path, ctx.chunk_size)
+
+
+def stage_comment_features(ctx):
+    sys.path.insert(0, ALEEYAH)
+    from comment_features import compute_features
+    bodies = pd.read_csv(ctx.comments_path, usecols=["body"], low_memory=False)["body"].astype(str).str.strip()
+    return len(bodies), lambda: compute_features(bodies, workers=ctx.workers)
+
+
+def _vader_available():
+    sys.path.insert(0, ALEEYAH)
+    from vader_lexicon import load_lexicon
+    try:
+        load_lexicon()
+    except LookupError as error:
+        return str(error)
+    return None
+
+
+def stage_sentiment_sampling(ctx):
+    missing = _vader_available()
+    if missing:
+        return missing
+    import analysis
+    comments = analysis.load_comments(ctx.comments_path, workers=ctx.workers)
+
+    def run():
+        # As analysis.py samples each subreddit's censored and uncensored comments
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for _, group in comments.groupby(["subreddit", "is_censored"], sort=False):
+                analysis.get_sentiment_scores(group, target=ctx.sample_size, seed=ctx.seed)
+    return len(comments), run
+
+
+def stage_sentiment_scoring(ctx):
+    missing = _vader_available()
+    if missing:
+        return missing
+    from sentiment_analysis import analyze_phrases
+    bodies = _comment_texts(ctx.comments_path)
+    return len(bodies), lambda: analyze_phrases(bodies, workers=ctx.workers)
+
+
+STAGES = {
+    "sanitise": stage_sanitise,
+    "keyword_search": stage_keyword_search,
+    "scoring_engine": stage_scoring_engine,
+    "count_keywords": stage_count_keywords,
+    "keyword_matcher": stage_keyword_matcher,
+    "analyse_posts": stage_analyse_posts,
+    "analyse_comments": stage_analyse_comments,
+    "analyse_posts_streaming": stage_analyse_posts_streaming,
+    "analyse_comments_streaming": stage_analyse_comments_streaming,
+    "comment_features": stage_comment_features,
+    "sentiment_sampling": stage_sentiment_sampling,
+    "sentiment_scoring": stage_sentiment_scoring,
+}
+
+
+def peak_rss_mb(children=False):
+    """Peak resident set size in MB of this process, or of its largest child process."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_stage(ctx):
+    """Run one stage in this process and return its measurements."""
+    start = time.perf_counter()
+    prepared = STAGES[ctx.stage](ctx)
+    if isinstance(prepared, str):
+        return {"skipped": prepared}
+    rows, run = prepared
+    setup = time.perf_counter() - start
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None,
+        "setup_seconds": round(setup, 4),
+        "peak_rss_mb": peak_rss_mb(),
+        "children_peak_rss_mb": peak_rss_mb(children=True),
+    }
+
+
+def ensure_corpus(args):
+    """Generate the corpus into args.data unless a matching one is already there."""
+    manifest_path = os.path.join(args.data, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if {key: manifest.get(key) for key in corpus_settings(args)} == corpus_settings(args):
+            return manifest
+    print(f"Generating {args.posts:,} posts and {args.comments:,} comments in {args.data}")
+    return generate_corpus(args, args.data)
+
+
+def compare(results, baseline, max_slowdown, max_memory_growth):
+    """Stages whose rows/sec fell, or whose peak RSS grew, by more than the allowed fractions."""
+    regressions = []
+    for stage, result in results["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before or "skipped" in result or "skipped" in before:
+            continue
+        if result["rows_per_second"] and before["rows_per_second"] \
+                and result["rows_per_second"] < before["rows_per_second"] * (1 - max_slowdown):
+            regressions.append(f"{stage}: {before['rows_per_second']:,.0f} -> {result['rows_per_second']:,.0f} rows/s")
+        if result["peak_rss_mb"] and before["peak_rss_mb"] \
+                and result["peak_rss_mb"] > before["peak_rss_mb"] * (1 + max_memory_growth):
+            regressions.append(f"{stage}: peak RSS {before['peak_rss_mb']:,.0f} -> {result['peak_rss_mb']:,.0f} MB")
+    return regressions
+
+
+def print_table(results):
+    print(f"\n{'stage':<28}{'rows':>12}{'seconds':>10}{'rows/s':>14}{'peak RSS MB':>13}{'child MB':>10}")
+    for stage, result in results["stages"].items():
+        if "skipped" in result:
+            print(f"{stage:<28}skipped: {result['skipped'].splitlines()[0][:70]}")
+            continue
+        rate = f"{result['rows_per_second']:,.0f}" if result["rows_per_second"] else "-"
+        peak = result["peak_rss_mb"] if result["peak_rss_mb"] is not None else "-"
+        children = result["children_peak_rss_mb"] or "-"
+        print(f"{stage:<28}{result['rows']:>12,}{result['seconds']:>10.2f}{rate:>14}{peak:>13}{children:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the research pipelines on a synthetic corpus.")
+    add_corpus_arguments(parser)
+    parser.add_argument("--data", default="synthetic_data", help="corpus directory, generated if missing or different")
+    parser.add_argument("--work-dir", default="benchmark_work", help="directory for stage outputs and caches")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES), help="stages to run")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for stages that can use a pool")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="rows per chunk for the streaming stages")
+    parser.add_argument("--sample-size", type=int, default=500, help="phrases sampled per group for sentiment_sampling")
+    parser.add_argument("--output", help="write the results as JSON, for a later --baseline")
+    parser.add_argument("--baseline", help="results JSON to compare with; exit 1 on a regression")
+    parser.add_argument("--max-slowdown", type=float, default=0.2, help="allowed fractional drop in rows/s")
+    parser.add_argument("--max-memory-growth", type=float, default=0.2, help="allowed fractional growth in peak RSS")
+    parser.add_argument("--stage", choices=list(STAGES), help=argparse.SUPPRESS)  # internal: run one stage
+    args = parser.parse_args()
+    args.data = os.path.abspath(args.data)
+    args.work_dir = os.path.abspath(args.work_dir)
+    args.posts_path = os.path.join(args.data, "posts.csv")
+    args.comments_path = os.path.join(args.data, "comments.csv")
+
+    if args.stage:
+        print(json.dumps(run_stage(args)))
+        return
+
+    manifest = ensure_corpus(args)
+    os.makedirs(args.work_dir, exist_ok=True)
+    results = {
+        "corpus": corpus_settings(args),
+        "environment": {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                        "platform": platform.platform(), "cpus": os.cpu_count(), "workers": args.workers},
+        "corpus_bytes": sum(os.path.getsize(path) for path in (args.posts_path, args.comments_path)),
+        "generation_seconds": manifest.get("seconds"),
+        "stages": {},
+    }
+    for stage in args.stages:
+        print(f"Running {stage}...", flush=True)
+        # Corpus and run options are passed on, so each stage process sees the same settings
+        command = [sys.executable, os.path.abspath(__file__), *_stage_arguments(args), "--stage", stage]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            sys.stderr.write(completed.stderr)
+            results["stages"][stage] = {"skipped": f"failed with exit code {completed.returncode}"}
+            continue
+        results["stages"][stage] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != results["corpus"]:
+            print("\nWARNING: the baseline was measured on a different corpus")
+        regressions = compare(results, baseline, args.max_slowdown, args.max_memory_growth)
+        if regressions:
+            print("\nRegressions against " + args.baseline + ":")
+            for regression in regressions:
+                print("  " + regression)
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
+
+
+def _stage_arguments(args):
+    settings = corpus_settings(args)
+    arguments = []
+    for key in ("posts", "comments", "seed", "lexicon_rate", "sentiment_rate", "warning_rate",
+                "phrase_rate", "deleted_rate"):
+        arguments += ["--" + key.replace("_", "-"), str(settings[key])]
+    return arguments + ["--data", args.data, "--work-dir", args.work_dir, "--workers", str(args.workers),
+                        "--chunk-size", str(args.chunk_size), "--sample-size", str(args.sample_size)]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+synthetic_corpus.py
+
+Deterministic synthetic Reddit corpus for benchmarking the research pipelines without the
+real data.
+
+Writes posts.csv and comments.csv with exactly the columns Shah-Research/cogs/data_loader.py
+reads (POSTS_DTYPES / COMMENTS_DTYPES, in that order), which include every column
+Nellie-Research/sanitisation.py keeps. The same seed and row counts always give byte-identical
+files. The corpus imitates the real data where the pipelines are sensitive to it:
+
+- lengths: words per title, selftext and comment body are log-normal, some posts have several
+  paragraphs, some selftexts are empty (link posts) and some texts are [deleted]/[removed]
+  or shorter than the three words sanitisation keeps;
+- vocabulary: Zipf-distributed filler words, with words from Nellie's mental health and
+  emotion lexicons and common VADER sentiment words, negations and boosters mixed in at
+  configurable hit rates, plus punctuation, ALL CAPS and emoji;
+- markers: TW/CW/NSFW content warnings (plain, bold and spoiler forms), and quoted,
+  bracketed and *starred* phrases for Aleeyah's comment features;
+- structure: every comment's link_id is its post ("t3_<submission_id>"), parent_id is the
+  post or an earlier comment of the same thread ("t1_<comment_id>"), num_comments is the
+  post's real comment count, and authors repeat with a heavy-tailed distribution.
+
+Rows are generated and written a chunk of posts (and their comments) at a time with NumPy,
+so memory stays constant from 10k to 50M rows.
+
+Usage:
+    python synthetic_corpus.py --posts 10000 --comments 50000 -o synthetic_data
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.append(os.path.join(REPO_ROOT, "Shah-Research"))
+from cogs.data_loader import COMMENTS_DTYPES, POSTS_DTYPES
+
+POST_COLUMNS = list(POSTS_DTYPES)
+COMMENT_COLUMNS = list(COMMENTS_DTYPES)
+MH_LEXICON_PATH = os.path.join(REPO_ROOT, "Nellie-Research", "mentalhealth_lexicon.csv")
+EM_LEXICON_PATH = os.path.join(REPO_ROOT, "Nellie-Research", "emotion_lexicon.csv")
+
+# Rows (posts and their comments) per generated chunk; part of the corpus definition, so
+# changing it changes the output
+CHUNK_ROWS = 120_000
+
+SUBREDDITS = ["NonBinary", "NonBinaryTalk", "enby", "genderqueer", "agender", "genderfluid", "GenderCynical"]
+SUBREDDIT_WEIGHTS = [0.35, 0.2, 0.15, 0.12, 0.08, 0.06, 0.04]
+
+COMMON_WORDS = (
+    "the to and a of i it that is in my you for this was me but be have with so on just like "
+    "not they are do what if can all as at or about know think people really because get one "
+    "them how would feel been more when up out some time want am any its even also from we no "
+    "had im dont being much still going there now their than only thing things me myself mine "
+    "your why who pronouns gender binary nonbinary enby they/them name friends family work "
+    "school hair clothes body identity queer trans partner mom dad today year day week"
+).split()
+
+# Common VADER lexicon words, negations, boosters and rule words, so sentiment scoring does
+# real work; none of these needs the lexicon itself
+SENTIMENT_WORDS = (
+    "good great love happy glad nice thanks thank best beautiful amazing awesome support "
+    "hope proud safe comfortable excited fun cute bad hate sad angry hurt scared afraid worried "
+    "awful terrible horrible wrong lonely tired hard pain cry crying stress stressed upset "
+    "not never no isn't don't can't very really extremely so kind of sort least but"
+).split()
+
+EMOJI = ["💛", "🤍", "💜", "🖤", ":)", ":(", "<3", "lol"]
+
+CONTENT_WARNINGS = ["TW: ", "CW: ", "TW ", "tw: ", "**TW**: ", "**CW** ", ">!TW!< ", "NSFW ", "(TW: sh) ", "CW - "]
+
+# Suffix/case variants of every vocabulary word and how often each is used
+VARIANTS = ["{}", "{},", "{}.", "{}!", "{}?", "{}...", "UPPER", "Title"]
+VARIANT_WEIGHTS = [0.78, 0.07, 0.07, 0.02, 0.02, 0.01, 0.01, 0.02]
+
+BASE36 = np.frombuffer(b"0123456789abcdefghijklmnopqrstuvwxyz", dtype=np.uint8)
+START_TIME = 1609459200  # 2021-01-01
+END_TIME = 1704067200    # 2024-01-01
+
+
+def load_lexicon(path: str) -> list:
+    """Words of a Nellie lexicon CSV (one comma-separated line), as scoringEngine.loadLexicon reads them."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return sorted({word.strip().lower() for word in f.read().split(",") if word.strip()})
+
+
+def base36_ids(numbers: np.ndarray, width: int = 7) -> np.ndarray:
+    """Reddit-style base-36 ids of non-negative integers, as an object array of strings."""
+    digits = np.empty((len(numbers), width), dtype=np.uint8)
+    remaining = np.asarray(numbers, dtype=np.int64).copy()
+    for column in range(width - 1, -1, -1):
+        digits[:, column] = BASE36[remaining % 36]
+        remaining //= 36
+    return np.array(digits.view(f"S{width}").ravel().astype(str), dtype=object)
+
+
+class Vocabulary:
+    """
+    Every word variant the texts are drawn from, with the categories needed to sample
+    filler, lexicon and sentiment words at their own rates.
+    """
+
+    def __init__(self, seed: int, mh_words: list, em_words: list, filler_size: int = 20000):
+        rng = np.random.default_rng([seed, 0])
+        letters = np.frombuffer(b"abcdefghijklmnopqrstuvwxyz", dtype=np.uint8)
+        lengths = rng.integers(2, 11, size=filler_size)
+        invented = ["".join(map(chr, letters[rng.integers(0, 26, size=n)])) for n in lengths]
+        # Common words first, so the Zipf ranks make them the most frequent filler
+        filler = list(dict.fromkeys(COMMON_WORDS + invented))
+        lexicon = sorted(set(mh_words) | set(em_words))
+        sentiment = SENTIMENT_WORDS
+
+        bases = filler + lexicon + sentiment + EMOJI
+        words = []
+        for base in bases:
+            for variant in VARIANTS:
+                if variant == "UPPER":
+                    words.append(base.upper())
+                elif variant == "Title":
+                    words.append(base.capitalize())
+                else:
+                    words.append(variant.format(base))
+        self.words = np.array(words, dtype=object)
+        self.lengths = np.fromiter((len(word) for word in words), dtype=np.int64, count=len(words))
+        self.filler_count = len(filler)
+        self.lexicon_start = len(filler)
+        self.lexicon_count = len(lexicon)
+        self.sentiment_start = self.lexicon_start + len(lexicon)
+        self.sentiment_count = len(sentiment)
+        self.emoji_start = self.sentiment_start + len(sentiment)
+        self.mh_flags = np.zeros(len(bases), dtype=bool)
+        self.mh_flags[self.lexicon_start:self.sentiment_start] = np.isin(lexicon, list(mh_words))
+        ranks = np.arange(1, self.filler_count + 1)
+        self.filler_cdf = np.cumsum(1 / (ranks + 2.7))
+        self.filler_cdf /= self.filler_cdf[-1]
+        self.variant_cdf = np.cumsum(VARIANT_WEIGHTS)
+        self.variant_cdf /= self.variant_cdf[-1]
+
+    def sample(self, rng, count: int, lexicon_rate: float, sentiment_rate: float) -> np.ndarray:
+        """Indices into words of count randomly drawn tokens."""
+        kind = rng.random(count)
+        bases = np.searchsorted(self.filler_cdf, rng.random(count), side="right")
+        lexicon = kind < lexicon_rate
+        bases[lexicon] = self.lexicon_start + rng.integers(0, self.lexicon_count, size=lexicon.sum())
+        sentiment = (kind >= lexicon_rate) & (kind < lexicon_rate + sentiment_rate)
+        bases[sentiment] = self.sentiment_start + rng.integers(0, self.sentiment_count, size=sentiment.sum())
+        emoji = kind > 0.998
+        bases[emoji] = self.emoji_start + rng.integers(0, len(EMOJI), size=emoji.sum())
+        variants = np.searchsorted(self.variant_cdf, rng.random(count), side="right")
+        return bases * len(VARIANTS) + np.minimum(variants, len(VARIANTS) - 1)
+
+    def texts(self, rng, word_counts: np.ndarray, lexicon_rate: float, sentiment_rate: float) -> tuple:
+        """
+        Random texts with the given number of words each.
+
+        Returns:
+            tuple: (texts, mh_hits), an object array of strings and the number of mental
+            health lexicon words in each text.
+        """
+        tokens = self.sample(rng, int(word_counts.sum()), lexicon_rate, sentiment_rate)
+        # Join every token once, then cut the texts out of the joined string
+        joined = " ".join(self.words[tokens].tolist())
+        ends = np.cumsum(self.lengths[tokens] + 1)
+        boundaries = np.concatenate(([0], np.cumsum(word_counts)))
+        char_starts = np.concatenate(([0], ends))[boundaries[:-1]]
+        char_ends = np.maximum(np.concatenate(([0], ends))[boundaries[1:]] - 1, char_starts)
+        texts = np.array([joined[start:end] for start, end in zip(char_starts.tolist(), char_ends.tolist())],
+                         dtype=object)
+        mh_running = np.concatenate(([0], np.cumsum(self.mh_flags[tokens // len(VARIANTS)])))
+        return texts, mh_running[boundaries[1:]] - mh_running[boundaries[:-1]]
+
+
+def _word_counts(rng, count: int, median: float, sigma: float) -> np.ndarray:
+    return np.maximum(rng.lognormal(np.log(median), sigma, size=count), 0).astype(np.int64)
+
+
+def _decorate(rng, vocabulary: Vocabulary, texts: np.ndarray, args) -> np.ndarray:
+    """Add content warnings and quoted, bracketed or starred phrases to some texts."""
+    count = len(texts)
+    warned = rng.random(count) < args.warning_rate
+    markers = np.array(CONTENT_WARNINGS, dtype=object)[rng.integers(0, len(CONTENT_WARNINGS), size=warned.sum())]
+    texts[warned] = markers + texts[warned]
+
+    phrased = np.flatnonzero(rng.random(count) < args.phrase_rate)
+    phrases, _ = vocabulary.texts(rng, rng.integers(1, 6, size=len(phrased)), args.lexicon_rate, args.sentiment_rate)
+    forms = rng.integers(0, 3, size=len(phrased))
+    openings = np.array(["(", '"', "*"], dtype=object)[forms]
+    closings = np.array([")", '"', "*"], dtype=object)[forms]
+    texts[phrased] = texts[phrased] + " " + openings + phrases + closings
+    return texts
+
+
+def _timestamps_after(rng, created: np.ndarray, median_delay: float) -> np.ndarray:
+    return created + rng.lognormal(np.log(median_delay), 1.5, size=len(created)).astype(np.int64)
+
+
+def _edited(rng, created: np.ndarray, rate: float) -> np.ndarray:
+    # Reddit stores False, or the time of the last edit
+    edited = np.full(len(created), "False", dtype=object)
+    mask = rng.random(len(created)) < rate
+    edited[mask] = (_timestamps_after(rng, created[mask], 3600) + 0.0).astype(str).astype(object)
+    return edited
+
+
+def _authors(rng, count: int, pool: int) -> np.ndarray:
+    # Heavy-tailed: a few accounts write a large share of the rows
+    ranks = np.minimum((pool * rng.random(count) ** 2).astype(np.int64), pool - 1)
+    authors = ("u_" + base36_ids(ranks, 6)).astype(object)
+    authors[rng.random(count) < 0.04] = "[deleted]"
+    return authors
+
+
+def _remove_some(rng, texts: np.ndarray, deleted_rate: float) -> np.ndarray:
+    removed = rng.random(len(texts)) < deleted_rate
+    texts[removed] = np.array(["[deleted]", "[removed]"], dtype=object)[rng.integers(0, 2, size=removed.sum())]
+    return texts
+
+
+def generate_chunk(vocabulary: Vocabulary, args, index: int, post_start: int, post_count: int,
+                   comment_start: int, comment_count: int) -> tuple:
+    """
+    One chunk of posts and their comments as DataFrames of strings.
+
+    Posts are numbered from post_start and comments from comment_start, so ids are unique
+    across chunks; the random stream depends only on the seed and the chunk index.
+    """
+    rng = np.random.default_rng([args.seed, 1, index])
+    author_pool = max(1000, (args.posts + args.comments) // 8)
+
+    # Posts
+    submission_ids = base36_ids(np.arange(post_start, post_start + post_count) + 36 ** 5)
+    subreddits = np.array(SUBREDDITS, dtype=object)[
+        np.searchsorted(np.cumsum(SUBREDDIT_WEIGHTS), rng.random(post_count) * sum(SUBREDDIT_WEIGHTS), side="right")]
+    titles, title_hits = vocabulary.texts(rng, np.maximum(_word_counts(rng, post_count, 9, 0.5), 1),
+                                          args.lexicon_rate, args.sentiment_rate)
+    titles = _decorate(rng, vocabulary, titles, args)
+    selftexts, selftext_hits = vocabulary.texts(rng, _word_counts(rng, post_count, 60, 1.1),
+                                                args.lexicon_rate, args.sentiment_rate)
+    paragraphs = np.flatnonzero(rng.random(post_count) < 0.3)
+    extra, extra_hits = vocabulary.texts(rng, _word_counts(rng, len(paragraphs), 40, 0.8),
+                                         args.lexicon_rate, args.sentiment_rate)
+    selftexts[paragraphs] = selftexts[paragraphs] + "\n\n" + extra
+    selftext_hits[paragraphs] += extra_hits
+    selftexts = _decorate(rng, vocabulary, selftexts, args)
+    selftexts[rng.random(post_count) < 0.15] = ""  # link and image posts
+    selftexts = _remove_some(rng, selftexts, args.deleted_rate)
+    created = rng.integers(START_TIME, END_TIME, size=post_count)
+    post_authors = _authors(rng, post_count, author_pool)
+
+    # Comments go to posts in proportion to heavy-tailed weights, so a few threads are long
+    weights = rng.lognormal(0, 1.5, size=post_count)
+    num_comments = rng.multinomial(comment_count, weights / weights.sum())
+    post_of = np.repeat(np.arange(post_count), num_comments)
+    thread_start = np.repeat(np.cumsum(num_comments) - num_comments, num_comments)
+    position = np.arange(comment_count) - thread_start
+
+    disclosure_post = (selftext_hits > 0).astype(np.int64)
+    disclosure_title = (title_hits > 0).astype(np.int64)
+    posts = pd.DataFrame({
+        "author": post_authors,
+        "created_utc": created.astype(str),
+        "edited": _edited(rng, created, 0.1),
+        "submission_id": submission_ids,
+        "num_comments": num_comments,
+        "permalink": "/r/" + subreddits + "/comments/" + submission_ids + "/",
+        "score": (rng.lognormal(1.5, 1.5, size=post_count) - 1).astype(np.int64),
+        "selftext": selftexts,
+        "subreddit": subreddits,
+        "title": titles,
+        "upvote_ratio": np.round(rng.beta(8, 1.5, size=post_count), 2),
+        "disclosure_post": disclosure_post,
+        "disclosure_title": disclosure_title,
+        "disclosure_total": disclosure_post + disclosure_title,
+    }, columns=POST_COLUMNS)
+
+    # Comments
+    comment_ids = base36_ids(np.arange(comment_start, comment_start + comment_count) + 36 ** 5)
+    bodies, body_hits = vocabulary.texts(rng, np.maximum(_word_counts(rng, comment_count, 18, 1.0), 1),
+                                         args.lexicon_rate, args.sentiment_rate)
+    bodies = _decorate(rng, vocabulary, bodies, args)
+    bodies = _remove_some(rng, bodies, args.deleted_rate)
+    # The first comment of a thread replies to the post; later ones reply to the post or to
+    # an earlier comment of the same thread
+    top_level = (position == 0) | (rng.random(comment_count) < 0.4)
+    replied = thread_start + (rng.random(comment_count) * position).astype(np.int64)
+    parent_ids = np.where(top_level, "t3_" + submission_ids[post_of], "t1_" + comment_ids[replied])
+    comment_created = _timestamps_after(rng, created[post_of], 3600)
+    comment_authors = _authors(rng, comment_count, author_pool)
+    is_submitter = rng.random(comment_count) < 0.1
+    comment_authors[is_submitter] = post_authors[post_of][is_submitter]
+    disclosure_total = (body_hits > 0).astype(np.int64).astype(str).astype(object)
+    disclosure_total[rng.random(comment_count) < 0.01] = ""  # unlabelled rows, read as NaN
+    comment_subreddits = subreddits[post_of]
+    comments = pd.DataFrame({
+        "author": comment_authors,
+        "body": bodies,
+        "created_utc": comment_created.astype(str),
+        "comment_id": comment_ids,
+        "edited": _edited(rng, comment_created, 0.05),
+        "is_submitter": np.where(is_submitter & (comment_authors != "[deleted]"), "True", "False"),
+        "link_id": "t3_" + submission_ids[post_of],
+        "permalink": "/r/" + comment_subreddits + "/comments/" + submission_ids[post_of] + "/comment/" + comment_ids + "/",
+        "parent_id": parent_ids,
+        "score": (rng.lognormal(0.7, 1.2, size=comment_count) - rng.integers(0, 3, size=comment_count)).astype(np.int64),
+        "subreddit": comment_subreddits,
+        "disclosure_total": disclosure_total,
+    }, columns=COMMENT_COLUMNS)
+    return posts, comments
+
+
+def corpus_settings(args) -> dict:
+    """Everything that determines the generated files, as recorded in manifest.json."""
+    return {
+        "posts": args.posts, "comments": args.comments, "seed": args.seed,
+        "lexicon_rate": args.lexicon_rate, "sentiment_rate": args.sentiment_rate,
+        "warning_rate": args.warning_rate, "phrase_rate": args.phrase_rate,
+        "deleted_rate": args.deleted_rate, "chunk_rows": CHUNK_ROWS,
+    }
+
+
+def generate_corpus(args, output_dir: str, verbose: bool = True) -> dict:
+    """
+    Write posts.csv, comments.csv and manifest.json to output_dir.
+
+    Returns:
+        dict: The manifest: the corpus settings and the generation time.
+    """
+    if args.posts < 1 or args.comments < 0:
+        raise ValueError("a corpus needs at least one post and no negative counts")
+    os.makedirs(output_dir, exist_ok=True)
+    vocabulary = Vocabulary(args.seed, load_lexicon(MH_LEXICON_PATH), load_lexicon(EM_LEXICON_PATH))
+    posts_path = os.path.join(output_dir, "posts.csv")
+    comments_path = os.path.join(output_dir, "comments.csv")
+    start = time.perf_counter()
+    chunk_posts = max(1, CHUNK_ROWS * args.posts // (args.posts + args.comments))
+    chunks = -(-args.posts // chunk_posts)
+    # Written under temporary names, so an interrupted run never leaves a partial corpus behind
+    with open(posts_path + ".tmp", "w", newline="", encoding="utf-8") as posts_file, \
+            open(comments_path + ".tmp", "w", newline="", encoding="utf-8") as comments_file:
+        for index in range(chunks):
+            post_start = index * chunk_posts
+            post_end = min(post_start + chunk_posts, args.posts)
+            # Comments are split between chunks in proportion to their posts, exactly
+            comment_start = args.comments * post_start // args.posts
+            comment_end = args.comments * post_end // args.posts
+            posts, comments = generate_chunk(vocabulary, args, index, post_start, post_end - post_start,
+                                             comment_start, comment_end - comment_start)
+            posts.to_csv(posts_file, header=index == 0, index=False)
+            comments.to_csv(comments_file, header=index == 0, index=False)
+            if verbose:
+                print(f"\rGenerated {post_end:,} posts and {comment_end:,} comments", end="", flush=True)
+    os.replace(posts_path + ".tmp", posts_path)
+    os.replace(comments_path + ".tmp", comments_path)
+    if verbose:
+        print()
+
+    manifest = dict(corpus_settings(args), seconds=round(time.perf_counter() - start, 3))
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def add_corpus_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options defining a corpus, shared with run_benchmarks.py."""
+    parser.add_argument("--posts", type=int, default=10000, help="number of posts")
+    parser.add_argument("--comments", type=int, default=50000, help="number of comments")
+    parser.add_argument("--seed", type=int, default=42, help="random seed; the same seed gives the same files")
+    parser.add_argument("--lexicon-rate", type=float, default=0.02,
+                        help="fraction of words from the mental health and emotion lexicons")
+    parser.add_argument("--sentiment-rate", type=float, default=0.06,
+                        help="fraction of words from the built-in list of sentiment words")
+    parser.add_argument("--warning-rate", type=float, default=0.03, help="fraction of texts with a TW/CW marker")
+    parser.add_argument("--phrase-rate", type=float, default=0.15,
+                        help="fraction of texts with a quoted, bracketed or starred phrase")
+    parser.add_argument("--deleted-rate", type=float, default=0.05, help="fraction of texts [deleted] or [removed]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic posts.csv and comments.csv.")
+    add_corpus_arguments(parser)
+    parser.add_argument("-o", "--output", default="synthetic_data", help="directory to write the files to")
+    args = parser.parse_args()
+    if args.posts < 1 or args.comments < 0:
+        parser.error("--posts must be at least 1 and --comments at least 0")
+
+    manifest = generate_corpus(args, args.output)
+    print(f"Wrote {args.posts:,} posts and {args.comments:,} comments to {args.output} in {manifest['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()